@@ -1,21 +1,37 @@
 # app.py — Qist – Check (NL/EN) + echte tickers + halal-screening + uitgebreide uitleg + analytics
-import re
 import json
 import uuid
 import hashlib
+import time
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Dict, Tuple, List, Optional
 
 import pandas as pd
-import requests
 import streamlit as st
-import yfinance as yf
+
+from qist import bulk, etf, history, metrics, rules, search_index, snapshot, typeahead, watchlist, yahoo
+from qist.analytics import GASender, SheetWriter
 
 APP_VERSION = "2025-10-15-v6"
 
 # ---------- Basis-config ----------
 st.set_page_config(page_title="Qist – Check", page_icon="✅", layout="centered")
 
+# ---------- Metrics-export (QIST_METRICS_PORT / QIST_METRICS_FILE, zie qist/metrics.py) ----------
+@st.cache_resource
+def metrics_exporter() -> Optional[str]:
+    return metrics.start_from_env()
+
+metrics_exporter()
+
+# ---------- Watchlist-scheduler (qist/watchlist.py): één per proces, draait vanaf de eerste run ----------
+@st.cache_resource
+def watch_scheduler() -> watchlist.Rescreener:
+    return watchlist.scheduler()
+
+watch_scheduler()
+
 # ---------- Taal (i18n) ----------
 LANGS = {"nl": "Nederlands", "en": "English"}
 if "lang" not in st.session_state:
@@ -90,12 +106,41 @@ T: Dict[str, Dict[str, str]] = {
         "debt_basis_assets": "t.o.v. totale activa",
         "debt_unknown": "onbekend",
         "check_equity": "Check aandeel",
+        "bulk_title": "📋 Portefeuille screenen (bulk)",
+        "bulk_input": "Plak tickers of ISIN's (gescheiden door komma's of regels)",
+        "bulk_upload": "…of upload een CSV (kolom symbol/ticker/isin)",
+        "bulk_run": "Screen portefeuille",
+        "bulk_input_col": "Invoer",
+        "bulk_reasons": "Toelichting",
+        "bulk_not_found": "Notering niet gevonden of geen data.",
+        "bulk_limit": "Maximaal {n} posities per keer; de rest wordt overgeslagen.",
         "result": "Resultaat",
         "etf_name": "Naam van de ETF",
         "etf_cert": "Shariah-gecertificeerd (extern)?",
         "etf_halal_pct": "Percentage halal holdings (%)",
         "etf_pur_pct": "Purificatie (%)",
         "check_etf": "Check ETF",
+        "etf_lookthrough": "Holdings automatisch screenen",
+        "etf_holdings_upload": "Holdings-CSV van de uitgever (optioneel, anders Yahoo top-holdings)",
+        "etf_no_holdings": "Geen holdings gevonden voor deze ETF.",
+        "etf_coverage": "Holdings dekken {cov:.0f}% van het fonds ({scr:.0f}% gescreend) · {hits}/{n} uit cache",
+        "etf_weight": "Gewicht",
+        "etf_not_found": "Geen ETF gevonden voor “{name}”; probeer de ticker (bv. ISDW.L) of de ISIN.",
+        "etf_resolved": "Holdings van {symbol}",
+        "etf_pur_proxy": "Purificatie ingevuld als gewicht van de niet-halal posities ({pct}%): een benadering van het onzuivere deel van de inkomsten; controleer het dividend-/purificatiecijfer in de factsheet. De slider gaat tot 20%.",
+        "history_toggle": "Compliance-geschiedenis (jaar + kwartaal)",
+        "history_since": "Compliant sinds {d} ({n} opeenvolgende perioden).",
+        "history_not_compliant": "In de laatste gerapporteerde periode niet compliant.",
+        "history_none": "Geen historische balansgegevens beschikbaar.",
+        "watch_title": "👀 Watchlist",
+        "watch_add": "Volg dit aandeel",
+        "watch_empty": "Nog niets gevolgd. Zoek een aandeel en klik op 'Volg dit aandeel'.",
+        "watch_pending": "wordt gescreend…",
+        "watch_screened": "Gescreend",
+        "watch_remove": "Verwijderen",
+        "watch_refresh": "Nu opnieuw screenen",
+        "watch_alert": "{s}: {old} → {new} (schuldratio {r})",
+        "watch_link": "Bewaar deze link om je watchlist terug te vinden.",
         "crypto_name": "Naam van de crypto",
         "crypto_haram_use": "Schendt halal-usecase (bijv. gokken, rente)?",
         "crypto_fixed_yield": "Adverteert vaste (rente-achtige) yield?",
@@ -181,12 +226,41 @@ T: Dict[str, Dict[str, str]] = {
         "debt_basis_assets": "vs total assets",
         "debt_unknown": "unknown",
         "check_equity": "Check stock",
+        "bulk_title": "📋 Screen a portfolio (bulk)",
+        "bulk_input": "Paste tickers or ISINs (separated by commas or lines)",
+        "bulk_upload": "…or upload a CSV (column symbol/ticker/isin)",
+        "bulk_run": "Screen portfolio",
+        "bulk_input_col": "Input",
+        "bulk_reasons": "Reasons",
+        "bulk_not_found": "Listing not found or no data.",
+        "bulk_limit": "At most {n} positions per run; the rest is skipped.",
         "result": "Result",
         "etf_name": "Name of the ETF",
         "etf_cert": "Shariah-certified (external)?",
         "etf_halal_pct": "Percentage halal holdings (%)",
         "etf_pur_pct": "Purification (%)",
         "check_etf": "Check ETF",
+        "etf_lookthrough": "Screen holdings automatically",
+        "etf_holdings_upload": "Issuer holdings CSV (optional, otherwise Yahoo top holdings)",
+        "etf_no_holdings": "No holdings found for this ETF.",
+        "etf_coverage": "Holdings cover {cov:.0f}% of the fund ({scr:.0f}% screened) · {hits}/{n} from cache",
+        "etf_weight": "Weight",
+        "etf_not_found": "No ETF found for “{name}”; try the ticker (e.g. ISDW.L) or the ISIN.",
+        "etf_resolved": "Holdings of {symbol}",
+        "etf_pur_proxy": "Purification filled in as the weight of non-halal holdings ({pct}%): a proxy for the impure share of income; check the dividend/purification figure in the factsheet. The slider goes up to 20%.",
+        "history_toggle": "Compliance history (annual + quarterly)",
+        "history_since": "Compliant since {d} ({n} consecutive periods).",
+        "history_not_compliant": "Not compliant in the latest reported period.",
+        "history_none": "No historical balance-sheet data available.",
+        "watch_title": "👀 Watchlist",
+        "watch_add": "Watch this stock",
+        "watch_empty": "Nothing watched yet. Search a stock and click 'Watch this stock'.",
+        "watch_pending": "being screened…",
+        "watch_screened": "Screened",
+        "watch_remove": "Remove",
+        "watch_refresh": "Re-screen now",
+        "watch_alert": "{s}: {old} → {new} (debt ratio {r})",
+        "watch_link": "Bookmark this link to find your watchlist again.",
         "crypto_name": "Name of the crypto",
         "crypto_haram_use": "Violates halal use-case (e.g., gambling, interest)?",
         "crypto_fixed_yield": "Advertises fixed (interest-like) yield?",
@@ -243,339 +317,38 @@ with st.popover(t("beginner_open")):
     with st.expander(T[lang]["tabs_crypto"]):
         st.markdown(T[lang]["guide_crypto"])
 
-# ---------- Yahoo search helpers ----------
-YAHOO_SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
-
-@st.cache_data(ttl=1800)
-def yahoo_search(query: str, quotes_count: int = 15):
-    """Zoek wereldwijd naar noteringen; met headers en fallbacks om 403/429 te voorkomen."""
-    if not query or len(query.strip()) < 2:
-        return []
-
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json, text/plain, */*",
-        "Referer": "https://finance.yahoo.com/",
-    }
-    params = {
-        "q": query.strip(),
-        "quotesCount": quotes_count,
-        "newsCount": 0,
-        "lang": "en-US",
-        "region": "US",
-    }
-
-    # 1) primary
-    try:
-        r = requests.get(YAHOO_SEARCH_URL, params=params, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json() or {}
-        keep_types = {"EQUITY"}
-        out = []
-        for q in (data.get("quotes", []) or []):
-            if q.get("quoteType") in keep_types and q.get("symbol"):
-                out.append({
-                    "symbol": q.get("symbol"),
-                    "shortname": q.get("shortname") or q.get("longname") or q.get("name"),
-                    "exchange": q.get("exchange") or q.get("exchDisp"),
-                    "score": q.get("score", 0.0),
-                })
-        seen, uniq = set(), []
-        for item in sorted(out, key=lambda x: x["score"], reverse=True):
-            if item["symbol"] not in seen:
-                uniq.append(item); seen.add(item["symbol"])
-        return uniq
-
-    except requests.HTTPError:
-        # 2) secondary
-        try:
-            r = requests.get(
-                "https://query1.finance.yahoo.com/v1/finance/search",
-                params=params, headers=headers, timeout=10,
-            )
-            r.raise_for_status()
-            data = r.json() or {}
-            keep_types = {"EQUITY"}
-            out = []
-            for q in (data.get("quotes", []) or []):
-                if q.get("quoteType") in keep_types and q.get("symbol"):
-                    out.append({
-                        "symbol": q.get("symbol"),
-                        "shortname": q.get("shortname") or q.get("longname") or q.get("name"),
-                        "exchange": q.get("exchange") or q.get("exchDisp"),
-                        "score": q.get("score", 0.0),
-                    })
-            seen, uniq = set(), []
-            for item in sorted(out, key=lambda x: x["score"], reverse=True):
-                if item["symbol"] not in seen:
-                    uniq.append(item); seen.add(item["symbol"])
-            return uniq
-        except Exception:
-            # 3) tertiary
-            try:
-                r = requests.get(
-                    "https://autoc.finance.yahoo.com/autoc",
-                    params={"query": query.strip(), "region": 1, "lang": "en"},
-                    headers=headers, timeout=10,
-                )
-                r.raise_for_status()
-                js = r.json() or {}
-                out = []
-                for it in (js.get("ResultSet", {}).get("Result", []) or []):
-                    typ = (it.get("typeDisp") or "").lower()
-                    if typ in {"equity", "etf"} and it.get("symbol"):
-                        out.append({
-                            "symbol": it.get("symbol"),
-                            "shortname": it.get("name") or it.get("symbol"),
-                            "exchange": it.get("exchDisp") or it.get("exch") or "",
-                            "score": 0,
-                        })
-                seen, uniq = set(), []
-                for item in out:
-                    if item["symbol"] not in seen:
-                        uniq.append(item); seen.add(item["symbol"])
-                return uniq
-            except Exception:
-                return []
-    except Exception:
-        return []
-# Extra fallback: quote endpoint (betrouwbaarder voor basisprofiel)
-QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
-
-@st.cache_data(ttl=1800)
-def yahoo_quote(symbol: str) -> dict:
-    try:
-        r = requests.get(
-            QUOTE_URL,
-            params={"symbols": symbol},
-            headers={
-                "User-Agent": "Mozilla/5.0",
-                "Accept": "application/json, text/plain, */*",
-                "Referer": "https://finance.yahoo.com/",
-            },
-            timeout=10,
-        )
-        r.raise_for_status()
-        data = r.json() or {}
-        res = (data.get("quoteResponse", {}).get("result") or [])
-        if not res:
-            return {}
-        q = res[0]
-        return {
-            "name": q.get("longName") or q.get("shortName"),
-            "exchange": q.get("fullExchangeName") or q.get("exchange"),
-            "currency": q.get("currency"),
-            "marketCap": q.get("marketCap"),
-            # niet altijd aanwezig, maar soms wel:
-            "country": q.get("country"),
-            "sector": q.get("sector"),
-            "industry": q.get("industry"),
-        }
-    except Exception:
-        return {}
-
-@st.cache_data(ttl=3600)
-def fetch_symbol_metadata(symbol: str):
-    """Kerninfo + balansitems via yfinance, met robuuste validatie en quote-fallback."""
-    tk = yf.Ticker(symbol)
-
-    # 1) Info (probeer get_info eerst)
-    info = {}
-    try:
-        info = tk.get_info() or {}
-    except Exception:
-        try:
-            info = tk.info or {}
-        except Exception:
-            info = {}
-
-    # 2) Voorzichtig fast_info helper
-    def fast_value(key: str):
-        try:
-            fi = getattr(tk, "fast_info", None)
-            if fi is None:
-                return None
-            try:
-                return fi.get(key, None)
-            except Exception:
-                return None
-        except Exception:
-            return None
-
-    name = info.get("longName") or info.get("shortName")
-    exchange = info.get("exchange") or fast_value("exchange")
-    currency = info.get("currency") or fast_value("currency")
-    country = info.get("country")
-    sector = info.get("sector")
-    industry = info.get("industry")
-    marketCap = info.get("marketCap")
-
-    # 3) History: meerdere periodes proberen
-    hist_ok = False
-    for per in ["1mo", "3mo", "6mo", "1y"]:
-        try:
-            hist = tk.history(period=per)
-            if isinstance(hist, pd.DataFrame) and len(hist) > 0:
-                hist_ok = True
-                break
-        except Exception:
-            pass
-
-    # 4) Balance sheet
-    total_debt = total_assets = None
-    try:
-        bs = tk.balance_sheet
-        if isinstance(bs, pd.DataFrame) and not bs.empty:
-            if "Total Debt" in bs.index:
-                total_debt = pd.to_numeric(bs.loc["Total Debt"].dropna().iloc[0], errors="coerce")
-            elif "Total Liabilities" in bs.index:
-                total_debt = pd.to_numeric(bs.loc["Total Liabilities"].dropna().iloc[0], errors="coerce")
-            if "Total Assets" in bs.index:
-                total_assets = pd.to_numeric(bs.loc["Total Assets"].dropna().iloc[0], errors="coerce")
-    except Exception:
-        pass
-
-    # 5) Vul ontbrekende basis met quote-fallback
-    if not (name and exchange and currency and marketCap):
-        q = yahoo_quote(symbol)
-        name = name or q.get("name")
-        exchange = exchange or q.get("exchange")
-        currency = currency or q.get("currency")
-        marketCap = marketCap or q.get("marketCap")
-        country = country or q.get("country")
-        sector = sector or q.get("sector")
-        industry = industry or q.get("industry")
-
-    # 6) Validatie
-    is_valid = bool(name or exchange or currency or marketCap or hist_ok)
-
-    return {
-        "symbol": symbol,
-        "name": name,
-        "exchange": exchange,
-        "currency": currency,
-        "country": country,
-        "sector": sector,
-        "industry": industry,
-        "marketCap": marketCap,
-        "totalDebt": None if pd.isna(total_debt) else total_debt,
-        "totalAssets": None if pd.isna(total_assets) else total_assets,
-        "is_valid": is_valid,
-    }
-
-
-    exchange = info.get("exchange") or fast_value("exchange")
-    currency = info.get("currency") or fast_value("currency")
-
-    # 3) History: probeer meerdere periodes
-    hist_ok = False
-    for per in ["1mo", "3mo", "6mo", "1y"]:
-        try:
-            hist = tk.history(period=per)
-            if isinstance(hist, pd.DataFrame) and len(hist) > 0:
-                hist_ok = True
-                break
-        except Exception:
-            continue
-
-    # 4) Balans (IFRS fallback)
-    total_debt = total_assets = None
-    try:
-        bs = tk.balance_sheet
-        if isinstance(bs, pd.DataFrame) and not bs.empty:
-            if "Total Debt" in bs.index:
-                total_debt = pd.to_numeric(bs.loc["Total Debt"].dropna().iloc[0], errors="coerce")
-            elif "Total Liabilities" in bs.index:
-                total_debt = pd.to_numeric(bs.loc["Total Liabilities"].dropna().iloc[0], errors="coerce")
-            if "Total Assets" in bs.index:
-                total_assets = pd.to_numeric(bs.loc["Total Assets"].dropna().iloc[0], errors="coerce")
-    except Exception:
-        pass
-
-    # 5) Validatie: ruimer (info óf history óf exchange/currency)
-    is_valid = bool(info) or hist_ok or bool(exchange) or bool(currency)
-
-    return {
-        "symbol": symbol,
-        "name": info.get("longName") or info.get("shortName"),
-        "exchange": exchange,
-        "currency": currency,
-        "country": info.get("country"),
-        "sector": info.get("sector"),
-        "industry": info.get("industry"),
-        "marketCap": info.get("marketCap"),
-        "totalDebt": None if pd.isna(total_debt) else total_debt,
-        "totalAssets": None if pd.isna(total_assets) else total_assets,
-        "is_valid": is_valid,
-    }
+# ---------- Yahoo / yfinance (zie qist/yahoo.py) ----------
+# De data-laag staat in qist.yahoo zodat deel-requests en achtergrondverversing op worker-threads
+# kunnen lopen zonder Streamlit-context. Ook de in-memory caches zitten daar (begrensde LRU's met
+# onveranderlijke records, zie qist/cache.py) in plaats van st.cache_data: geen pickle per hit en
+# geen onbegrensde groei.
+def search_listings(query: str):
+    """Typeahead: eerst de lokale index (ticker/naam/ISIN), dan eerdere (kortere) zoekopdrachten
+    lokaal verfijnd, pas daarna Yahoo (zie typeahead.lookup)."""
+    return search_index.search(query, fallback=typeahead.lookup)
+
+def symbol_profile(symbol: str) -> Tuple[dict, Future]:
+    """(profiel, fundamentals-future). Eerst de offline screening-snapshot (qist/snapshot.py); voor
+    onbekende of verouderde symbolen is het profiel direct te tonen en lopen de fundamentals op de achtergrond."""
+    meta = snapshot.lookup_meta(symbol)
+    if meta:
+        done: Future = Future()
+        done.set_result(meta)
+        return meta, done
+    return yahoo.fetch_symbol_profile(symbol), yahoo.fetch_symbol_metadata_async(symbol)
+
+# ---------- Halal regels (zie qist/rules.py) ----------
+def basis_labels() -> Dict[str, str]:
+    return {"mc": t("debt_basis_mc"), "assets": t("debt_basis_assets"), "unknown": t("debt_unknown")}
 
 def compute_debt_ratio(meta: dict):
-    debt = meta.get("totalDebt"); mc = meta.get("marketCap"); assets = meta.get("totalAssets")
-    if debt is None:
-        return None, t("debt_unknown")
-    if mc:
-        return float(debt)/float(mc), t("debt_basis_mc")
-    if assets:
-        return float(debt)/float(assets), t("debt_basis_assets")
-    return None, t("debt_unknown")
-
-# ---------- Halal regels ----------
-HARAM_SECTORS = {
-    "Alcohol", "Gambling", "Pork", "Conventional Banking", "Insurance",
-    "Adult Entertainment", "Weapons", "Tobacco"
-}
-# brede trefwoorden (naam, sector, industry) — let op: 'lending' (niet 'blending')
-_HARAM_PAT = re.compile(
-    r"(alcohol|brew|beer|wine|casino|gambl|pork|adult|porn|weapon|tobacco|cig|cannabis|marijuana|"
-    r"\bbank(s|ing)?\b|\binsur(ance|er|ers)?\b|\breinsurance\b|\bmortgage\b|\bcredit\b|\blending\b|\bloans?\b|\breit\b|\bcapital markets\b|\bconsumer finance\b)",
-    re.IGNORECASE
-)
-
-def is_haram_activity(name: Optional[str], sector: Optional[str], industry: Optional[str]) -> Optional[str]:
-    if sector in HARAM_SECTORS:
-        return f"Excluded sector: {sector}"
-    text = " ".join([str(name or ""), str(sector or ""), str(industry or "")]).lower()
-    # uitzondering: islamic + bank/insurance → niet automatisch haram
-    if "islamic" in text and ("bank" in text or "insur" in text):
-        return None
-    m = _HARAM_PAT.search(text)
-    if m:
-        return f"Conventional finance/haram activity detected ({m.group(0)})"
-    return None
+    return rules.compute_debt_ratio(meta, basis_labels())
 
 def classify_equity(meta: dict) -> Tuple[str, List[str]]:
-    bad = is_haram_activity(meta.get("name"), meta.get("sector"), meta.get("industry"))
-    if bad:
-        return "not_halal", [bad]
-    ratio, basis = compute_debt_ratio(meta)
-    if ratio is None:
-        return "unclassified", ["Insufficient data to compute debt ratio."]
-    pct = ratio * 100.0
-    if pct == 0:
-        return "halal_full", ["No interest-bearing debt."]
-    if pct <= 30:
-        return "halal", [f"Debt ratio {pct:.2f}% (≤ 30%, {basis})."]
-    if 30 < pct <= 33:
-        return "doubt", [f"Debt ratio {pct:.2f}% (30–33%, {basis})."]
-    return "not_halal", [f"Debt ratio {pct:.2f}% (> 33%, {basis})."]
-
-def classify_etf(is_certified: bool, halal_pct: int, pur_pct: int) -> Tuple[str, List[str]]:
-    if is_certified:
-        return "halal", ["Externally Shariah-certified."]
-    if halal_pct >= 95 and pur_pct < 5:
-        return "halal", [f"Holdings ≈ {halal_pct}% halal. Purification {pur_pct}%."]
-    if halal_pct == 0 and pur_pct == 0:
-        return "unclassified", ["Insufficient info about holdings; cannot assess."]
-    return "doubt", [f"Holdings {halal_pct}%, purification {pur_pct}% (needs review)."]
-
-def classify_crypto(violates_use: bool, fixed_yield: bool, staking_service: bool, interest_like: bool) -> Tuple[str, List[str]]:
-    if violates_use:
-        return "not_halal", ["Use-case includes prohibited activities (e.g., gambling/interest/adult)."]
-    if fixed_yield:
-        return "not_halal", ["Fixed/guaranteed yield resembles riba (interest)."]
-    if staking_service and not interest_like:
-        return "halal", ["Staking rewards based on service/fees (not interest)."]
-    return "unclassified", ["Insufficient structure/info → needs scholar review."]
+    return rules.classify_equity(meta, basis_labels())
+
+classify_etf = rules.classify_etf
+classify_crypto = rules.classify_crypto
 
 LABELS = {
     "nl": {"halal_full": "✅ Volledig halal", "halal": "✅ Halal", "doubt": "⚠️ Twijfelachtig", "not_halal": "❌ Niet halal", "unclassified": "❓ Ongeclassificeerd"},
@@ -590,41 +363,52 @@ def get_session_id() -> str:
         st.session_state.cid = hashlib.sha256(str(uuid.uuid4()).encode()).hexdigest()[:16]
     return st.session_state.cid
 
-def track_event_ga(event_name: str, params: dict):
+@st.cache_resource
+def ga_sender() -> Optional[GASender]:
+    """Eén GA4-verzender per proces (None als GA niet geconfigureerd is)."""
     try:
         mid = st.secrets["ga"]["measurement_id"]
         sec = st.secrets["ga"]["api_secret"]
     except Exception:
-        return
+        return None
+    return GASender(mid, sec)
+
+def track_event_ga(event_name: str, params: dict):
+    """Zet het event klaar; versturen gebeurt gebatcht per client_id op de achtergrond."""
     try:
-        body = {"client_id": get_session_id(), "events": [{"name": event_name, "params": params}]}
-        requests.post(
-            f"https://www.google-analytics.com/mp/collect?measurement_id={mid}&api_secret={sec}",
-            data=json.dumps(body), timeout=5
-        )
+        sender = ga_sender()
+        if sender is None:
+            return
+        sender.send(get_session_id(), event_name, params)
     except Exception:
         pass
 
-def log_to_sheet(event: str, extra: dict):
+@st.cache_resource
+def sheet_writer() -> Optional[SheetWriter]:
+    """Eén achtergrond-writer per proces (None als Sheets-logging niet geconfigureerd is)."""
     try:
-        import gspread
-        from google.oauth2.service_account import Credentials
         sheet_id = st.secrets["logging"]["usage_sheet_id"]
-        creds = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-        )
-        gc = gspread.authorize(creds)
-        sh = gc.open_by_key(sheet_id)
-        ws = sh.sheet1
+        sa_info = dict(st.secrets["gcp_service_account"])
+    except Exception:
+        return None
+    return SheetWriter(sheet_id, sa_info)
+
+def log_to_sheet(event: str, extra: dict):
+    """Zet het event in de wachtrij; het wegschrijven gebeurt gebatcht op de achtergrond."""
+    try:
+        writer = sheet_writer()
+        if writer is None:
+            return
         row = [datetime.utcnow().isoformat(), get_session_id(), lang, event, json.dumps(extra, ensure_ascii=False)]
-        ws.append_row(row, value_input_option="USER_ENTERED")
+        writer.log(row)
     except Exception:
         pass
 
-# page view
-track_event_ga("page_view", {"page": "home", "build": APP_VERSION})
-log_to_sheet("page_view", {"page": "home", "build": APP_VERSION})
+# page view: één keer per sessie, niet bij elke rerun
+if not st.session_state.get("page_view_sent"):
+    st.session_state.page_view_sent = True
+    track_event_ga("page_view", {"page": "home", "build": APP_VERSION})
+    log_to_sheet("page_view", {"page": "home", "build": APP_VERSION})
 
 # ---------- Tabs ----------
 # tab1, tab2, tab3, tab4 = st.tabs([
@@ -636,13 +420,54 @@ tab1, tab2, tab3 = st.tabs([
 
 
 
+# Elke tab is een st.fragment: een widget binnen de tab herdraait alleen die tab,
+# niet het hele script (header, popover, page view).
+
 # ====== EQUITY TAB ======
-with tab1:
+@st.fragment
+def equity_fundamentals(symbol: str, fundamentals: Future):
+    """Schuldratio en halal-check: de enige plek die op de fundamentals wacht. Als eigen fragment
+    herdraait de check-knop alleen dit blok, niet de zoekopdracht en het profiel erboven."""
+    with st.spinner("Fundamentals…"):
+        meta = fundamentals.result() or {"symbol": symbol}
+    quality_msgs = []
+    if not (meta.get("sector") or meta.get("industry")):
+        quality_msgs.append("Beperkt profiel (sector/industrie ontbreken)")
+    if (meta.get("totalDebt") is None) or (not meta.get("marketCap") and not meta.get("totalAssets")):
+        quality_msgs.append("Schuldratio kon niet worden berekend (onvoldoende cijfers)")
+    if quality_msgs:
+        st.info(" | ".join(quality_msgs))
+    st.markdown(
+        f"**{T[lang]['field_sector']}:** {meta.get('sector') or '-'} · "
+        f"**{T[lang]['field_industry']}:** {meta.get('industry') or '-'} · "
+        f"**{T[lang]['field_country']}:** {meta.get('country') or '-'}"
+    )
+
+    # Schuldratio
+    ratio, basis = compute_debt_ratio(meta)
+    if ratio is None:
+        st.info(f"{T[lang]['field_debt_ratio']}: {T[lang]['debt_unknown']}")
+    else:
+        st.markdown(f"**{T[lang]['field_debt_ratio']}:** {ratio:.2%} ({basis})")
+
+    # Halal-check
+    if st.button(T[lang]["check_equity"]):
+        status, reasons = classify_equity(meta)
+        st.markdown(f"### {T[lang]['result']}: {label(status)}")
+        for r in reasons:
+            st.write("•", r)
+        st.markdown(f"**{T[lang]['equity_rules_title']}:**")
+        st.markdown(T[lang]["equity_rules"])
+        track_event_ga("check_equity", {"symbol": meta["symbol"], "status": status})
+        log_to_sheet("check_equity", {"symbol": meta["symbol"], "status": status})
+
+@st.fragment
+def equity_tab():
     query = st.text_input(T[lang]["search_ph"])
     if query:
         with st.spinner("Zoeken / Searching…"):
             try:
-                results = yahoo_search(query)
+                results = search_listings(query)
             except Exception:
                 st.warning("Zoekservice tijdelijk niet beschikbaar; probeer later opnieuw.")
                 results = []
@@ -650,63 +475,214 @@ with tab1:
         if not results:
             st.error(T[lang]["no_results"])
         else:
+            # quote-profielen van de getoonde noteringen alvast ophalen (één gebatchte request)
+            yahoo.prefetch_quotes([r["symbol"] for r in results])
             # Keuze uit zoekresultaten
             options = {f"{r['symbol']} — {r['shortname']} ({r['exchange']})": r for r in results}
             choice = st.selectbox(T[lang]["choose_listing"], list(options.keys()))
             chosen = options[choice]
 
-            # Haal metadata op
-            meta = fetch_symbol_metadata(chosen["symbol"])
+            # Eerst het (goedkope) profiel; get_info en de balans lopen intussen op de achtergrond
+            profile, fundamentals = symbol_profile(chosen["symbol"])
 
             # Toon altijd; geef alleen hints over datakwaliteit
             st.success(T[lang]["valid_listing"])
-            quality_msgs = []
-            if not (meta.get("sector") or meta.get("industry")):
-                quality_msgs.append("Beperkt profiel (sector/industrie ontbreken)")
-            if (meta.get("totalDebt") is None) or (not meta.get("marketCap") and not meta.get("totalAssets")):
-                quality_msgs.append("Schuldratio kon niet worden berekend (onvoldoende cijfers)")
-            if quality_msgs:
-                st.info(" | ".join(quality_msgs))
-
-            # # Basisinformatie
-            # col1, col2 = st.columns(2)
-            # with col1:
-            #     st.markdown(f"**{T[lang]['field_name']}:** {meta.get('name') or chosen['shortname']}")
-            #     st.markdown(f"**{T[lang]['field_ticker']}:** {meta['symbol']}")
-            #     st.markdown(f"**{T[lang]['field_exchange']}:** {meta.get('exchange') or chosen['exchange']}")
-            #     st.markdown(f"**{T[lang]['field_currency']}:** {meta.get('currency') or '-'}")
-            # with col2:
-            #     st.markdown(f"**{T[lang]['field_country']}:** {meta.get('country') or '-'}")
-            #     st.markdown(f"**{T[lang]['field_sector']}:** {meta.get('sector') or '-'}")
-            #     st.markdown(f"**{T[lang]['field_industry']}:** {meta.get('industry') or '-'}")
-            #     mc = meta.get("marketCap")
-            #     st.markdown(f"**{T[lang]['field_mcap']}:** {f'{mc:,.0f}' if mc else '-'}")
-
-            # Schuldratio
-            ratio, basis = compute_debt_ratio(meta)
-            if ratio is None:
-                st.info(f"{T[lang]['field_debt_ratio']}: {T[lang]['debt_unknown']}")
-            else:
-                st.markdown(f"**{T[lang]['field_debt_ratio']}:** {ratio:.2%} ({basis})")
-
-            # Halal-check
-            if st.button(T[lang]["check_equity"]):
-                status, reasons = classify_equity(meta)
-                st.markdown(f"### {T[lang]['result']}: {label(status)}")
-                for r in reasons:
-                    st.write("•", r)
-                st.markdown(f"**{T[lang]['equity_rules_title']}:**")
-                st.markdown(T[lang]["equity_rules"])
-                track_event_ga("check_equity", {"symbol": meta["symbol"], "status": status})
-                log_to_sheet("check_equity", {"symbol": meta["symbol"], "status": status})
+            if not profile.get("is_valid"):
+                st.info("Geen koersgegevens gevonden voor deze notering")
+
+            # Basisinformatie: alleen profielvelden, dus direct zichtbaar
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"**{T[lang]['field_name']}:** {profile.get('name') or chosen['shortname']}")
+                st.markdown(f"**{T[lang]['field_ticker']}:** {chosen['symbol']}")
+                st.markdown(f"**{T[lang]['field_exchange']}:** {profile.get('exchange') or chosen['exchange']}")
+            with col2:
+                st.markdown(f"**{T[lang]['field_currency']}:** {profile.get('currency') or '-'}")
+                mc = profile.get("marketCap")
+                st.markdown(f"**{T[lang]['field_mcap']}:** {f'{mc:,.0f}' if mc else '-'}")
+
+            # Schuldratio en check wachten op de fundamentals; het profiel staat dan al op het scherm
+            equity_fundamentals(chosen["symbol"], fundamentals)
+
+            # Geschiedenis: alle perioden in één pass (qist/history.py), alleen op verzoek
+            if st.toggle(T[lang]["history_toggle"]):
+                with st.spinner("Geschiedenis / History…"):
+                    hist = history.compliance_history(chosen["symbol"])
+                if hist.empty:
+                    st.info(T[lang]["history_none"])
+                else:
+                    since = history.compliant_since(hist)
+                    if since is None:
+                        st.warning(T[lang]["history_not_compliant"])
+                    else:
+                        n = int((hist["period"] >= since).sum())
+                        st.success(T[lang]["history_since"].format(d=since.date().isoformat(), n=n))
+                    st.line_chart((hist.set_index("period")["debt_ratio"] * 100).rename(T[lang]["field_debt_ratio"] + " (%)"))
+
+            if st.button(T[lang]["watch_add"]):
+                watchlist.default_watchstore().add(watch_list_id(), chosen["symbol"])
+                watch_scheduler().poke()
+                st.rerun()
+
+# ---------- Bulk: hele portefeuille in één keer ----------
+@st.fragment
+def bulk_section():
+    with st.expander(T[lang]["bulk_title"]):
+        bulk_text = st.text_area(T[lang]["bulk_input"], height=120)
+        bulk_file = st.file_uploader(T[lang]["bulk_upload"], type=["csv"])
+        if st.button(T[lang]["bulk_run"]):
+            tokens = bulk.parse_symbols(bulk_text)
+            if bulk_file is not None:
+                try:
+                    tokens = bulk.parse_csv(bulk_file) + tokens
+                except Exception:
+                    st.warning("CSV kon niet worden gelezen / could not read CSV.")
+            tokens = list(dict.fromkeys(tokens))
+            if len(tokens) > bulk.BULK_MAX_SYMBOLS:
+                st.warning(T[lang]["bulk_limit"].format(n=bulk.BULK_MAX_SYMBOLS))
+                tokens = tokens[:bulk.BULK_MAX_SYMBOLS]
+
+            rows = []
+            progress = st.progress(0.0)
+            table = st.empty()
+            last_draw = 0.0
+            for i, (token, meta) in enumerate(bulk.screen_many(tokens), 1):
+                if meta and meta.get("is_valid"):
+                    status, reasons = classify_equity(meta)
+                    ratio, basis = compute_debt_ratio(meta)
+                else:
+                    meta, status, reasons, ratio = {}, "unclassified", [T[lang]["bulk_not_found"]], None
+                rows.append({
+                    T[lang]["bulk_input_col"]: token,
+                    T[lang]["field_ticker"]: meta.get("symbol") or "-",
+                    T[lang]["field_name"]: meta.get("name") or "-",
+                    T[lang]["field_sector"]: meta.get("sector") or "-",
+                    T[lang]["field_debt_ratio"]: f"{ratio:.2%}" if ratio is not None else "-",
+                    T[lang]["result"]: label(status),
+                    "status": status,
+                    T[lang]["bulk_reasons"]: "; ".join(reasons),
+                })
+                progress.progress(i / len(tokens), text=f"{i}/{len(tokens)}")
+                # tabel niet bij elk resultaat hertekenen (scheelt veel werk bij honderden posities)
+                if i == len(tokens) or time.monotonic() - last_draw > 0.3:
+                    table.dataframe(pd.DataFrame(rows).drop(columns="status"), use_container_width=True, hide_index=True)
+                    last_draw = time.monotonic()
+            st.session_state.bulk_rows = rows
+            track_event_ga("check_bulk", {"count": len(tokens)})
+            log_to_sheet("check_bulk", {"count": len(tokens)})
+        elif st.session_state.get("bulk_rows"):
+            st.dataframe(pd.DataFrame(st.session_state.bulk_rows).drop(columns="status"), use_container_width=True, hide_index=True)
+
+        if st.session_state.get("bulk_rows"):
+            counts = pd.Series([r["status"] for r in st.session_state.bulk_rows]).replace("halal_full", "halal").value_counts()
+            st.markdown(" · ".join(
+                f"{label(k)}: **{int(counts.get(k, 0))}**" for k in ("halal", "doubt", "not_halal", "unclassified")
+            ))
+
+# ---------- Watchlist: alleen opgeslagen oordelen tonen; screenen doet de scheduler ----------
+def watch_list_id() -> str:
+    """Lijst-id in de URL (?wl=...), zodat de watchlist een herlaad of nieuwe sessie overleeft."""
+    if "wl" not in st.query_params:
+        st.query_params["wl"] = watchlist.new_list_id()
+    return st.query_params["wl"]
+
+def _ratio_text(ratio) -> str:
+    return f"{ratio:.2%}" if ratio is not None else "-"
+
+@st.fragment
+def watchlist_section():
+    store = watchlist.default_watchstore()
+    symbols = store.symbols(watch_list_id()) if "wl" in st.query_params else []
+    with st.expander(T[lang]["watch_title"], expanded=bool(symbols)):
+        if not symbols:
+            st.caption(T[lang]["watch_empty"])
+            return
+        # alleen opgeslagen oordelen lezen; live screenen doet de scheduler
+        results = store.results(symbols)
+        if len(results) < len(symbols):
+            watch_scheduler().poke()
+        for a in store.alerts(symbols):
+            st.warning(T[lang]["watch_alert"].format(
+                s=a["symbol"], old=label(a["old_status"]), new=label(a["new_status"]), r=_ratio_text(a["new_ratio"]),
+            ) + f" · {datetime.fromtimestamp(a['at']).strftime('%Y-%m-%d %H:%M')}")
+        labels = basis_labels()
+        rows = []
+        for sym in symbols:
+            r = results.get(sym)
+            rows.append({
+                T[lang]["field_ticker"]: sym,
+                T[lang]["result"]: label(r["status"]) if r else T[lang]["watch_pending"],
+                T[lang]["field_debt_ratio"]: f"{_ratio_text(r['debt_ratio'])} ({labels.get(r['basis'], r['basis'])})" if r else "-",
+                T[lang]["watch_screened"]: datetime.fromtimestamp(r["screened_at"]).strftime("%Y-%m-%d %H:%M") if r else "-",
+            })
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            drop = st.selectbox(T[lang]["watch_remove"], [""] + symbols)
+            if drop and st.button(T[lang]["watch_remove"]):
+                store.remove(watch_list_id(), drop)
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button(T[lang]["watch_refresh"]):
+                watch_scheduler().rescreen(symbols)
+        st.caption(T[lang]["watch_link"])
 
+with tab1:
+    equity_tab()
+    watchlist_section()
+    bulk_section()
 
 # ====== ETF TAB ======
-with tab2:
+@st.fragment
+def etf_tab():
     name_etf = st.text_input(T[lang]["etf_name"])
+
+    # Look-through: posities screenen en de sliders invullen (vóór de sliders, zodat hun state nog vrij is)
+    holdings_file = st.file_uploader(T[lang]["etf_holdings_upload"], type=["csv"])
+    if st.button(T[lang]["etf_lookthrough"]) and (name_etf or holdings_file is not None):
+        holdings = None
+        if holdings_file is not None:
+            try:
+                holdings = etf.parse_holdings_csv(holdings_file)
+            except Exception:
+                st.warning("CSV kon niet worden gelezen / could not read CSV.")
+        symbol = etf.resolve_etf(name_etf) if name_etf else None
+        if holdings is None and not symbol:
+            # niets om door te kijken: geen yfinance-aanroep voor een onbekende naam
+            st.session_state.etf_lt = None
+            st.warning(T[lang]["etf_not_found"].format(name=name_etf))
+        else:
+            with st.spinner("Holdings screenen / Screening holdings…"):
+                lt = etf.look_through(symbol or "-", holdings)
+            st.session_state.etf_lt = lt
+            if lt["holdings"]:
+                st.session_state.etf_halal_pct = lt["halal_pct"]
+                st.session_state.etf_pur_pct = min(lt["purification_pct"], 20)
+            track_event_ga("etf_lookthrough", {"symbol": symbol or "-", "holdings": len(lt["holdings"])})
+    lt = st.session_state.get("etf_lt")
+    if lt is not None:
+        if not lt["holdings"]:
+            st.warning(T[lang]["etf_no_holdings"])
+        else:
+            if lt["symbol"] != "-":
+                st.caption(T[lang]["etf_resolved"].format(symbol=lt["symbol"]))
+            st.caption(T[lang]["etf_coverage"].format(
+                cov=lt["coverage_pct"], scr=lt["screened_pct"], hits=lt["cache_hits"], n=len(lt["holdings"])
+            ))
+            st.caption(T[lang]["etf_pur_proxy"].format(pct=lt["purification_pct"]))
+            st.dataframe(pd.DataFrame([{
+                T[lang]["field_ticker"]: h["symbol"],
+                T[lang]["field_name"]: h["name"] or "-",
+                T[lang]["etf_weight"]: f"{h['weight']:.2%}",
+                T[lang]["result"]: label(h["status"]),
+                T[lang]["bulk_reasons"]: h["reason"],
+            } for h in lt["holdings"]]), use_container_width=True, hide_index=True)
+
     sharia_certified = st.checkbox(T[lang]["etf_cert"], value=False)
-    halal_pct = st.slider(T[lang]["etf_halal_pct"], 0, 100, 100)
-    purification_pct = st.slider(T[lang]["etf_pur_pct"], 0, 20, 0)
+    st.session_state.setdefault("etf_halal_pct", 100)
+    st.session_state.setdefault("etf_pur_pct", 0)
+    halal_pct = st.slider(T[lang]["etf_halal_pct"], 0, 100, key="etf_halal_pct")
+    purification_pct = st.slider(T[lang]["etf_pur_pct"], 0, 20, key="etf_pur_pct")
     if st.button(T[lang]["check_etf"]):
         status, reasons = classify_etf(sharia_certified, halal_pct, purification_pct)
         st.markdown(f"### {T[lang]['result']}: {label(status)}")
@@ -715,8 +691,12 @@ with tab2:
         track_event_ga("check_etf", {"name": name_etf or "-", "status": status})
         log_to_sheet("check_etf", {"name": name_etf or "-", "status": status})
 
+with tab2:
+    etf_tab()
+
 # ====== CRYPTO TAB ======
-with tab3:
+@st.fragment
+def crypto_tab():
     name_crypto = st.text_input(T[lang]["crypto_name"])
     violates_usecase = st.checkbox(T[lang]["crypto_haram_use"], value=False)
     fixed_yield = st.checkbox(T[lang]["crypto_fixed_yield"], value=False)
@@ -730,6 +710,9 @@ with tab3:
         track_event_ga("check_crypto", {"name": name_crypto or "-", "status": status})
         log_to_sheet("check_crypto", {"name": name_crypto or "-", "status": status})
 
+with tab3:
+    crypto_tab()
+
 # # ====== ANALYTICS TAB ======
 # with tab4:
 #     pin = st.text_input(T[lang]["admin_pin"], type="password")
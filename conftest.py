@@ -0,0 +1 @@
+# conftest.py — maakt het pakket `qist` importeerbaar als pytest vanuit de repo-root draait (zonder installatie)
@@ -0,0 +1 @@
+"""Qist – hulpmodules (caching, data-ophaal en screening) voor app.py."""
@@ -0,0 +1,220 @@
+# qist/analytics.py — niet-blokkerende analytics: events gaan via een wachtrij naar een achtergrondthread
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from qist.net import default_client
+
+log = logging.getLogger("qist.analytics")
+
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+
+
+class SheetWriter:
+    """Proces-brede batch-writer naar Google Sheets.
+
+    `log()` zet een rij in een begrensde wachtrij en keert direct terug; is de wachtrij vol,
+    dan wordt het event weggegooid en geteld. Eén thread houdt één geautoriseerde client vast
+    en schrijft met `append_rows` zodra er `batch_size` rijen zijn of `flush_interval` verstreken is.
+    """
+
+    def __init__(
+        self,
+        sheet_id: str,
+        service_account_info: dict,
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 10.0,
+    ):
+        self.sheet_id = sheet_id
+        self.service_account_info = service_account_info
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0      # weggegooid door backpressure (wachtrij vol)
+        self.failed = 0       # rijen waarvan het wegschrijven mislukte
+        self.written = 0
+        self._reported_dropped = 0
+        self._queue: "queue.Queue[Optional[list]]" = queue.Queue(maxsize=max_queue)
+        self._ws = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="qist-sheet-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, row: list) -> bool:
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    # ---------- achtergrondthread ----------
+    def _worksheet(self):
+        if self._ws is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+            creds = Credentials.from_service_account_info(self.service_account_info, scopes=SHEETS_SCOPES)
+            gc = gspread.authorize(creds)
+            self._ws = gc.open_by_key(self.sheet_id).sheet1
+        return self._ws
+
+    def _flush(self, rows: List[list]) -> None:
+        if not rows:
+            return
+        try:
+            self._worksheet().append_rows(rows, value_input_option="USER_ENTERED")
+            self.written += len(rows)
+        except Exception as e:
+            # client opnieuw opbouwen bij de volgende flush (verlopen token, netwerkfout, ...)
+            self._ws = None
+            self.failed += len(rows)
+            log.warning("Sheet append failed for %d rows: %s", len(rows), e)
+        with self._lock:
+            dropped = self.dropped
+        if dropped > self._reported_dropped:
+            log.warning("Analytics queue full: %d events dropped in total", dropped)
+            self._reported_dropped = dropped
+
+    def _run(self) -> None:
+        batch: List[list] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                row = []
+            if row is None:  # stopsignaal van close()
+                self._flush(batch)
+                return
+            if row:
+                batch.append(row)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Schrijf wat nog in de wachtrij staat weg en stop de thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+GA_COLLECT_URL = "https://www.google-analytics.com/mp/collect"
+GA_MAX_EVENTS = 25  # limiet van het Measurement Protocol per payload
+
+
+class GASender:
+    """Gebatchte GA4 Measurement Protocol-verzender.
+
+    Events worden per `client_id` verzameld en vanaf een achtergrondthread over de
+    gedeelde keep-alive sessie (qist.net) gepost (max. 25 events per payload), bij een volle batch, na
+    `flush_interval` seconden of bij afsluiten.
+    """
+
+    def __init__(
+        self,
+        measurement_id: str,
+        api_secret: str,
+        max_queue: int = 2000,
+        flush_interval: float = 10.0,
+        timeout: float = 5.0,
+    ):
+        self.params = {"measurement_id": measurement_id, "api_secret": api_secret}
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.dropped = 0
+        self.failed = 0
+        self.sent_events = 0
+        self.sent_requests = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="qist-ga-sender", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def send(self, client_id: str, name: str, params: dict) -> bool:
+        try:
+            self._queue.put_nowait((client_id, {"name": name, "params": params}))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "sent_events": self.sent_events,
+            "sent_requests": self.sent_requests,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    # ---------- achtergrondthread ----------
+    def _post(self, client_id: str, events: List[dict]) -> None:
+        try:
+            r = default_client().post(
+                GA_COLLECT_URL, params=self.params,
+                json={"client_id": client_id, "events": events}, timeout=self.timeout,
+            )
+            r.raise_for_status()
+            self.sent_events += len(events)
+            self.sent_requests += 1
+        except Exception as e:
+            self.failed += len(events)
+            log.warning("GA collect failed for %d events: %s", len(events), e)
+
+    def _flush(self, pending: dict) -> None:
+        for client_id, events in pending.items():
+            for i in range(0, len(events), GA_MAX_EVENTS):
+                self._post(client_id, events[i:i + GA_MAX_EVENTS])
+        pending.clear()
+
+    def _run(self) -> None:
+        pending: dict = {}
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = ()
+            if item is None:  # stopsignaal van close()
+                self._flush(pending)
+                return
+            if item:
+                client_id, event = item
+                events = pending.setdefault(client_id, [])
+                events.append(event)
+                if len(events) >= GA_MAX_EVENTS:
+                    self._post(client_id, pending.pop(client_id))
+            if time.monotonic() >= deadline:
+                self._flush(pending)
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Verstuur wat nog openstaat en stop de thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
@@ -0,0 +1,203 @@
+# qist/api.py — headless JSON-API (zoeken, metadata, screening) zonder Streamlit-sessie
+#
+#   python -m qist.api --port 8502
+#
+#   GET  /v1/search?q=asml&limit=10
+#   GET  /v1/screen/ASML.AS
+#   POST /v1/screen            {"symbols": ["ASML.AS", "US0378331005", ...]}
+#   GET  /healthz, /metrics
+#
+# Tornado (komt al mee met Streamlit) draait de event loop; de blokkerende qist-functies gaan
+# naar een eigen thread-pool, zodat duizenden symbolen tegelijk onderweg kunnen zijn.
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import tornado.web
+
+from qist import bulk, metrics, rules, search_index, snapshot, yahoo
+from qist.cache import cache_stats
+from qist.net import default_client
+
+API_WORKERS = int(os.environ.get("QIST_API_WORKERS", "32"))
+API_MAX_BATCH = 1000
+SCREEN_MAX_AGE = 300          # Cache-Control voor één symbool (s)
+SEARCH_MAX_AGE = 1800         # Cache-Control voor zoekresultaten (s); zelfde als de TTL van mem_search
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="qist-api")
+
+
+# ---------- Screening (synchroon, draait op de pool) ----------
+def screen_symbol(token: str) -> dict:
+    """Ticker/ISIN → metadata + oordeel; zelfde volgorde als de app (snapshot, cache, live)."""
+    token = token.strip().upper()
+    symbol = bulk.resolve_symbol(token)
+    if not symbol:
+        return {"input": token, "symbol": None, "found": False}
+    snap = snapshot.current_snapshot()
+    row = snap.lookup(symbol) if snap is not None else None
+    if row is not None and row.get("is_valid"):
+        meta = {col: row.get(col) for col in snapshot.META_COLUMNS}
+        ratio, basis, status, reasons = row["debt_ratio"], row["basis"], row["status"], [row["reason"]]
+    else:
+        meta = yahoo.fetch_symbol_metadata(symbol) or {}
+        if not meta.get("is_valid"):
+            return {"input": token, "symbol": symbol, "found": False}
+        ratio, basis = rules.compute_debt_ratio(meta)
+        status, reasons = rules.classify_equity(meta)
+    return {
+        "input": token,
+        "symbol": symbol,
+        "found": True,
+        "meta": meta,
+        "debt_ratio": ratio,
+        "basis": basis,
+        "status": status,
+        "reasons": reasons,
+        "rules_version": rules.RULES_VERSION,
+    }
+
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+# ---------- Handlers ----------
+class JsonHandler(tornado.web.RequestHandler):
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+
+    def write_json(self, body, max_age: Optional[int] = None) -> None:
+        raw = json.dumps(body, ensure_ascii=False, default=_json_default).encode()
+        if max_age:
+            self.set_header("Cache-Control", f"public, max-age={max_age}")
+            etag = '"' + hashlib.sha1(raw).hexdigest()[:16] + '"'
+            self.set_header("ETag", etag)
+            if etag in (self.request.headers.get("If-None-Match") or ""):
+                self.set_status(304)
+                return
+        else:
+            self.set_header("Cache-Control", "no-store")
+        self.write(raw)
+
+    def compute_etag(self):
+        return None  # ETag zetten we zelf (alleen voor cachebare antwoorden)
+
+    def write_error(self, status_code: int, **kwargs) -> None:
+        self.write(json.dumps({"error": self._reason}))
+
+
+class SearchHandler(JsonHandler):
+    async def get(self):
+        q = self.get_argument("q", "").strip()
+        try:
+            limit = int(self.get_argument("limit", "15"))
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="limit must be an integer")
+        if limit < 1:
+            raise tornado.web.HTTPError(400, reason="limit must be at least 1")
+        limit = min(limit, 50)
+        if len(q) < 2:
+            raise tornado.web.HTTPError(400, reason="q must be at least 2 characters")
+        with metrics.span("api.search"):
+            results = await _run(search_index.search, q, None, limit)
+        self.write_json({"query": q, "results": results}, max_age=SEARCH_MAX_AGE)
+
+
+class ScreenHandler(JsonHandler):
+    async def get(self, symbol: str):
+        with metrics.span("api.screen"):
+            result = await _run(screen_symbol, symbol)
+        if not result["found"]:
+            self.set_status(404)
+        self.write_json(result, max_age=SCREEN_MAX_AGE)
+
+    async def post(self):
+        try:
+            symbols = json.loads(self.request.body or b"{}").get("symbols")
+        except (ValueError, AttributeError):
+            symbols = None
+        if not isinstance(symbols, list):
+            raise tornado.web.HTTPError(400, reason='body must be {"symbols": [...]}')
+        tokens = bulk.parse_symbols(",".join(str(s) for s in symbols))
+        if len(tokens) > API_MAX_BATCH:
+            raise tornado.web.HTTPError(413, reason=f"at most {API_MAX_BATCH} symbols per request")
+        with metrics.span("api.screen_batch"):
+            # quotes voor alle tickers vooraf in een paar gebatchte requests, daarna alles tegelijk
+            await _run(yahoo.prefetch_quotes, [t for t in tokens if not bulk.ISIN_RE.match(t)])
+            results = await asyncio.gather(*(_run(_screen_safe, t) for t in tokens))
+        self.write_json({"count": len(results), "rules_version": rules.RULES_VERSION, "results": results})
+
+
+class HealthHandler(JsonHandler):
+    def get(self):
+        snap = snapshot.current_snapshot()
+        self.write_json({
+            "ok": True,
+            "rules_version": rules.RULES_VERSION,
+            "snapshot": snap.created_at if snap is not None else None,
+            "search_health": yahoo.search_health(),
+            "caches": cache_stats(),
+            "http": default_client().stats(),
+        })
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.write(metrics.render())
+
+
+def _screen_safe(token: str) -> dict:
+    try:
+        return screen_symbol(token)
+    except Exception as e:
+        return {"input": token, "symbol": None, "found": False, "error": type(e).__name__}
+
+
+def _json_default(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)  # Records uit de in-memory caches
+    item = getattr(obj, "item", None)
+    if callable(item):
+        return item()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def make_app() -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/v1/search", SearchHandler),
+        (r"/v1/screen/([^/]+)", ScreenHandler),
+        (r"/v1/screen", ScreenHandler),
+        (r"/healthz", HealthHandler),
+        (r"/metrics", MetricsHandler),
+    ])
+
+
+async def serve(host: str, port: int) -> None:
+    app = make_app()
+    app.listen(port, address=host)
+    print(f"qist api op http://{host}:{port}", file=sys.stderr)
+    await asyncio.Event().wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless qist screening-API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
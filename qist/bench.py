@@ -0,0 +1,394 @@
+# qist/bench.py — reproduceerbare benchmarks tegen een lokale Yahoo-stand-in (geen live Yahoo nodig)
+#
+#   python -m qist.bench                          # draaien en tabel tonen
+#   python -m qist.bench --save bench.json        # baseline vastleggen
+#   python -m qist.bench --compare bench.json     # exit 1 bij regressie t.o.v. de baseline
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+# ---------- Fixtures ----------
+# Opgenomen Yahoo-antwoorden (ingekort); synthetische symbolen BENCH0001.. lenen er één van.
+FIXTURES = [
+    {
+        "symbol": "AAPL", "shortName": "Apple Inc.", "longName": "Apple Inc.", "exchange": "NMS",
+        "fullExchangeName": "NasdaqGS", "quoteType": "EQUITY", "currency": "USD", "country": "United States",
+        "sector": "Technology", "industry": "Consumer Electronics", "marketCap": 3.45e12,
+        "totalDebt": 1.01e11, "totalAssets": 3.65e11, "period": "2024-09-30",
+    },
+    {
+        "symbol": "ASML.AS", "shortName": "ASML HOLDING", "longName": "ASML Holding N.V.", "exchange": "AMS",
+        "fullExchangeName": "Amsterdam", "quoteType": "EQUITY", "currency": "EUR", "country": "Netherlands",
+        "sector": "Technology", "industry": "Semiconductor Equipment & Materials", "marketCap": 2.6e11,
+        "totalDebt": 4.6e9, "totalAssets": 4.8e10, "period": "2024-12-31",
+    },
+    {
+        "symbol": "JPM", "shortName": "JPMorgan Chase & Co.", "longName": "JPMorgan Chase & Co.", "exchange": "NYQ",
+        "fullExchangeName": "NYSE", "quoteType": "EQUITY", "currency": "USD", "country": "United States",
+        "sector": "Financial Services", "industry": "Banks - Diversified", "marketCap": 6.7e11,
+        "totalDebt": 7.4e11, "totalAssets": 4.0e12, "period": "2024-12-31",
+    },
+    {
+        "symbol": "SHEL.L", "shortName": "SHELL PLC", "longName": "Shell plc", "exchange": "LSE",
+        "fullExchangeName": "LSE", "quoteType": "EQUITY", "currency": "GBp", "country": "United Kingdom",
+        "sector": "Energy", "industry": "Oil & Gas Integrated", "marketCap": 1.6e11,
+        "totalDebt": 7.7e10, "totalAssets": 3.9e11, "period": "2024-12-31",
+    },
+    {
+        "symbol": "BUD", "shortName": "Anheuser-Busch Inbev SA Sponso", "longName": "Anheuser-Busch InBev SA/NV",
+        "exchange": "NYQ", "fullExchangeName": "NYSE", "quoteType": "EQUITY", "currency": "USD", "country": "Belgium",
+        "sector": "Consumer Defensive", "industry": "Beverages - Brewers", "marketCap": 1.1e11,
+        "totalDebt": 8.0e10, "totalAssets": 2.1e11, "period": "2024-12-31",
+    },
+]
+_BY_SYMBOL = {f["symbol"]: f for f in FIXTURES}
+
+
+def fixture(symbol: str) -> dict:
+    """Fixture voor een echt of synthetisch symbool; synthetische krijgen hun eigen naam/ticker."""
+    sym = symbol.upper()
+    if sym in _BY_SYMBOL:
+        return _BY_SYMBOL[sym]
+    base = FIXTURES[sum(map(ord, sym)) % len(FIXTURES)]
+    return dict(base, symbol=sym, shortName=f"{base['shortName']} {sym}", longName=f"{base['longName']} {sym}")
+
+
+def bench_symbols(n: int, offset: int = 0) -> List[str]:
+    return [f"BENCH{i:04d}" for i in range(offset, offset + n)]
+
+
+# ---------- Stub-server ----------
+class StubYahoo:
+    """Lokale HTTP-server met de Yahoo-routes die qist gebruikt, plus latency- en foutinjectie.
+
+    Routes: /v1/finance/search, /autoc, /v7/finance/quote en /fundamentals/<symbol>?part=...
+    (de laatste bedient StubTicker, de yf.Ticker-vervanger); voor de load-test ook POST
+    /mp/collect (GA) en /sheets/append (Sheets), zie qist/loadtest.py. `latency` is de gemiddelde
+    vertraging per request in seconden (±`jitter` fractie), `error_rate` het aandeel 503's.
+    """
+
+    def __init__(self, latency: float = 0.02, jitter: float = 0.5, error_rate: float = 0.0, seed: int = 1):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="qist-bench-stub", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubYahoo":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubYahoo":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _delay_and_fail(self) -> bool:
+        with self._rng_lock:
+            delay = self.latency * (1 + self.jitter * (2 * self._rng.random() - 1))
+            fail = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    # -- antwoorden --
+    @staticmethod
+    def _search(query: str) -> dict:
+        q = query.upper()
+        hits = [f for f in FIXTURES if q in f["symbol"] or q in f["longName"].upper()] or [fixture(q)]
+        return {"quotes": [
+            {"symbol": f["symbol"], "shortname": f["shortName"], "longname": f["longName"],
+             "exchDisp": f["fullExchangeName"], "exchange": f["exchange"], "quoteType": f["quoteType"], "score": 1}
+            for f in hits
+        ]}
+
+    @staticmethod
+    def _autoc(query: str) -> dict:
+        hits = StubYahoo._search(query)["quotes"]
+        return {"ResultSet": {"Result": [
+            {"symbol": h["symbol"], "name": h["shortname"], "exchDisp": h["exchDisp"], "typeDisp": "Equity"} for h in hits
+        ]}}
+
+    @staticmethod
+    def _quote(symbols: List[str]) -> dict:
+        return {"quoteResponse": {"result": [
+            {k: f[k] for k in ("symbol", "shortName", "longName", "exchange", "fullExchangeName", "currency",
+                               "marketCap", "quoteType")}
+            for f in map(fixture, symbols)
+        ]}}
+
+    @staticmethod
+    def _fundamentals(symbol: str, part: str) -> dict:
+        f = fixture(symbol)
+        if part == "info":
+            return {k: f[k] for k in ("symbol", "shortName", "longName", "exchange", "currency", "country",
+                                      "sector", "industry", "marketCap")}
+        if part == "fast_info":
+            return {"exchange": f["exchange"], "currency": f["currency"]}
+        if part == "history":
+            return {"rows": 21}
+        if part == "balance_sheet":
+            return {f["period"]: {"Total Debt": f["totalDebt"], "Total Assets": f["totalAssets"]}}
+        return {}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # stil
+                pass
+
+            def setup(self):
+                super().setup()
+                # headers en body gaan apart de deur uit: zonder NODELAY kost elk antwoord ~40 ms (Nagle)
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                u = urlparse(self.path)
+                qs = {k: v[0] for k, v in parse_qs(u.query).items()}
+                route = u.path.split("/")[1] if u.path.startswith("/fundamentals/") else u.path
+                with stub._rng_lock:
+                    stub.requests[route] = stub.requests.get(route, 0) + 1
+                if stub._delay_and_fail():
+                    return self._send(503, {"error": "injected"})
+                if u.path == "/v1/finance/search":
+                    body = stub._search(qs.get("q", ""))
+                elif u.path == "/autoc":
+                    body = stub._autoc(qs.get("query", ""))
+                elif u.path == "/v7/finance/quote":
+                    body = stub._quote([s for s in qs.get("symbols", "").split(",") if s])
+                elif u.path.startswith("/fundamentals/"):
+                    body = stub._fundamentals(u.path.rsplit("/", 1)[1], qs.get("part", ""))
+                else:
+                    return self._send(404, {})
+                self._send(200, body)
+
+            def do_POST(self):
+                u = urlparse(self.path)
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._rng_lock:
+                    stub.requests[u.path] = stub.requests.get(u.path, 0) + 1
+                if stub._delay_and_fail():
+                    return self._send(503, {"error": "injected"})
+                if u.path not in ("/mp/collect", "/sheets/append"):
+                    return self._send(404, {})
+                self._send(200, {})
+
+            def _send(self, code: int, body: dict):
+                raw = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        return Handler
+
+
+class StubTicker:
+    """Vervangt yf.Ticker: zelfde attributen die qist.yahoo leest, elk via één request naar de stub."""
+
+    session = requests.Session()
+    base_url = ""
+
+    def __init__(self, symbol: str):
+        self.ticker = symbol
+
+    def _get(self, part: str) -> dict:
+        r = self.session.get(f"{self.base_url}/fundamentals/{self.ticker}", params={"part": part}, timeout=10)
+        r.raise_for_status()
+        return r.json()
+
+    def get_info(self) -> dict:
+        return self._get("info")
+
+    info = property(get_info)
+
+    @property
+    def fast_info(self) -> dict:
+        return self._get("fast_info")
+
+    def history(self, period: str = "1mo", **kwargs) -> pd.DataFrame:
+        rows = self._get("history")["rows"]
+        return pd.DataFrame({"Close": np.ones(rows)})
+
+    @property
+    def balance_sheet(self) -> pd.DataFrame:
+        bs = self._get("balance_sheet")
+        return pd.DataFrame({pd.Timestamp(k): v for k, v in bs.items()})
+
+
+def install_stub(stub: StubYahoo) -> None:
+    """Zet qist.yahoo om naar de stub: zoek- en quote-URL's en de Ticker-klasse."""
+    from qist import yahoo
+
+    routes = {"query2": "/v1/finance/search", "query1": "/v1/finance/search", "autoc": "/autoc"}
+    yahoo.SEARCH_ENDPOINTS = [(name, stub.url + routes[name]) for name, _ in yahoo.SEARCH_ENDPOINTS]
+    yahoo.QUOTE_URL = stub.url + "/v7/finance/quote"
+    StubTicker.base_url = stub.url
+    yahoo.yf = types.SimpleNamespace(Ticker=StubTicker)
+
+
+# ---------- Meten ----------
+def summarize(latencies: List[float], wall: float) -> Dict[str, float]:
+    lat = np.asarray(latencies) * 1000.0
+    return {
+        "n": int(len(lat)),
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+        "mean_ms": float(lat.mean()),
+        "throughput": float(len(lat) / wall) if wall > 0 else float("inf"),
+    }
+
+
+def measure(fn: Callable, args: List, concurrency: int = 1) -> Dict[str, float]:
+    """fn(arg) voor elk arg; latency per aanroep en doorvoer (aanroepen/s) over de hele reeks."""
+    def one(arg) -> float:
+        t0 = time.perf_counter()
+        fn(arg)
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if concurrency <= 1:
+        latencies = [one(a) for a in args]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, args))
+    return summarize(latencies, time.perf_counter() - t0)
+
+
+def run_suite(n: int = 200, concurrency: int = 8, latency: float = 0.02, error_rate: float = 0.0,
+              seed: int = 1) -> Dict[str, dict]:
+    """Koud (lege caches) en warm (zelfde werk nog eens) per functie."""
+    # Cache-db in een tijdelijke map: de eerste ronde is gegarandeerd koud.
+    tmp = tempfile.mkdtemp(prefix="qist-bench-")
+    os.environ["QIST_CACHE_DB"] = os.path.join(tmp, "meta.sqlite3")
+    from qist import rules, yahoo
+
+    results: Dict[str, dict] = {}
+    with StubYahoo(latency=latency, error_rate=error_rate, seed=seed) as stub:
+        install_stub(stub)
+        queries = [f["symbol"] for f in FIXTURES] + bench_symbols(max(0, n // 4 - len(FIXTURES)))
+        symbols = bench_symbols(n)
+        metas = [yahoo.fetch_symbol_metadata(s) for s in symbols[: min(n, 50)]]
+        metas = (metas * (n // len(metas) + 1))[:n]
+
+        cases = {
+            "yahoo_search": (lambda q: yahoo.yahoo_search(q), queries, 1),
+            "yahoo_quote": (yahoo.yahoo_quote, bench_symbols(n, offset=5000), concurrency),
+            "fetch_symbol_profile": (yahoo.fetch_symbol_profile, bench_symbols(n, offset=15000), concurrency),
+            "fetch_symbol_metadata": (yahoo.fetch_symbol_metadata, bench_symbols(n, offset=10000), concurrency),
+            "compute_debt_ratio": (rules.compute_debt_ratio, metas, 1),
+            "classify_equity": (rules.classify_equity, metas, 1),
+        }
+        for name, (fn, args, conc) in cases.items():
+            results[name] = {
+                "cold": measure(fn, args, conc),
+                "warm": measure(fn, args, conc),
+            }
+        results["_stub_requests"] = dict(stub.requests)
+    results["_config"] = {
+        "n": n, "concurrency": concurrency, "latency": latency, "error_rate": error_rate, "seed": seed,
+    }
+    return results
+
+
+# ---------- Baseline ----------
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = 0.25,
+            floor_ms: float = 0.5) -> List[str]:
+    """Regressies: p95 meer dan `tolerance` boven de baseline én minstens `floor_ms` trager."""
+    problems = []
+    for name, phases in baseline.items():
+        if name.startswith("_") or name not in current:
+            continue
+        for phase, old in phases.items():
+            new = current[name].get(phase)
+            if not new:
+                continue
+            if new["p95_ms"] > old["p95_ms"] * (1 + tolerance) and new["p95_ms"] - old["p95_ms"] > floor_ms:
+                problems.append(
+                    f"{name}/{phase}: p95 {new['p95_ms']:.2f} ms vs baseline {old['p95_ms']:.2f} ms"
+                )
+    return problems
+
+
+def format_table(results: Dict[str, dict]) -> str:
+    lines = [f"{'function':<24}{'phase':<6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>12}"]
+    for name, phases in results.items():
+        if name.startswith("_"):
+            continue
+        for phase, s in phases.items():
+            lines.append(
+                f"{name:<24}{phase:<6}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}{s['throughput']:>12.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark qist tegen een lokale Yahoo-stub.")
+    ap.add_argument("--n", type=int, default=200, help="aanroepen per functie per fase")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--latency", type=float, default=0.02, help="gemiddelde stub-latency (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="aandeel 503-antwoorden")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="resultaat als baseline-JSON wegschrijven")
+    ap.add_argument("--compare", help="vergelijken met deze baseline-JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="toegestane p95-toename (fractie)")
+    ap.add_argument("--metrics", help="per-stap metrics (Prometheus-tekst) naar dit bestand")
+    args = ap.parse_args(argv)
+
+    results = run_suite(args.n, args.concurrency, args.latency, args.error_rate, args.seed)
+    print(format_table(results))
+    if args.metrics:
+        from qist import metrics
+        metrics.dump(args.metrics)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline → {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.tolerance)
+        for p in problems:
+            print("REGRESSIE", p, file=sys.stderr)
+        if problems:
+            return 1
+        print("geen regressies t.o.v.", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
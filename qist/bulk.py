@@ -0,0 +1,70 @@
+# qist/bulk.py — portefeuille-screening: lijst/CSV van tickers/ISIN's parallel ophalen
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from qist import search_index, snapshot, yahoo
+
+BULK_WORKERS = 8
+BULK_MAX_SYMBOLS = 500
+
+ISIN_RE = search_index.ISIN_RE
+_SPLIT_RE = re.compile(r"[\s,;]+")
+_CSV_COLUMNS = ("symbol", "ticker", "isin")
+
+# Eigen pool: een bulk-taak wacht zelf op de deel-requests in de metadata-pool.
+_pool = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="qist-bulk")
+
+
+def _dedupe(tokens: Iterable[str]) -> List[str]:
+    seen, out = set(), []
+    for tok in tokens:
+        tok = str(tok or "").strip().upper()
+        if tok and tok != "NAN" and tok not in seen:
+            out.append(tok); seen.add(tok)
+    return out
+
+
+def parse_symbols(text: str) -> List[str]:
+    """Geplakte tekst → unieke tickers/ISIN's (gescheiden door komma, puntkomma, spatie of regel)."""
+    return _dedupe(_SPLIT_RE.split(text or ""))
+
+
+def parse_csv(file) -> List[str]:
+    """CSV met een kolom symbol/ticker/isin (hoofdletterongevoelig), anders de eerste kolom."""
+    df = pd.read_csv(file, dtype=str)
+    if df.empty:
+        return []
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    col = next((cols[c] for c in _CSV_COLUMNS if c in cols), df.columns[0])
+    return _dedupe(df[col].tolist())
+
+
+def resolve_symbol(token: str) -> Optional[str]:
+    """ISIN → beste notering (lokale index, anders Yahoo); tickers gaan ongewijzigd door."""
+    if not ISIN_RE.match(token):
+        return token
+    results = search_index.search(token)
+    return results[0]["symbol"] if results else None
+
+
+def _screen_one(token: str) -> Tuple[str, Optional[dict]]:
+    symbol = resolve_symbol(token)
+    if not symbol:
+        return token, None
+    return token, snapshot.lookup_meta(symbol) or yahoo.fetch_symbol_metadata(symbol)
+
+
+def screen_many(tokens: List[str]) -> Iterator[Tuple[str, Optional[dict]]]:
+    """Haal metadata parallel op; levert (invoer, meta|None) zodra elke lookup klaar is."""
+    tokens = tokens[:BULK_MAX_SYMBOLS]
+    # quotes voor alle tickers vooraf in een handvol gebatchte requests
+    yahoo.prefetch_quotes([tok for tok in tokens if not ISIN_RE.match(tok)])
+    futures = {_pool.submit(_screen_one, tok): tok for tok in tokens}
+    for fut in as_completed(futures):
+        try:
+            yield fut.result()
+        except Exception:
+            yield futures[fut], None
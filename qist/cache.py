@@ -0,0 +1,169 @@
+# qist/cache.py — begrensde in-memory LRU-caches (aantal + bytes + TTL) en compacte, onveranderlijke records
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+from qist import metrics
+
+MISSING = object()
+
+
+# ---------- Records ----------
+class Record(Mapping):
+    """Onveranderlijk record met __slots__: leest als een dict (r["x"], r.get("x"), dict(r)),
+    maar zonder per-object dict en zonder kopie bij een cache-hit. Onbekende sleutels → KeyError.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(self, **values: Any):
+        for f in self._fields:
+            object.__setattr__(self, f, values.get(f))
+
+    @classmethod
+    def from_mapping(cls, d: Mapping) -> "Record":
+        return cls(**{f: d.get(f) for f in cls._fields})
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{f}={getattr(self, f)!r}' for f in self._fields)})"
+
+    def __reduce__(self):
+        return (_rebuild, (type(self), tuple(getattr(self, f) for f in self._fields)))
+
+
+def _rebuild(cls, values):
+    return cls(**dict(zip(cls._fields, values)))
+
+
+def record_type(name: str, fields: Iterable[str]) -> type:
+    fields = tuple(fields)
+    module = sys._getframe(1).f_globals.get("__name__", __name__)  # zoals namedtuple: picklebaar
+    return type(name, (Record,), {"__slots__": fields, "_fields": fields, "__module__": module})
+
+
+# ---------- Grootte ----------
+def sizeof(value: Any, _depth: int = 0) -> int:
+    """Benadering van het geheugengebruik (object + inhoud, twee niveaus diep)."""
+    size = sys.getsizeof(value)
+    if _depth >= 2 or isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, Record):
+        return size + sum(sizeof(getattr(value, f), _depth + 1) for f in value._fields)
+    if isinstance(value, Mapping):
+        return size + sum(sizeof(k, _depth + 1) + sizeof(v, _depth + 1) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return size + sum(sizeof(v, _depth + 1) for v in value)
+    return size
+
+
+# ---------- LRU ----------
+class LRUCache:
+    """Thread-safe LRU met drie grenzen: aantal entries, (benaderde) bytes en TTL.
+
+    Waarden worden niet gekopieerd of gepickeld; sla dus alleen onveranderlijke waarden op
+    (Records, tuples). Statistieken via stats() en als metrics (qist_cache_requests_total,
+    qist_memcache_bytes, qist_memcache_entries).
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int, ttl: float,
+                 sizeof: Callable[[Any], int] = sizeof):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        _caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < now:
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        metrics.cache_event(self.name, "miss" if entry is None else "hit")
+        return default if entry is None else entry[2]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, size, value)
+            self.bytes += size
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+            entries, used = len(self._data), self.bytes
+        metrics.REGISTRY.set_gauge("qist_memcache_bytes", used, help="Benaderd geheugengebruik per in-memory cache.", cache=self.name)
+        metrics.REGISTRY.set_gauge("qist_memcache_entries", entries, help="Entries per in-memory cache.", cache=self.name)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any], keep: Callable[[Any], bool] = bool) -> Any:
+        """Uit de cache, anders load(); alleen bewaren als keep(waarde) (standaard: niet-leeg)."""
+        value = self.get(key)
+        if value is MISSING:
+            value = load()
+            if keep(value):
+                self.put(key, value)
+        return value
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data), "max_entries": self.max_entries,
+                "bytes": self.bytes, "max_bytes": self.max_bytes, "ttl": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions, "expirations": self.expirations,
+            }
+
+
+_caches: List[LRUCache] = []
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Statistieken van alle in-memory caches in dit proces."""
+    return {c.name: c.stats() for c in _caches}
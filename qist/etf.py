@@ -0,0 +1,169 @@
+# qist/etf.py — ETF look-through: holdings ophalen, elke positie screenen, gewogen percentages voor classify_etf
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from qist import metrics, rules, snapshot, yahoo
+from qist.metastore import default_store
+from qist.search_index import ISIN_RE
+
+ETF_WORKERS = 8
+HOLDINGS_TTL = 3 * 86400      # < max_age van de store (7 d), zodat oudere holdings stale-while-revalidate geven
+VERDICT_TTL = 24 * 3600       # oordeel per positie; gedeeld tussen ETF's
+ETF_SEARCH_TYPES = ("ETF",)
+# al een ticker: hoofdletters zonder spaties (SPUS, ISDW.L) of iets met een beurs-achtervoegsel (isdw.l)
+_TICKER_RE = re.compile(r"^(?:[A-Z0-9^][A-Z0-9.\-=]{0,11}|[A-Za-z0-9\-]{1,8}\.[A-Za-z]{1,3})$")
+_HALAL = {"halal", "halal_full"}
+
+# Eigen pool, net als bulk: een positie wacht zelf op de deel-requests in de metadata-pool.
+_pool = ThreadPoolExecutor(max_workers=ETF_WORKERS, thread_name_prefix="qist-etf")
+
+
+# ---------- Holdings ----------
+def resolve_etf(name: str) -> Optional[str]:
+    """Vrije tekst uit het ETF-veld → ticker. Een ticker gaat ongewijzigd door; een naam of ISIN
+    wordt gezocht met alleen ETF's (de gewone zoekactie en de lokale index kennen alleen aandelen)."""
+    token = name.strip()
+    if not token:
+        return None
+    if _TICKER_RE.match(token) and not ISIN_RE.match(token.upper()):
+        return token.upper()
+    results = yahoo.yahoo_search(token, types=ETF_SEARCH_TYPES)
+    return results[0]["symbol"] if results else None
+
+
+def _holdings_frame(df: pd.DataFrame) -> List[dict]:
+    """DataFrame (index/kolom symbool, kolom met gewicht) → [{symbol, name, weight}], gewicht als fractie."""
+    cols = {str(c).strip().lower(): c for c in df.columns}
+    sym_col = next((cols[c] for c in ("symbol", "ticker") if c in cols), None)
+    w_col = next((cols[c] for c in ("holding percent", "weight", "weight (%)", "% of net assets", "holdingpercent") if c in cols), None)
+    if w_col is None:
+        return []
+    symbols = df[sym_col] if sym_col is not None else pd.Series(df.index, index=df.index)
+    names = df[cols["name"]] if "name" in cols else pd.Series([None] * len(df), index=df.index)
+    weights = pd.to_numeric(df[w_col].astype(str).str.rstrip("%").str.replace(",", ".", regex=False), errors="coerce")
+    out = [
+        {"symbol": str(s).strip().upper(), "name": n if isinstance(n, str) else None, "weight": float(w)}
+        for s, n, w in zip(symbols, names, weights)
+        if isinstance(s, str) and s.strip() and pd.notna(w) and w > 0
+    ]
+    # issuer-bestanden geven procenten, Yahoo fracties
+    if sum(h["weight"] for h in out) > 1.5:
+        for h in out:
+            h["weight"] /= 100.0
+    return out
+
+
+def parse_holdings_csv(file) -> List[dict]:
+    """Holdings-CSV van de uitgever: kolom symbol/ticker + weight (fractie of procent)."""
+    return _holdings_frame(pd.read_csv(file, dtype=str))
+
+
+def fetch_holdings_live(symbol: str) -> dict:
+    """Top-holdings via Yahoo (funds_data in nieuwere yfinance, anders quoteSummary/topHoldings)."""
+    tk = yf.Ticker(symbol)
+    holdings: List[dict] = []
+    try:
+        fd = getattr(tk, "funds_data", None)
+        if fd is not None:
+            holdings = _holdings_frame(fd.top_holdings.reset_index())
+    except Exception:
+        holdings = []
+    if not holdings:
+        try:
+            from yfinance.data import YfData
+            js = YfData().get_raw_json(
+                f"https://query2.finance.yahoo.com/v10/finance/quoteSummary/{symbol}",
+                params={"modules": "topHoldings", "formatted": "false"},
+            )
+            raw = js["quoteSummary"]["result"][0]["topHoldings"].get("holdings") or []
+            holdings = [
+                {"symbol": str(h["symbol"]).upper(), "name": h.get("holdingName"), "weight": float(h["holdingPercent"])}
+                for h in raw if h.get("symbol") and h.get("holdingPercent")
+            ]
+        except Exception:
+            holdings = []
+    # leeg → niets cachen, zodat een volgende poging het opnieuw probeert
+    return {"symbol": symbol, "holdings": holdings} if holdings else {}
+
+
+def fetch_holdings(symbol: str) -> List[dict]:
+    record = default_store().get_or_fetch("holdings", symbol, fetch_holdings_live, {}, HOLDINGS_TTL)
+    return (record or {}).get("holdings") or []
+
+
+# ---------- Oordeel per positie (gedeeld tussen ETF's) ----------
+def _screen_constituent(symbol: str) -> dict:
+    meta = snapshot.lookup_meta(symbol) or yahoo.fetch_symbol_metadata(symbol)
+    if not meta or not meta.get("is_valid"):
+        return {"status": "unclassified", "reason": "Not found.", "name": None, "rules_version": rules.RULES_VERSION}
+    status, reasons = rules.classify_equity(meta)
+    return {"status": status, "reason": reasons[0], "name": meta.get("name"), "rules_version": rules.RULES_VERSION}
+
+
+def constituent_verdict(symbol: str) -> dict:
+    """Oordeel uit de gedeelde cache (zolang vers en met dezelfde regelset), anders live screenen."""
+    store = default_store()
+    hit = store.get("verdict", symbol, {}, VERDICT_TTL)
+    if hit is not None:
+        record, stale = hit
+        if not stale and record.get("rules_version") == rules.RULES_VERSION:
+            metrics.cache_event("verdict", "hit")
+            return dict(record, cached=True)
+    metrics.cache_event("verdict", "miss")
+    record = _screen_constituent(symbol)
+    if record["status"] != "unclassified":
+        store.put("verdict", symbol, record)
+    return dict(record, cached=False)
+
+
+# ---------- Look-through ----------
+def look_through(symbol: str, holdings: Optional[List[dict]] = None) -> dict:
+    """Screen alle posities parallel en bereken gewogen percentages voor classify_etf.
+
+    halal_pct = gewicht halal posities, purification_pct = gewicht niet-halal posities, beide
+    als % van het gescreende gewicht; twijfel en ongeclassificeerd tellen voor geen van beide.
+    purification_pct is een benadering: eigenlijk gaat het om het onzuivere deel van de
+    inkomsten (dividend uit niet-halal posities, rente), en die cijfers geeft Yahoo niet. coverage_pct = welk deel van
+    het fonds de holdings dekken (Yahoo geeft alleen de top-10).
+    """
+    holdings = holdings if holdings is not None else fetch_holdings(symbol)
+    symbols = [h["symbol"] for h in holdings]
+    yahoo.prefetch_quotes(symbols)
+    verdicts: Dict[str, dict] = dict(zip(symbols, _pool.map(_safe_verdict, symbols)))
+
+    rows, w_total, w_screened, w_halal, w_haram = [], 0.0, 0.0, 0.0, 0.0
+    for h in holdings:
+        v = verdicts[h["symbol"]]
+        w = h["weight"]
+        w_total += w
+        if v["status"] != "unclassified":
+            w_screened += w
+        if v["status"] in _HALAL:
+            w_halal += w
+        elif v["status"] == "not_halal":
+            w_haram += w
+        rows.append({
+            "symbol": h["symbol"], "name": h.get("name") or v.get("name"), "weight": w,
+            "status": v["status"], "reason": v["reason"], "cached": v.get("cached", False),
+        })
+    pct = lambda part: int(round(100.0 * part / w_screened)) if w_screened else 0
+    return {
+        "symbol": symbol,
+        "holdings": rows,
+        "coverage_pct": 100.0 * w_total,
+        "screened_pct": 100.0 * w_screened,
+        "halal_pct": pct(w_halal),
+        "purification_pct": pct(w_haram),
+        "cache_hits": sum(1 for r in rows if r["cached"]),
+    }
+
+
+def _safe_verdict(symbol: str) -> dict:
+    try:
+        return constituent_verdict(symbol)
+    except Exception:
+        return {"status": "unclassified", "reason": "Lookup failed.", "name": None, "cached": False}
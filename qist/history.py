@@ -0,0 +1,139 @@
+# qist/history.py — compliance-geschiedenis: schuldratio per jaar/kwartaal in één gevectoriseerde stap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from qist import rules, yahoo
+from qist.metastore import default_store
+
+HISTORY_TTL = 3 * 24 * 3600   # < max_age van de store (7 d): van 3 tot 7 d oud direct tonen en op de achtergrond verversen
+HISTORY_PRICE_PERIOD = "6y"   # genoeg koersen voor de oudste jaarbalans
+_HALAL = ("halal", "halal_full")
+# basis als sleutel opslaan; de app vertaalt bij het tonen
+_BASIS_KEYS = {"mc": "mc", "assets": "assets", "unknown": "unknown"}
+
+_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix="qist-history")
+
+
+def _periods(bs, freq: str) -> pd.DataFrame:
+    """Balans (rijen = posten, kolommen = perioden) → één rij per periode met schuld/activa/aandelen."""
+    if not isinstance(bs, pd.DataFrame) or bs.empty:
+        return pd.DataFrame()
+    pick = lambda *names: next((bs.loc[n] for n in names if n in bs.index), pd.Series(np.nan, index=bs.columns))
+    df = pd.DataFrame({
+        "totalDebt": pick("Total Debt", "Total Liabilities"),
+        "totalAssets": pick("Total Assets"),
+        "shares": pick("Ordinary Shares Number", "Share Issued"),
+    }).apply(pd.to_numeric, errors="coerce")
+    df.index = pd.to_datetime(df.index).tz_localize(None)
+    df.index.name = "period"
+    df["freq"] = freq
+    return df
+
+
+def _get_sheet(tk, attr: str):
+    try:
+        return getattr(tk, attr)
+    except Exception:
+        return None
+
+
+def _get_prices(tk) -> pd.Series:
+    try:
+        hist = tk.history(period=HISTORY_PRICE_PERIOD, interval="1wk", auto_adjust=False)
+        close = hist["Close"].dropna()
+        close.index = pd.to_datetime(close.index).tz_localize(None)
+        return close.sort_index()
+    except Exception:
+        return pd.Series(dtype=float)
+
+
+def compute_history(annual: pd.DataFrame, quarterly: pd.DataFrame, prices: pd.Series, meta: Optional[dict] = None) -> pd.DataFrame:
+    """Alle perioden samen door classify_equity_frame (één pass, geen lus per periode).
+
+    Market cap per periode = aandelen × slotkoers op of vóór de periode-einddatum; ontbreekt
+    dat, dan valt de ratio terug op totale activa (zelfde volgorde als compute_debt_ratio).
+    Activiteit (naam/sector/industrie) komt uit het huidige profiel.
+    """
+    frames = [f for f in (quarterly, annual) if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["period", "freq", "debt_ratio", "basis", "status"])
+    # zelfde einddatum in jaar- en kwartaalbalans → kwartaal houden (identieke cijfers)
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="first")].sort_index()
+    if len(prices):
+        # weekkoersen kunnen dubbele datums bevatten (bv. lopende week + slot); reindex weigert die
+        prices = prices[~prices.index.duplicated(keep="last")].sort_index()
+        px = prices.reindex(df.index, method="ffill")
+        df["marketCap"] = df["shares"].to_numpy(dtype=float) * px.to_numpy(dtype=float)
+    else:
+        df["marketCap"] = np.nan
+    meta = meta or {}
+    for col in ("name", "sector", "industry"):
+        df[col] = meta.get(col)
+    verdict = rules.classify_equity_frame(df, _BASIS_KEYS)
+    return pd.DataFrame({
+        "period": df.index.strftime("%Y-%m-%d"),
+        "freq": df["freq"].to_numpy(),
+        "debt_ratio": verdict["debt_ratio"].round(4).to_numpy(),
+        "basis": verdict["basis"].to_numpy(),
+        "status": verdict["status"].to_numpy(),
+    })
+
+
+def fetch_history_live(symbol: str) -> dict:
+    """Jaar- en kwartaalbalans + weekkoersen parallel ophalen; resultaat kolomsgewijs (compact) opslaan."""
+    tk = yf.Ticker(symbol)
+    annual = _pool.submit(_get_sheet, tk, "balance_sheet")
+    quarterly = _pool.submit(_get_sheet, tk, "quarterly_balance_sheet")
+    prices = _pool.submit(_get_prices, tk)
+    meta = yahoo.fetch_symbol_metadata(symbol)
+    series = compute_history(
+        _periods(annual.result(), "A"), _periods(quarterly.result(), "Q"), prices.result(), meta,
+    )
+    if series.empty:
+        return {}
+    return {"rules_version": rules.RULES_VERSION, "series": _to_columns(series)}
+
+
+def _to_columns(series: pd.DataFrame) -> Dict[str, List]:
+    return {
+        "period": series["period"].tolist(),
+        "freq": series["freq"].tolist(),
+        "debt_ratio": [None if pd.isna(x) else float(x) for x in series["debt_ratio"]],
+        "basis": series["basis"].tolist(),
+        "status": series["status"].tolist(),
+    }
+
+
+def compliance_history(symbol: str) -> pd.DataFrame:
+    """Tijdreeks per periode (period, freq, debt_ratio, basis, status), oudste eerst."""
+    store = default_store()
+    record = store.get_or_fetch("history", symbol, fetch_history_live, {}, HISTORY_TTL)
+    if record and record.get("rules_version") != rules.RULES_VERSION:
+        # andere regelset → statussen kloppen niet meer; opnieuw berekenen
+        record = fetch_history_live(symbol)
+        if record:
+            store.put("history", symbol, record)
+    cols = (record or {}).get("series")
+    if not cols:
+        return pd.DataFrame(columns=["period", "freq", "debt_ratio", "basis", "status"])
+    df = pd.DataFrame(cols)
+    df["period"] = pd.to_datetime(df["period"])
+    df["debt_ratio"] = pd.to_numeric(df["debt_ratio"], errors="coerce")
+    return df
+
+
+def compliant_since(history: pd.DataFrame) -> Optional[pd.Timestamp]:
+    """Begin van de laatste ononderbroken reeks halal-perioden (None als de laatste periode niet halal is)."""
+    if history.empty:
+        return None
+    ok = history["status"].isin(_HALAL).to_numpy()
+    if not ok[-1]:
+        return None
+    breaks = np.flatnonzero(~ok)
+    start = breaks[-1] + 1 if len(breaks) else 0
+    return history["period"].iloc[start]
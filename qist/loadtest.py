@@ -0,0 +1,255 @@
+# qist/loadtest.py — gelijktijdige gescripte sessies door app.py (AppTest) tegen lokale stand-ins voor Yahoo, GA en Sheets
+#
+#   python -m qist.loadtest                               # concurrency 1, 2, 4, 8, 16
+#   python -m qist.loadtest --levels 1,8,32 --latency 0.1
+#   python -m qist.loadtest --save load.json              # baseline vastleggen
+#   python -m qist.loadtest --compare load.json           # exit 1 bij regressie t.o.v. de baseline
+#
+# Elke virtuele gebruiker is een eigen AppTest (eigen session state) in hetzelfde proces, net als
+# sessies op één Streamlit-server: cache_resource, de in-memory caches en de thread-pools worden
+# gedeeld. Per stap (laden, zoeken, notering kiezen, check) telt de duur van de hele rerun.
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+from unittest.mock import MagicMock
+
+from qist import bench
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STEPS = ("load", "search", "select", "check")
+RERUN_TIMEOUT = 120.0
+
+
+# ---------- Stand-ins voor GA en Sheets ----------
+class StubWorksheet:
+    """Vervangt de gspread-worksheet: append_rows wordt één POST naar de stub."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def append_rows(self, rows, value_input_option: str = "RAW") -> None:
+        from qist.net import default_client
+        r = default_client().post(self.url + "/sheets/append", json={"rows": rows}, timeout=10)
+        r.raise_for_status()
+
+
+def install_analytics_stub(stub: bench.StubYahoo) -> Dict[str, dict]:
+    """GA-collect-URL en de Sheets-worksheet naar de stub; geeft de bijbehorende st.secrets terug."""
+    from qist import analytics
+
+    analytics.GA_COLLECT_URL = stub.url + "/mp/collect"
+    analytics.SheetWriter._worksheet = lambda self: StubWorksheet(stub.url)
+    return {
+        "ga": {"measurement_id": "G-LOADTEST", "api_secret": "loadtest"},
+        "logging": {"usage_sheet_id": "loadtest"},
+        "gcp_service_account": {"type": "service_account"},
+    }
+
+
+# ---------- Gedeelde Streamlit-runtime ----------
+@contextlib.contextmanager
+def shared_runtime(secrets: Dict[str, dict]) -> Iterator[None]:
+    """Eén (mock-)runtime en één set secrets voor alle AppTests tegelijk.
+
+    AppTest.run() zet per rerun een eigen Runtime-singleton, st.secrets en de config-optie
+    global.appTest neer en ruimt ze daarna op; met meerdere sessies in threads halen ze elkaar
+    dan onderuit. Hier staat de
+    runtime vast voor de hele load-test (zoals op één server) en gaan de toewijzingen van
+    AppTest naar een afvoerputje. Ook de script-cache wordt gedeeld: app.py één keer
+    compileren, zoals de server doet (en ast.parse is in Python 3.11 niet thread-safe).
+    """
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    shared = Secrets([])
+    shared._secrets = secrets
+    script_cache = ScriptCache()
+    # AppTest-aanroepen vanuit de load-threads zelf hebben geen ScriptRunContext; dat is hier verwacht
+    ctx_log = logging.getLogger("streamlit.runtime.scriptrunner.script_run_context")
+    quiet = _DropMissingContext()
+    saved = Runtime._instance, app_test.Runtime, st.secrets, local_script_runner.ScriptCache, app_test.patch_config_options
+    Runtime._instance, app_test.Runtime, st.secrets = runtime, types.SimpleNamespace(_instance=None), shared
+    local_script_runner.ScriptCache = lambda: script_cache
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+    ctx_log.addFilter(quiet)
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        (Runtime._instance, app_test.Runtime, st.secrets, local_script_runner.ScriptCache,
+         app_test.patch_config_options) = saved
+        ctx_log.removeFilter(quiet)
+
+
+class _DropMissingContext(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "missing ScriptRunContext" not in record.getMessage()
+
+
+# ---------- Eén virtuele gebruiker ----------
+def run_session(query: str, pick: int = 0) -> Dict[str, float]:
+    """Laden → zoeken → notering kiezen → check; duur (s) per stap. Ontbrekende stap → niet in de dict.
+
+    Draait binnen shared_runtime() (secrets komen daar vandaan).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT)
+    timings: Dict[str, float] = {}
+
+    def step(name: str, action) -> bool:
+        t0 = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - t0
+        return not at.exception
+
+    if not step("load", at.run):
+        return timings
+    # eerste tekstveld = zoekvak van de aandelen-tab
+    if not step("search", lambda: at.text_input[0].input(query).run()):
+        return timings
+    if not at.selectbox:
+        return timings
+    listing = at.selectbox[0]
+    if not step("select", lambda: listing.select_index(min(pick, len(listing.options) - 1)).run()):
+        return timings
+    # eerste knop = 'Check aandeel' (staat vóór watchlist, bulk en de andere tabs)
+    if at.button:
+        step("check", lambda: at.button[0].click().run())
+    return timings
+
+
+# ---------- Niveaus ----------
+def run_level(concurrency: int, sessions: int, hot: float, rng: random.Random, offset: int) -> Dict[str, dict]:
+    """`sessions` gebruikers met `concurrency` tegelijk; percentielen per stap en voor alle reruns samen."""
+    hot_queries = [f["symbol"] for f in bench.FIXTURES]
+    cold_queries = iter(bench.bench_symbols(sessions, offset=offset))
+    queries = [rng.choice(hot_queries) if rng.random() < hot else next(cold_queries) for _ in range(sessions)]
+    per_step: Dict[str, List[float]] = {s: [] for s in STEPS}
+    incomplete = 0
+    lock = threading.Lock()
+
+    def one(query: str) -> None:
+        nonlocal incomplete
+        try:
+            timings = run_session(query)
+        except Exception:
+            timings = {}
+        with lock:
+            for name, secs in timings.items():
+                per_step[name].append(secs)
+            if len(timings) < len(STEPS):
+                incomplete += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qist-load") as pool:
+        list(pool.map(one, queries))
+    wall = time.perf_counter() - t0
+
+    out = {name: bench.summarize(lat, wall) for name, lat in per_step.items() if lat}
+    reruns = [x for lat in per_step.values() for x in lat]
+    if reruns:
+        out["rerun"] = bench.summarize(reruns, wall)
+        out["rerun"]["sessions_per_s"] = sessions / wall if wall > 0 else float("inf")
+        out["rerun"]["incomplete"] = incomplete
+    return out
+
+
+def run_load(levels: List[int], sessions: int = 0, latency: float = 0.05, error_rate: float = 0.0,
+             hot: float = 0.5, seed: int = 1) -> Dict[str, dict]:
+    """Oplopende concurrency tegen verse stubs en een tijdelijke cache-database (zelfde startpunt als bench)."""
+    tmp = tempfile.mkdtemp(prefix="qist-load-")
+    os.environ["QIST_CACHE_DB"] = os.path.join(tmp, "meta.sqlite3")
+    os.environ["QIST_SNAPSHOT_DIR"] = os.path.join(tmp, "snapshots")
+    rng = random.Random(seed)
+    results: Dict[str, dict] = {}
+    with bench.StubYahoo(latency=latency, error_rate=error_rate, seed=seed) as stub:
+        bench.install_stub(stub)
+        with shared_runtime(install_analytics_stub(stub)):
+            for i, level in enumerate(levels):
+                # verschillende synthetische symbolen per niveau: 'koud' blijft koud
+                results[f"c{level}"] = run_level(level, sessions or 2 * level, hot, rng, 20000 + 1000 * i)
+        results["_stub_requests"] = dict(stub.requests)
+    results["_config"] = {
+        "levels": levels, "sessions": sessions, "latency": latency, "error_rate": error_rate, "hot": hot, "seed": seed,
+    }
+    return results
+
+
+def format_table(results: Dict[str, dict]) -> str:
+    lines = [f"{'level':<8}{'step':<8}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'reruns/s':>10}{'sess/s':>8}"]
+    for level, steps in results.items():
+        if level.startswith("_"):
+            continue
+        for name, s in steps.items():
+            sess = f"{s['sessions_per_s']:>8.2f}" if "sessions_per_s" in s else ""
+            lines.append(
+                f"{level:<8}{name:<8}{s['n']:>6}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}"
+                f"{s['throughput']:>10.1f}{sess}"
+            )
+        if "rerun" in steps and steps["rerun"]["incomplete"]:
+            lines.append(f"{'':<8}! {steps['rerun']['incomplete']} sessie(s) niet volledig doorlopen")
+    if "_stub_requests" in results:
+        lines.append("stub-requests: " + ", ".join(f"{k} {v}" for k, v in sorted(results["_stub_requests"].items())))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test van app.py met gelijktijdige AppTest-sessies tegen lokale stubs.")
+    ap.add_argument("--levels", default="1,2,4,8,16", help="komma-gescheiden concurrency-niveaus")
+    ap.add_argument("--sessions", type=int, default=0, help="sessies per niveau (standaard 2 × concurrency)")
+    ap.add_argument("--latency", type=float, default=0.05, help="gemiddelde stub-latency (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="aandeel 503-antwoorden")
+    ap.add_argument("--hot", type=float, default=0.5, help="aandeel sessies dat een populair (fixture-)symbool zoekt")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="resultaat als baseline-JSON wegschrijven")
+    ap.add_argument("--compare", help="vergelijken met deze baseline-JSON")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="toegestane p95-toename (fractie)")
+    ap.add_argument("--metrics", help="per-stap metrics (Prometheus-tekst) naar dit bestand")
+    args = ap.parse_args(argv)
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    results = run_load(levels, args.sessions, args.latency, args.error_rate, args.hot, args.seed)
+    print(format_table(results))
+    if args.metrics:
+        from qist import metrics
+        metrics.dump(args.metrics)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline → {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        # rerun-latency is veel grover dan een functie-aanroep: ondergrens 50 ms
+        problems = bench.compare(results, baseline, args.tolerance, floor_ms=50.0)
+        for p in problems:
+            print("REGRESSIE", p, file=sys.stderr)
+        if problems:
+            return 1
+        print("geen regressies t.o.v.", args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# qist/metastore.py — persistente metadata-cache (SQLite/WAL) met stale-while-revalidate
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from qist import metrics
+
+DEFAULT_DB_PATH = os.path.join(".qist_cache", "meta.sqlite3")
+PRUNE_INTERVAL = 3600.0   # s tussen twee opruimrondes (rijen ouder dan max_age verwijderen)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fields (
+    kind       TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    field      TEXT NOT NULL,
+    value      TEXT,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, key, field)
+) WITHOUT ROWID
+"""
+
+
+def _json_default(obj):
+    # numpy-scalars (np.int64, np.float64, ...) → gewone Python-waarden
+    item = getattr(obj, "item", None)
+    if callable(item):
+        return item()
+    raise TypeError(f"Not JSON serializable: {type(obj).__name__}")
+
+
+class MetaStore:
+    """Schijf-cache voor genormaliseerde dicts (per veld een eigen versheid).
+
+    Gedeeld tussen processen op dezelfde host via SQLite in WAL-modus. Verouderde
+    velden worden direct geserveerd terwijl een achtergrondthread ververst.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_age: float = 7 * 86400, refresh_workers: int = 2):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._inflight: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="qist-meta-refresh")
+        self._pruned_at = float("-inf")
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        conn = self._conn()
+        conn.execute(_SCHEMA)
+        conn.commit()
+
+    # ---------- SQLite ----------
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, kind: str, key: str, field_ttl: Dict[str, float], default_ttl: float) -> Optional[Tuple[dict, bool]]:
+        """(record, stale) of None als er niets (bruikbaars) in de cache staat."""
+        try:
+            rows = self._conn().execute(
+                "SELECT field, value, fetched_at FROM fields WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+        if not rows:
+            return None
+        now = time.time()
+        record, stale, fresh = {}, False, False
+        for field, value, fetched_at in rows:
+            age = now - fetched_at
+            if age > self.max_age:
+                # te oud om nog te tonen: een veld dat Yahoo niet meer levert veroudert zo vanzelf
+                record[field] = None
+                continue
+            fresh = True
+            if age > field_ttl.get(field, default_ttl):
+                stale = True
+            record[field] = json.loads(value) if value is not None else None
+        if not fresh:
+            # alles te oud → behandel als miss
+            return None
+        return record, stale
+
+    def put(self, kind: str, key: str, record: dict) -> None:
+        """Schrijf velden weg; een None overschrijft geen eerder bekende waarde.
+
+        Een behouden waarde houdt haar oude fetched_at: blijft het veld weg, dan veroudert het
+        na max_age (get() toont het dan als None en prune() ruimt de rij op).
+        """
+        now = time.time()
+        rows = [
+            (kind, key, field, json.dumps(value, default=_json_default), now)
+            for field, value in record.items() if value is not None
+        ]
+        empty = [(kind, key, field, now) for field, value in record.items() if value is None]
+        if now - self._pruned_at >= PRUNE_INTERVAL:
+            self.prune()
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO fields (kind, key, field, value, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (kind, key, field) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at",
+                    rows,
+                )
+                conn.executemany(
+                    "INSERT INTO fields (kind, key, field, value, fetched_at) VALUES (?, ?, ?, NULL, ?) "
+                    "ON CONFLICT (kind, key, field) DO NOTHING",
+                    empty,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def prune(self) -> int:
+        """Verwijder rijen ouder dan max_age (die get() toch niet meer toont); geeft het aantal terug."""
+        self._pruned_at = time.time()
+        try:
+            cur = self._conn().execute("DELETE FROM fields WHERE fetched_at < ?", (self._pruned_at - self.max_age,))
+        except sqlite3.Error:
+            return 0
+        metrics.REGISTRY.inc("qist_metastore_pruned_total", cur.rowcount, help="Opgeruimde cache-rijen (ouder dan max_age).")
+        return cur.rowcount
+
+    # ---------- stale-while-revalidate ----------
+    def _refresh(self, kind: str, key: str, fetch: Callable[[str], dict]) -> None:
+        try:
+            record = fetch(key)
+            if record:
+                self.put(kind, key, record)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._inflight.discard((kind, key))
+
+    def refresh_in_background(self, kind: str, key: str, fetch: Callable[[str], dict]) -> bool:
+        """Plan één verversing per (kind, key); dubbele verzoeken worden genegeerd."""
+        with self._lock:
+            if (kind, key) in self._inflight:
+                return False
+            self._inflight.add((kind, key))
+        try:
+            self._pool.submit(self._refresh, kind, key, fetch)
+        except RuntimeError:
+            with self._lock:
+                self._inflight.discard((kind, key))
+            return False
+        return True
+
+    def get_or_fetch(
+        self,
+        kind: str,
+        key: str,
+        fetch: Callable[[str], dict],
+        field_ttl: Dict[str, float],
+        default_ttl: float,
+    ) -> dict:
+        hit = self.get(kind, key, field_ttl, default_ttl)
+        if hit is not None:
+            record, stale = hit
+            metrics.cache_event(kind, "stale" if stale else "hit")
+            if stale:
+                self.refresh_in_background(kind, key, fetch)
+            return record
+        metrics.cache_event(kind, "miss")
+        record = fetch(key)
+        if record:
+            self.put(kind, key, record)
+        return record
+
+
+_default: Optional[MetaStore] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> MetaStore:
+    """Proces-brede store (pad via QIST_CACHE_DB); veilig aan te roepen vanuit elke thread."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MetaStore(os.environ.get("QIST_CACHE_DB", DEFAULT_DB_PATH))
+        return _default
@@ -0,0 +1,224 @@
+# qist/metrics.py — lichte spans per stap + cache-tellers, geaggregeerd in-process, export in Prometheus-tekstformaat
+#
+# Gebruik:
+#   with metrics.span("meta.info"): ...          → histogram qist_stage_seconds{stage="meta.info"}
+#   metrics.cache_event("meta", "hit")           → counter qist_cache_requests_total{cache="meta",result="hit"}
+# Export: QIST_METRICS_PORT=9108 (GET /metrics) en/of QIST_METRICS_FILE=pad (periodieke dump).
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+# Bucketgrenzen in seconden: van sub-ms cache-hits tot de 12 s metadata-deadline.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+DUMP_INTERVAL = 15.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulatieve buckets + som + aantal, zoals Prometheus ze verwacht."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # laatste = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._help: Dict[str, str] = {}
+
+    def observe(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = Histogram()
+                self._help.setdefault(name, help)
+            h.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, help: str = "", **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+            self._help.setdefault(name, help)
+
+    def add_gauge(self, name: str, delta: float, help: str = "", **labels: str) -> None:
+        """Gauge ophogen/verlagen (bijv. aantal wachtenden op dit moment)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0.0) + delta
+            self._help.setdefault(name, help)
+
+    def set_gauge(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+            self._help.setdefault(name, help)
+
+    def counter(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            hist = {k: (list(h.counts), h.sum, h.count, h.buckets) for k, h in self._hist.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            helps = dict(self._help)
+        lines = []
+        for kind, values in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({k[0] for k in values}):
+                lines += [f"# HELP {name} {helps.get(name, '')}", f"# TYPE {name} {kind}"]
+                for (n, labels), v in sorted(values.items()):
+                    if n == name:
+                        lines.append(f"{name}{_fmt_labels(labels)} {v:g}")
+        for name in sorted({k[0] for k in hist}):
+            lines += [f"# HELP {name} {helps.get(name, '')}", f"# TYPE {name} histogram"]
+            for (n, labels), (counts, total, count, buckets) in sorted(hist.items()):
+                if n != name:
+                    continue
+                cum = 0
+                for bound, c in zip(buckets + (float("inf"),), counts):
+                    cum += c
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_fmt_labels(labels + (('le', le),))} {cum}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+
+REGISTRY = Registry()
+
+
+# ---------- Instrumentatie ----------
+@contextmanager
+def span(stage: str, **labels: str):
+    """Duur van een stap in qist_stage_seconds; ook bij een exception (met outcome="error")."""
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        REGISTRY.observe(
+            "qist_stage_seconds", time.perf_counter() - t0,
+            help="Duur per stap (seconden).", stage=stage, outcome=outcome, **labels,
+        )
+
+
+def timed(stage: str, fn: Callable) -> Callable:
+    """fn verpakt in een span; handig voor pool.submit(timed("meta.info", _get_info), tk)."""
+    def wrapper(*args, **kwargs):
+        with span(stage):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def cache_event(cache: str, result: str) -> None:
+    """result: hit | stale | miss."""
+    REGISTRY.inc("qist_cache_requests_total", help="Cache-opvragingen per cache en uitkomst.", cache=cache, result=result)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ---------- Export ----------
+def dump(path: str) -> None:
+    """Atomisch wegschrijven (node_exporter textfile-collector leest geen halve bestanden)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="qist-metrics", daemon=True).start()
+    return server
+
+
+def _dump_loop(path: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            dump(path)
+        except OSError:
+            pass
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_from_env() -> Optional[str]:
+    """Start export volgens QIST_METRICS_PORT / QIST_METRICS_FILE (één keer per proces)."""
+    global _started
+    with _start_lock:
+        if _started:
+            return None
+        _started = True
+    started = []
+    port = os.environ.get("QIST_METRICS_PORT")
+    if port:
+        try:
+            serve(int(port), os.environ.get("QIST_METRICS_HOST", "127.0.0.1"))
+            started.append(f"http :{port}/metrics")
+        except (OSError, ValueError):
+            pass
+    path = os.environ.get("QIST_METRICS_FILE")
+    if path:
+        interval = float(os.environ.get("QIST_METRICS_INTERVAL", DUMP_INTERVAL))
+        threading.Thread(target=_dump_loop, args=(path, interval), name="qist-metrics-dump", daemon=True).start()
+        started.append(path)
+    return ", ".join(started) or None
@@ -0,0 +1,223 @@
+# qist/net.py — gedeelde keep-alive HTTP-laag: connection pool per host, retry-budget, circuit breaker
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from qist import metrics
+
+POOL_PER_HOST = 8             # max. gelijktijdige connecties per host
+MAX_RETRIES = 2               # per request, alleen zolang het budget het toelaat
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE, BACKOFF_CAP = 0.2, 2.0
+BUDGET_RATIO, BUDGET_MAX = 0.1, 10.0   # elke request spaart 0,1 retry; max. 10 op voorraad
+BREAKER_THRESHOLD = 5         # opeenvolgende fouten voordat de host dicht gaat
+BREAKER_COOLDOWN = 30.0       # seconden dicht; daarna één proefrequest (half-open)
+# alleen fouten van de verbinding zelf herhalen; bv. een ongeldige URL wordt bij een retry niet beter
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Host staat tijdelijk dicht na herhaalde fouten."""
+
+
+class PoolTimeoutError(requests.ConnectionError):
+    """Geen vrije connectie voor deze host binnen de timeout."""
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.failures < BREAKER_THRESHOLD:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.failures < BREAKER_THRESHOLD:
+                return True
+            if time.monotonic() < self.open_until or self.trial:
+                return False
+            self.trial = True  # half-open: precies één request door
+            return True
+
+    def release(self) -> None:
+        """Request ging niet naar de host (bv. geen vrije connectie): trial-plek vrijgeven."""
+        with self._lock:
+            self.trial = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self.trial = False
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= BREAKER_THRESHOLD:
+                self.open_until = time.monotonic() + BREAKER_COOLDOWN
+
+
+class RetryBudget:
+    """Token-bucket: retries mogen hooguit ~10% van het verkeer extra kosten."""
+
+    def __init__(self, ratio: float = BUDGET_RATIO, cap: float = BUDGET_MAX):
+        self.ratio, self.cap = ratio, cap
+        self.tokens = cap
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+class HttpClient:
+    """Eén proces-brede requests.Session met begrensde pools, retries en breakers per host."""
+
+    def __init__(self, pool_per_host: int = POOL_PER_HOST, max_retries: int = MAX_RETRIES):
+        self.pool_per_host = pool_per_host
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_per_host, max_retries=0)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.budget = RetryBudget()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "retries": 0, "budget_exhausted": 0, "circuit_open": 0}
+
+    def _host(self, host: str):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker()
+                self._slots[host] = threading.BoundedSemaphore(self.pool_per_host)
+            return self._breakers[host], self._slots[host]
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+        metrics.REGISTRY.inc("qist_http_events_total", help="HTTP-laag: requests, retries, leeg budget, open circuit.", event=key)
+
+    def _publish_pool(self, host: str) -> None:
+        """Aangemaakte vs. hergebruikte connecties voor deze host als gauges (zelfde telling als stats())."""
+        pools = self._adapter.poolmanager.pools
+        made = used = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None and pool.host == host:
+                made += pool.num_connections
+                used += pool.num_requests
+        metrics.REGISTRY.set_gauge("qist_http_connections", made, help="Aangemaakte connecties per host.", host=host)
+        metrics.REGISTRY.set_gauge("qist_http_connections_reused", max(0, used - made),
+                                   help="Requests over een hergebruikte keep-alive connectie per host.", host=host)
+
+    @staticmethod
+    def _backoff(attempt: int, resp: Optional[requests.Response]) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # "full jitter": willekeurig tussen 0 en de exponentiële grens
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self, method: str, url: str, timeout: float = 10.0, **kwargs) -> requests.Response:
+        host = urlsplit(url).hostname or ""
+        breaker, slots = self._host(host)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self._count("circuit_open")
+                raise CircuitOpenError(f"circuit open for {host}")
+            self._count("requests")
+            if not slots.acquire(timeout=timeout):
+                breaker.release()
+                raise PoolTimeoutError(f"no free connection for {host}")
+            resp = err = None
+            try:
+                resp = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                err = e
+            except BaseException:
+                # geen netwerkfout (bv. ongeldige argumenten): telt niet mee, maar de trial-plek moet vrij
+                breaker.release()
+                raise
+            finally:
+                slots.release()
+                self._publish_pool(host)
+
+            failed = err is not None or resp.status_code in RETRY_STATUSES
+            breaker.record(not failed)
+            # leestimeouts niet herhalen: dat verdubbelt de wachttijd; de caller heeft fallbacks
+            retryable = failed and (err is None or isinstance(err, RETRY_ERRORS)) and not isinstance(err, requests.ReadTimeout)
+            if not retryable or attempt >= self.max_retries:
+                break
+            if not self.budget.withdraw():
+                self._count("budget_exhausted")
+                break
+            self._count("retries")
+            time.sleep(self._backoff(attempt, resp))
+            attempt += 1
+        if err is not None:
+            raise err
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        """Tellers plus per host: aangemaakte vs. hergebruikte connecties en de breaker-status."""
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            made, used = pool.num_connections, pool.num_requests
+            hosts[pool.host] = {
+                "connections": made,
+                "requests": used,
+                "reused": max(0, used - made),
+            }
+        with self._lock:
+            breakers = dict(self._breakers)
+            out = dict(self.counters)
+        for host, breaker in breakers.items():
+            hosts.setdefault(host, {})["circuit"] = breaker.state
+        out["retry_tokens"] = round(self.budget.tokens, 2)
+        out["hosts"] = hosts
+        return out
+
+
+_default: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpClient()
+        return _default
@@ -0,0 +1,271 @@
+# qist/rules.py — halal-regels (scalair per dict + gevectoriseerd per DataFrame)
+import hashlib
+import json
+import math
+import re
+from functools import lru_cache
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Labels voor de basis van de schuldratio; app.py geeft de vertaalde variant mee.
+BASIS_LABELS = {"mc": "vs market cap", "assets": "vs total assets", "unknown": "unknown"}
+
+def _num(x) -> Optional[float]:
+    # None/NaN/0 tellen als "geen waarde" (net als `if mc:` voor gewone getallen)
+    if x is None:
+        return None
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) else x
+
+def compute_debt_ratio(meta: dict, labels: Dict[str, str] = BASIS_LABELS):
+    debt = _num(meta.get("totalDebt")); mc = _num(meta.get("marketCap")); assets = _num(meta.get("totalAssets"))
+    if debt is None:
+        return None, labels["unknown"]
+    if mc:
+        return debt/mc, labels["mc"]
+    if assets:
+        return debt/assets, labels["assets"]
+    return None, labels["unknown"]
+
+# ---------- Regelset (data) ----------
+# Alle drempels en lijsten op één plek; RULES_VERSION verandert mee, zodat opgeslagen
+# oordelen (snapshot) herkend en opnieuw berekend worden als de regels wijzigen.
+RULES = {
+    "excluded_sectors": [
+        "Alcohol", "Gambling", "Pork", "Conventional Banking", "Insurance",
+        "Adult Entertainment", "Weapons", "Tobacco",
+    ],
+    # trefwoorden in naam/sector/industry; stems matchen ook midden in een woord,
+    # words alleen als heel woord — let op: 'lending' (niet 'blending')
+    "keyword_stems": [
+        "alcohol", "brew", "beer", "wine", "casino", "gambl", "pork", "adult", "porn",
+        "weapon", "tobacco", "cig", "cannabis", "marijuana",
+    ],
+    "keyword_words": [
+        "bank", "banks", "banking", "insur", "insurance", "insurer", "insurers", "reinsurance",
+        "mortgage", "credit", "lending", "loan", "loans", "reit", "capital markets", "consumer finance",
+    ],
+    # uitzondering: islamic + bank/insurance → niet automatisch haram
+    "exempt_marker": "islamic",
+    "exempt_with": ["bank", "insur"],
+    "debt_ratio": {"halal_max": 30, "doubt_max": 33},
+    "etf": {"min_halal_pct": 95, "max_purification_pct": 5},
+    # eerste regel waarvan alle voorwaarden kloppen wint
+    "crypto": [
+        {"when": {"violates_use": True}, "status": "not_halal",
+         "reason": "Use-case includes prohibited activities (e.g., gambling/interest/adult)."},
+        {"when": {"fixed_yield": True}, "status": "not_halal",
+         "reason": "Fixed/guaranteed yield resembles riba (interest)."},
+        {"when": {"staking_service": True, "interest_like": False}, "status": "halal",
+         "reason": "Staking rewards based on service/fees (not interest)."},
+    ],
+    "crypto_default": {"status": "unclassified", "reason": "Insufficient structure/info → needs scholar review."},
+}
+RULES_VERSION = hashlib.sha1(json.dumps(RULES, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:12]
+
+# ---------- Gecompileerde tabellen ----------
+HARAM_SECTORS = frozenset(RULES["excluded_sectors"])
+_HARAM_PAT = re.compile(
+    "(" + "|".join(
+        [re.escape(s) for s in RULES["keyword_stems"]]
+        + [rf"\b{re.escape(w)}\b" for w in RULES["keyword_words"]]
+    ) + ")",
+    re.IGNORECASE
+)
+# Zelfde patroon voor tekst die al lowercase is: zonder IGNORECASE en met een snelle
+# eerste-letter-check, zodat posities die nergens mee kunnen beginnen direct afvallen.
+_HARAM_PAT_LOWER = re.compile(
+    "(?=[" + "".join(sorted({k[0] for k in RULES["keyword_stems"] + RULES["keyword_words"]})) + "])"
+    + _HARAM_PAT.pattern
+)
+# eerste woorden van trefwoorden met een spatie: alleen daarmee kan een treffer over de grens naam → sector lopen
+_MULTIWORD_HEADS = frozenset(w.split(" ", 1)[0] for w in RULES["keyword_words"] if " " in w)
+
+DEBT_HALAL_MAX = float(RULES["debt_ratio"]["halal_max"])
+DEBT_DOUBT_MAX = float(RULES["debt_ratio"]["doubt_max"])
+_BAND_HALAL = f"% (≤ {DEBT_HALAL_MAX:g}%, "
+_BAND_DOUBT = f"% ({DEBT_HALAL_MAX:g}–{DEBT_DOUBT_MAX:g}%, "
+_BAND_OVER = f"% (> {DEBT_DOUBT_MAX:g}%, "
+
+def _crypto_table() -> Dict[Tuple[bool, bool, bool, bool], Tuple[str, List[str]]]:
+    keys = ("violates_use", "fixed_yield", "staking_service", "interest_like")
+    table = {}
+    for combo in product((False, True), repeat=len(keys)):
+        flags = dict(zip(keys, combo))
+        rule = next(
+            (r for r in RULES["crypto"] if all(flags[k] == v for k, v in r["when"].items())),
+            RULES["crypto_default"],
+        )
+        table[combo] = (rule["status"], [rule["reason"]])
+    return table
+
+_CRYPTO_TABLE = _crypto_table()
+
+@lru_cache(maxsize=4096)
+def _taxonomy_facts(sector: str, industry: str) -> Tuple[Optional[str], bool, bool]:
+    """Per (sector, industry): (trefwoord, bevat marker, bevat bank/insur) — een kleine, eindige tabel."""
+    text = f"{sector} {industry}".lower()
+    m = _HARAM_PAT_LOWER.search(text)
+    return (m.group(0) if m else None), RULES["exempt_marker"] in text, any(w in text for w in RULES["exempt_with"])
+
+@lru_cache(maxsize=65536)
+def _name_facts(name: str) -> Tuple[Optional[str], bool, bool, Optional[str]]:
+    """Per naam: als _taxonomy_facts, plus het laatste woord als een trefwoord daarmee over de grens kan lopen."""
+    text = name.lower()
+    m = _HARAM_PAT_LOWER.search(text)
+    tail = text.rsplit(" ", 1)[-1]
+    return (
+        (m.group(0) if m else None),
+        RULES["exempt_marker"] in text,
+        any(w in text for w in RULES["exempt_with"]),
+        tail if tail in _MULTIWORD_HEADS else None,
+    )
+
+@lru_cache(maxsize=4096)
+def _boundary_match(tail: str, sector: str, industry: str) -> Optional[str]:
+    m = _HARAM_PAT_LOWER.search(f"{tail} {sector} {industry}".lower())
+    return m.group(0) if m else None
+
+def _keyword_hit(name: str, sector: str, industry: str) -> Optional[str]:
+    """Eerste trefwoord in "naam sector industry" (zoals één regex over de samengevoegde tekst), of None."""
+    n_match, n_marker, n_with, tail = _name_facts(name)
+    t_match, t_marker, t_with = _taxonomy_facts(sector, industry)
+    if (n_marker or t_marker) and (n_with or t_with):
+        return None
+    if n_match:
+        return n_match
+    if tail is not None:
+        return _boundary_match(tail, sector, industry)
+    return t_match
+
+# ---------- Halal regels ----------
+def is_haram_activity(name: Optional[str], sector: Optional[str], industry: Optional[str]) -> Optional[str]:
+    if sector in HARAM_SECTORS:
+        return f"Excluded sector: {sector}"
+    m = _keyword_hit(str(name or ""), str(sector or ""), str(industry or ""))
+    if m:
+        return f"Conventional finance/haram activity detected ({m})"
+    return None
+
+def classify_equity(meta: dict, labels: Dict[str, str] = BASIS_LABELS) -> Tuple[str, List[str]]:
+    bad = is_haram_activity(meta.get("name"), meta.get("sector"), meta.get("industry"))
+    if bad:
+        return "not_halal", [bad]
+    ratio, basis = compute_debt_ratio(meta, labels)
+    if ratio is None:
+        return "unclassified", ["Insufficient data to compute debt ratio."]
+    pct = ratio * 100.0
+    if pct == 0:
+        return "halal_full", ["No interest-bearing debt."]
+    if pct <= DEBT_HALAL_MAX:
+        return "halal", [f"Debt ratio {pct:.2f}{_BAND_HALAL}{basis})."]
+    if pct <= DEBT_DOUBT_MAX:
+        return "doubt", [f"Debt ratio {pct:.2f}{_BAND_DOUBT}{basis})."]
+    return "not_halal", [f"Debt ratio {pct:.2f}{_BAND_OVER}{basis})."]
+
+def classify_etf(is_certified: bool, halal_pct: int, pur_pct: int) -> Tuple[str, List[str]]:
+    etf = RULES["etf"]
+    if is_certified:
+        return "halal", ["Externally Shariah-certified."]
+    if halal_pct >= etf["min_halal_pct"] and pur_pct < etf["max_purification_pct"]:
+        return "halal", [f"Holdings ≈ {halal_pct}% halal. Purification {pur_pct}%."]
+    if halal_pct == 0 and pur_pct == 0:
+        return "unclassified", ["Insufficient info about holdings; cannot assess."]
+    return "doubt", [f"Holdings {halal_pct}%, purification {pur_pct}% (needs review)."]
+
+def classify_crypto(violates_use: bool, fixed_yield: bool, staking_service: bool, interest_like: bool) -> Tuple[str, List[str]]:
+    status, reasons = _CRYPTO_TABLE[(bool(violates_use), bool(fixed_yield), bool(staking_service), bool(interest_like))]
+    return status, list(reasons)
+
+# ---------- Gevectoriseerd (bulk/batch) ----------
+def _factorize_text(df: pd.DataFrame, col: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(codes, unieke teksten); None/NaN/leeg → "" (zelfde als str(x or ""))."""
+    if col not in df.columns:
+        return np.zeros(len(df), dtype=np.intp), np.array([""], dtype=object)
+    codes, uniques = pd.factorize(df[col])
+    texts = np.array([str(u or "") for u in uniques] + [""], dtype=object)  # laatste = ontbrekend
+    return np.where(codes < 0, len(uniques), codes), texts
+
+def _num_col(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+def _fmt_pct(pct: np.ndarray) -> np.ndarray:
+    return np.char.mod("%.2f", pct).astype(object)
+
+# status en schuldband per tak van classify_equity_frame (laatste = boven de twijfelgrens)
+_FRAME_STATUS = np.array(["not_halal", "not_halal", "unclassified", "halal_full", "halal", "doubt", "not_halal"], dtype=object)
+_FRAME_BAND = np.array(["", "", "", "", _BAND_HALAL, _BAND_DOUBT, _BAND_OVER], dtype=object)
+
+def classify_equity_frame(df: pd.DataFrame, labels: Dict[str, str] = BASIS_LABELS) -> pd.DataFrame:
+    """Gevectoriseerde classify_equity over een DataFrame met metadata-kolommen.
+
+    Verwacht de kolommen van fetch_symbol_metadata (name, sector, industry, marketCap,
+    totalDebt, totalAssets; ontbrekende kolommen tellen als leeg). Geeft een DataFrame met
+    debt_ratio, basis, status en reason terug, rij voor rij gelijk aan de scalaire functies.
+    """
+    # Tekstregels alleen op unieke (naam, sector, industrie)-combinaties, en ook daar via de
+    # gememoiseerde tabellen: sector/industrie komen uit een kleine taxonomie.
+    cn, names = _factorize_text(df, "name")
+    cs, sectors = _factorize_text(df, "sector")
+    ci, industries = _factorize_text(df, "industry")
+    codes, combos = pd.factorize((cn.astype(np.int64) * len(sectors) + cs) * len(industries) + ci)
+    first = np.empty(len(combos), dtype=np.intp)
+    first[codes[::-1]] = np.arange(len(codes))[::-1]
+
+    # 1) uitgesloten activiteiten
+    sector = sectors[cs]
+    excluded = np.array([x in HARAM_SECTORS for x in sectors], dtype=bool)[cs]
+    match = np.array(
+        [_keyword_hit(*parts) for parts in zip(names[cn[first]], sectors[cs[first]], industries[ci[first]])],
+        dtype=object,
+    )[codes]
+    keyword = pd.notna(match) & ~excluded
+
+    # 2) schuldratio: market cap als basis, anders totale activa
+    debt, mc, assets = _num_col(df, "totalDebt"), _num_col(df, "marketCap"), _num_col(df, "totalAssets")
+    has_debt = ~np.isnan(debt)
+    use_mc = has_debt & ~np.isnan(mc) & (mc != 0)
+    use_assets = has_debt & ~use_mc & ~np.isnan(assets) & (assets != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(use_mc, debt / mc, np.where(use_assets, debt / assets, np.nan))
+    basis = np.select([use_mc, use_assets], [labels["mc"], labels["assets"]], labels["unknown"]).astype(object)
+    pct = ratio * 100.0
+    has_ratio = ~np.isnan(ratio)
+
+    # 3) status + reden, in dezelfde volgorde als classify_equity
+    conds = [
+        excluded,
+        keyword,
+        ~has_ratio,
+        pct == 0,
+        pct <= DEBT_HALAL_MAX,
+        pct <= DEBT_DOUBT_MAX,
+    ]
+    branch = np.select(conds, range(len(conds)), len(conds))
+    status = _FRAME_STATUS[branch]
+    reason = np.empty(len(df), dtype=object)
+    m = branch == 0
+    reason[m] = "Excluded sector: " + sector[m]
+    m = branch == 1
+    reason[m] = "Conventional finance/haram activity detected (" + match[m] + ")"
+    reason[branch == 2] = "Insufficient data to compute debt ratio."
+    reason[branch == 3] = "No interest-bearing debt."
+    m = branch >= 4
+    reason[m] = "Debt ratio " + _fmt_pct(pct[m]) + _FRAME_BAND[branch[m]] + basis[m] + ")."
+    return pd.DataFrame(
+        {
+            "debt_ratio": ratio,
+            "basis": basis,
+            "status": status,
+            "reason": reason,
+        },
+        index=df.index,
+    )
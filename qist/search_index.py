@@ -0,0 +1,214 @@
+# qist/search_index.py — lokale zoekindex (ticker-prefix, naam-trigrammen, ISIN) vóór yahoo_search
+import bisect
+import csv
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+
+from qist import metrics, yahoo
+from qist.cache import MISSING, LRUCache
+
+DEFAULT_LISTINGS_PATH = os.path.join("data", "listings.csv")
+
+ISIN_RE = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+MIN_NAME_SCORE = 0.7     # aandeel van de query-trigrammen dat in de naam moet voorkomen
+MAX_POSTING = 5000       # extreem gangbare trigrammen ("inc", " co") niet doorlopen
+ISIN_TTL = 24 * 3600     # ISIN → noteringen verandert zelden
+
+
+def _trigrams(text: str) -> set:
+    grams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """In-memory index over een snapshot van noteringen, aan te vullen met netwerkresultaten.
+
+    Rijen hebben hetzelfde formaat als yahoo_search (symbol, shortname, exchange, score).
+    `authoritative`: geladen uit een echte snapshot, dus een (gedeeltelijke) treffer is het
+    hele antwoord; een index die alleen uit eerdere zoekresultaten bestaat is dat niet.
+    """
+
+    def __init__(self, listings: Iterable[dict] = (), authoritative: bool = False):
+        self.authoritative = authoritative
+        self._rows: List[dict] = []
+        self._by_symbol: Dict[str, int] = {}
+        self._symbols: List[str] = []            # gesorteerd, voor prefix-zoeken
+        self._trigrams: Dict[str, List[int]] = {}
+        self._isin: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.add_many(listings)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ---------- opbouwen ----------
+    def _add(self, item: dict) -> Optional[int]:
+        symbol = str(item.get("symbol") or "").strip().upper()
+        if not symbol:
+            return None
+        idx = self._by_symbol.get(symbol)
+        if idx is not None:
+            return idx
+        name = item.get("shortname") or item.get("name") or symbol
+        idx = len(self._rows)
+        self._rows.append(yahoo.Listing(symbol=symbol, shortname=name, exchange=item.get("exchange") or ""))
+        self._by_symbol[symbol] = idx
+        for g in _trigrams(name):
+            self._trigrams.setdefault(g, []).append(idx)
+        isin = str(item.get("isin") or "").strip().upper()
+        if ISIN_RE.match(isin):
+            self._isin.setdefault(isin, []).append(idx)
+        return idx
+
+    def add_many(self, listings: Iterable[dict], isin: Optional[str] = None) -> None:
+        """Voeg noteringen toe; met `isin` worden ze ook als treffer voor die ISIN vastgelegd."""
+        with self._lock:
+            before = len(self._rows)
+            ids = [i for i in (self._add(item) for item in listings) if i is not None]
+            added = [row["symbol"] for row in self._rows[before:]]
+            if len(added) > 32:
+                self._symbols = sorted(self._by_symbol)
+            else:
+                for symbol in added:
+                    bisect.insort(self._symbols, symbol)
+            if isin and ids:
+                known = self._isin.setdefault(isin.upper(), [])
+                known.extend(i for i in ids if i not in known)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_LISTINGS_PATH) -> "SearchIndex":
+        """Lees een CSV-snapshot (kolommen symbol, name/shortname, exchange, isin); ontbreekt die → leeg."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, newline="", encoding="utf-8") as f:
+            index = cls(csv.DictReader(f))
+        index.authoritative = len(index) > 0
+        return index
+
+    def save(self, path: str) -> None:
+        isin_of = {i: isin for isin, ids in self._isin.items() for i in ids}
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["symbol", "name", "exchange", "isin"])
+            for i, row in enumerate(self._rows):
+                w.writerow([row["symbol"], row["shortname"], row["exchange"], isin_of.get(i, "")])
+
+    # ---------- zoeken ----------
+    def exact(self, query: str, limit: int = 15) -> List[dict]:
+        """Alleen exacte treffers: de ISIN, of de ticker zelf."""
+        qu = (query or "").strip().upper()
+        if ISIN_RE.match(qu):
+            ids = self._isin.get(qu, [])
+        else:
+            ids = [self._by_symbol[qu]] if qu in self._by_symbol else []
+        return [dict(self._rows[i], score=2.0) for i in ids][:limit]
+
+    def search(self, query: str, limit: int = 15) -> List[dict]:
+        q = (query or "").strip()
+        if len(q) < 2:
+            return []
+        qu = q.upper()
+
+        # ISIN: alleen exacte treffer, nooit fuzzy
+        if ISIN_RE.match(qu):
+            return [dict(self._rows[i], score=1.0) for i in self._isin.get(qu, [])][:limit]
+
+        scores: Dict[int, float] = {}
+        # 1) ticker-prefix (exacte ticker bovenaan, kortere tickers eerst)
+        pos = bisect.bisect_left(self._symbols, qu)
+        while pos < len(self._symbols) and self._symbols[pos].startswith(qu) and len(scores) < limit:
+            sym = self._symbols[pos]
+            scores[self._by_symbol[sym]] = 2.0 if sym == qu else 1.5 - 0.01 * (len(sym) - len(qu))
+            pos += 1
+
+        # 2) naam-trigrammen
+        grams = _trigrams(q)
+        # te gangbare trigrammen zeggen weinig en kosten veel; alleen gebruiken als er niets anders is
+        postings = [p for p in (self._trigrams.get(g, ()) for g in grams) if len(p) <= MAX_POSTING]
+        if not postings:
+            postings = [self._trigrams.get(g, ()) for g in grams]
+        if grams:
+            counts: Counter = Counter()
+            for posting in postings:
+                counts.update(posting)
+            for i, c in counts.items():
+                score = c / len(postings)
+                if score >= MIN_NAME_SCORE and score > scores.get(i, 0.0):
+                    scores[i] = score
+
+        best = sorted(scores.items(), key=lambda kv: (-kv[1], len(self._rows[kv[0]]["symbol"])))[:limit]
+        return [dict(self._rows[i], score=s) for i, s in best]
+
+
+_default: Optional[SearchIndex] = None
+_default_lock = threading.Lock()
+# ISIN → noteringen uit het netwerk; gewone zoekopdrachten cachet yahoo_search zelf (per query)
+_isin_hits = LRUCache("mem_isin", max_entries=5000, max_bytes=2 << 20, ttl=ISIN_TTL)
+
+
+def default_index() -> SearchIndex:
+    """Proces-brede index (snapshot via QIST_LISTINGS, standaard data/listings.csv)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = SearchIndex.load(os.environ.get("QIST_LISTINGS", DEFAULT_LISTINGS_PATH))
+        return _default
+
+
+def search(query: str, fallback: Optional[Callable[[str], List[dict]]] = None, limit: int = 15) -> List[dict]:
+    """Lokaal zoeken, anders het netwerk.
+
+    Met een echte snapshot is elke lokale treffer het antwoord; zonder snapshot alleen een exacte
+    ticker- of ISIN-treffer. Netwerkresultaten gaan niet de index in (dan zou "BA" na één
+    zoekactie alleen nog BA opleveren); alleen ISIN-zoekacties worden apart onthouden.
+    """
+    qu = (query or "").strip().upper()
+    isin = qu if ISIN_RE.match(qu) else None
+    index = default_index()
+    hits = index.search(query, limit) if index.authoritative else index.exact(query, limit)
+    if not hits and isin:
+        known = _isin_hits.get(isin)
+        hits = [] if known is MISSING else [dict(r) for r in known][:limit]
+    metrics.cache_event("search_index", "hit" if hits else "miss")
+    if hits:
+        return hits
+    # standaard minstens 15 opvragen: dan deelt een kleinere limit de cache-sleutel met de app
+    results = fallback(query) if fallback else yahoo.yahoo_search(query, max(limit, 15))
+    if results and isin:
+        _isin_hits.put(isin, tuple(yahoo.Listing.from_mapping(r) for r in results))
+    return results[:limit]
+
+
+def build_snapshot(seeds: Iterable[str], path: str) -> int:
+    """Bouw een snapshot door de zoek-API te bevragen met seeds (tickers, namen of ISIN's)."""
+    index = SearchIndex.load(path)
+    for seed in seeds:
+        seed = seed.strip()
+        if not seed:
+            continue
+        results = yahoo.yahoo_search(seed, quotes_count=25)
+        index.add_many(results, isin=seed.upper() if ISIN_RE.match(seed.upper()) else None)
+    index.save(path)
+    return len(index)
+
+
+if __name__ == "__main__":
+    # python -m qist.search_index seeds.txt [data/listings.csv]
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m qist.search_index SEEDS_FILE [OUT_CSV]")
+    out = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_LISTINGS_PATH
+    with open(sys.argv[1], encoding="utf-8") as f:
+        n = build_snapshot(f, out)
+    print(f"{n} listings → {out}")
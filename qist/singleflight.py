@@ -0,0 +1,73 @@
+# qist/singleflight.py — gelijktijdige aanroepen voor dezelfde sleutel delen één lopende fetch
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from qist import metrics
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per sleutel hooguit één fetch tegelijk; wie erbij komt wacht op hetzelfde resultaat (of dezelfde fout).
+
+    Er wordt niets bewaard na afloop: dit is geen cache, alleen ontdubbeling van wat nu onderweg is.
+    Metrics: qist_singleflight_calls_total{group, role=leader|waiter} en de gauge
+    qist_singleflight_waiting{group} (aantal callers dat op dit moment meeleest).
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.leaders = 0
+        self.waiters = 0
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.waiters += 1
+        metrics.REGISTRY.inc(
+            "qist_singleflight_calls_total", help="Aanroepen per single-flight-groep (leader = echte fetch).",
+            group=self.group, role="leader" if leader else "waiter",
+        )
+        if not leader:
+            metrics.REGISTRY.add_gauge("qist_singleflight_waiting", 1, help="Callers die nu op een lopende fetch wachten.", group=self.group)
+            try:
+                call.done.wait()
+            finally:
+                metrics.REGISTRY.add_gauge("qist_singleflight_waiting", -1, group=self.group)
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def wrap(self, fn: Callable[[Hashable], Any]) -> Callable[[Hashable], Any]:
+        """fn(key) met single-flight op key; handig als fetch-functie voor MetaStore.get_or_fetch."""
+        return lambda key: self.do(key, fn, key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"inflight": len(self._calls), "leaders": self.leaders, "waiters": self.waiters}
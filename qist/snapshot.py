@@ -0,0 +1,203 @@
+# qist/snapshot.py — offline universe-screening → geversioneerde Arrow-snapshot die de app direct leest
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from qist import metrics, rules, yahoo
+from qist.metastore import default_store
+
+DEFAULT_SNAPSHOT_DIR = os.path.join("data", "snapshots")
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MAX_AGE = 24 * 3600    # rijen die ouder zijn gaan alsnog live
+RELOAD_CHECK = 60.0             # zo vaak kijken of er een nieuwere snapshot is
+
+META_COLUMNS = [
+    "symbol", "name", "exchange", "currency", "country", "sector", "industry",
+    "marketCap", "totalDebt", "totalAssets", "is_valid",
+]
+
+
+# ---------- schrijven (batch-job) ----------
+def _fetch_live(symbol: str) -> dict:
+    """Verse metadata (niet stale-while-revalidate uit de store): de rij krijgt screened_at = nu."""
+    meta = yahoo.fetch_symbol_metadata_live(symbol)
+    if meta:
+        default_store().put("meta", symbol, meta)
+    return meta
+
+
+def screen_universe(symbols: Iterable[str], workers: int = 8, progress=None) -> pd.DataFrame:
+    """Metadata + oordeel voor een heel universum; één rij per symbool."""
+    symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+    rows: List[dict] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qist-universe") as pool:
+        futures = {pool.submit(_fetch_live, sym): sym for sym in symbols}
+        for i, fut in enumerate(as_completed(futures), 1):
+            sym = futures[fut]
+            try:
+                meta = fut.result() or {}
+            except Exception:
+                meta = {}
+            row = {col: meta.get(col) for col in META_COLUMNS}
+            row["symbol"] = sym
+            row["is_valid"] = bool(meta.get("is_valid"))
+            row["screened_at"] = time.time()
+            rows.append(row)
+            if progress:
+                progress(i, len(symbols))
+    df = pd.DataFrame(rows, columns=META_COLUMNS + ["screened_at"])
+    for col in ("marketCap", "totalDebt", "totalAssets"):
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    verdict = rules.classify_equity_frame(df)
+    return pd.concat([df, verdict], axis=1)
+
+
+def write_snapshot(df: pd.DataFrame, folder: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    """Schrijf een ongecomprimeerd Arrow IPC-bestand (memory-mapbaar) en zet LATEST er atomair naar."""
+    os.makedirs(folder, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    name = f"universe-{created:%Y%m%dT%H%M%SZ}.arrow"
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        "qist_format": str(SNAPSHOT_FORMAT),
+        "created_at": created.isoformat(),
+        "rows": str(len(df)),
+        "rules_version": rules.RULES_VERSION,
+    })
+    tmp = os.path.join(folder, name + ".tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, os.path.join(folder, name))
+    latest_tmp = os.path.join(folder, "LATEST.tmp")
+    with open(latest_tmp, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+    os.replace(latest_tmp, os.path.join(folder, "LATEST"))
+    return os.path.join(folder, name)
+
+
+# ---------- lezen (app) ----------
+def _clean(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class VerdictSnapshot:
+    """Memory-mapped snapshot met een index symbool → rij."""
+
+    def __init__(self, path: str, max_age: float = SNAPSHOT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        source = pa.memory_map(path, "r")
+        self.table = pa.ipc.open_file(source).read_all()
+        meta = self.table.schema.metadata or {}
+        self.created_at = meta.get(b"created_at", b"").decode()
+        self.rules_version = meta.get(b"rules_version", b"").decode()
+        self._row: Dict[str, int] = {s: i for i, s in enumerate(self.table.column("symbol").to_pylist())}
+        self._screened = self.table.column("screened_at").to_numpy()
+        self._cols = {name: self.table.column(name) for name in self.table.column_names}
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def lookup(self, symbol: str) -> Optional[dict]:
+        """Volledige rij (metadata + debt_ratio/basis/status/reason), of None als onbekend/verouderd."""
+        i = self._row.get(symbol)
+        if i is None or time.time() - self._screened[i] > self.max_age:
+            return None
+        row = {name: _clean(col[i].as_py()) for name, col in self._cols.items()}
+        if self.rules_version != rules.RULES_VERSION:
+            # regels gewijzigd sinds de screening: metadata blijft bruikbaar, het oordeel niet
+            row["debt_ratio"], row["basis"] = rules.compute_debt_ratio(row)
+            status, reasons = rules.classify_equity(row)
+            row["status"], row["reason"] = status, reasons[0]
+        return row
+
+    def lookup_meta(self, symbol: str) -> Optional[dict]:
+        """Alleen de velden van fetch_symbol_metadata, zodat de app er direct mee verder kan."""
+        row = self.lookup(symbol)
+        if row is None or not row.get("is_valid"):
+            return None
+        return {col: row.get(col) for col in META_COLUMNS}
+
+
+_current: Optional[VerdictSnapshot] = None
+_current_name = ""
+_checked = float("-inf")   # niet 0.0: monotonic() begint bij de boot, dus vlak na een start zou er RELOAD_CHECK s niets laden
+_lock = threading.Lock()
+
+
+def current_snapshot() -> Optional[VerdictSnapshot]:
+    """Laatste snapshot uit QIST_SNAPSHOT_DIR (standaard data/snapshots); periodiek op nieuwe versies gecontroleerd."""
+    global _current, _current_name, _checked
+    if time.monotonic() - _checked < RELOAD_CHECK:
+        return _current
+    with _lock:
+        if time.monotonic() - _checked < RELOAD_CHECK:
+            return _current
+        _checked = time.monotonic()
+        folder = os.environ.get("QIST_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+        try:
+            with open(os.path.join(folder, "LATEST"), encoding="utf-8") as f:
+                name = f.read().strip()
+        except OSError:
+            return _current
+        if name and name != _current_name:
+            try:
+                _current = VerdictSnapshot(os.path.join(folder, name))
+                _current_name = name
+            except Exception:
+                pass
+        return _current
+
+
+def lookup_meta(symbol: str) -> Optional[dict]:
+    snap = current_snapshot()
+    meta = snap.lookup_meta(symbol) if snap is not None else None
+    metrics.cache_event("snapshot", "hit" if meta is not None else "miss")
+    return meta
+
+
+# ---------- CLI ----------
+def _read_universe(path: str) -> List[str]:
+    from qist.bulk import parse_csv, parse_symbols
+    if path.lower().endswith(".csv"):
+        return parse_csv(path)
+    with open(path, encoding="utf-8") as f:
+        return parse_symbols(f.read())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m qist.snapshot",
+        description="Screen een universum van tickers en schrijf een Arrow-snapshot voor de app.",
+    )
+    parser.add_argument("universe", help="tekstbestand met tickers of CSV met kolom symbol/ticker (bv. data/listings.csv)")
+    parser.add_argument("--out", default=os.environ.get("QIST_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    symbols = _read_universe(args.universe)
+
+    def progress(done: int, total: int) -> None:
+        if done == total or done % 100 == 0:
+            print(f"{done}/{total}", file=sys.stderr)
+
+    df = screen_universe(symbols, workers=args.workers, progress=progress)
+    path = write_snapshot(df, args.out)
+    counts = df["status"].value_counts().to_dict()
+    print(f"{len(df)} symbols → {path} {counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
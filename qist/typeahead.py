@@ -0,0 +1,57 @@
+# qist/typeahead.py — incrementeel zoeken: eerdere (kortere) zoekopdrachten lokaal verfijnen
+from typing import List, Optional
+
+from qist import metrics, yahoo
+
+TYPEAHEAD_MIN_HITS = 5        # genoeg lokale treffers uit een afgekapte prefix-lijst
+TYPEAHEAD_MIN_LEN = 2         # zelfde grens als yahoo_search
+
+
+def _matches(listing, q: str) -> bool:
+    """Ticker begint met q, of een woord (reeks) in de naam begint met q."""
+    if str(listing.get("symbol") or "").lower().startswith(q):
+        return True
+    name = " " + str(listing.get("shortname") or "").lower()
+    return (" " + q) in name
+
+
+def narrow(query: str, quotes_count: int = 15) -> Optional[List[dict]]:
+    """Resultaten van de langste gecachete prefix, gefilterd op de volledige query.
+
+    Bruikbaar als de prefix-lijst volledig was (Yahoo gaf minder dan quotes_count quotes, vóór
+    het filter op aandelen) of als er na filteren nog minstens TYPEAHEAD_MIN_HITS over zijn;
+    anders None.
+    """
+    q = query.strip().lower()
+    for n in range(len(q) - 1, TYPEAHEAD_MIN_LEN - 1, -1):
+        cached = yahoo.search_cached(q[:n], quotes_count)
+        if cached is None:
+            continue
+        hits, complete = cached
+        filtered = [h for h in hits if _matches(h, q)]
+        if filtered and (complete or len(filtered) >= TYPEAHEAD_MIN_HITS):
+            return filtered
+        return None  # langste prefix zegt te weinig; kortere prefixen zeggen nog minder
+    return None
+
+
+def lookup(query: str, quotes_count: int = 15) -> List[dict]:
+    """Lokaal verfijnen, anders direct Yahoo; nooit None.
+
+    Zonder debounce of annuleren: een Streamlit-rerun doet per sessie één query tegelijk, dus een
+    nieuwere query kan de lopende nooit inhalen.
+    """
+    query = query.strip()
+    if len(query) < TYPEAHEAD_MIN_LEN:
+        return []
+    cached = yahoo.search_cached(query, quotes_count)
+    hits = cached[0] if cached is not None else narrow(query, quotes_count)
+    if hits is not None:
+        _count("local")
+        return hits
+    _count("upstream")
+    return yahoo.yahoo_search(query, quotes_count)
+
+
+def _count(outcome: str) -> None:
+    metrics.REGISTRY.inc("qist_typeahead_total", help="Typeahead-zoekacties per uitkomst.", outcome=outcome)
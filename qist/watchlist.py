@@ -0,0 +1,297 @@
+# qist/watchlist.py — bewaarde watchlists, periodieke her-screening op de achtergrond en meldingen bij statuswijziging
+#
+# Tabellen staan in dezelfde SQLite-file als de metadata-cache (QIST_CACHE_DB), maar los van
+# de `fields`-tabel: watchlists verlopen niet zoals cache-velden.
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+
+from qist import metrics, rules, yahoo
+from qist.metastore import DEFAULT_DB_PATH, default_store
+
+WATCH_MAX_AGE = 6 * 3600       # oordeel ouder dan dit → opnieuw screenen
+WATCH_RETRY = 1800             # nog nooit gelukt → na zoveel s opnieuw proberen
+WATCH_INTERVAL = 300           # s tussen twee scheduler-rondes
+WATCH_BATCH = 50               # hooguit zoveel symbolen per ronde
+WATCH_WORKERS = int(os.environ.get("QIST_WATCH_WORKERS", "4"))
+ALERT_MAX_AGE = 30 * 86400     # oudere meldingen niet meer tonen
+# basis als sleutel opslaan; de app vertaalt bij het tonen
+_BASIS_KEYS = {"mc": "mc", "assets": "assets", "unknown": "unknown"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (
+    list_id  TEXT NOT NULL,
+    symbol   TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (list_id, symbol)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS watchlist_symbol ON watchlist (symbol);
+CREATE TABLE IF NOT EXISTS screening (
+    symbol        TEXT PRIMARY KEY,
+    status        TEXT,
+    debt_ratio    REAL,
+    basis         TEXT,
+    reasons       TEXT,
+    rules_version TEXT,
+    screened_at   REAL NOT NULL,
+    changed_at    REAL
+) WITHOUT ROWID;
+-- laatste poging per symbool (ook mislukte); alleen voor de planning, screened_at blijft het laatste gelukte oordeel
+CREATE TABLE IF NOT EXISTS attempts (
+    symbol       TEXT PRIMARY KEY,
+    attempted_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alerts (
+    id         INTEGER PRIMARY KEY,
+    symbol     TEXT NOT NULL,
+    old_status TEXT,
+    new_status TEXT,
+    old_ratio  REAL,
+    new_ratio  REAL,
+    at         REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_symbol ON alerts (symbol, at);
+"""
+
+
+def new_list_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class WatchStore:
+    """Watchlists (per list-id), het laatste oordeel per symbool en de statuswijzigingen."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    # ---------- Lijsten ----------
+    def add(self, list_id: str, symbol: str) -> None:
+        self._conn().execute(
+            "INSERT OR IGNORE INTO watchlist (list_id, symbol, added_at) VALUES (?, ?, ?)",
+            (list_id, symbol.upper(), time.time()),
+        )
+
+    def remove(self, list_id: str, symbol: str) -> None:
+        self._conn().execute("DELETE FROM watchlist WHERE list_id = ? AND symbol = ?", (list_id, symbol.upper()))
+
+    def symbols(self, list_id: str) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT symbol FROM watchlist WHERE list_id = ? ORDER BY added_at", (list_id,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    # ---------- Oordelen ----------
+    def results(self, symbols: Iterable[str]) -> Dict[str, dict]:
+        """Laatste oordeel per symbool (alleen symbolen die al eens met succes gescreend zijn)."""
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        rows = self._conn().execute(
+            f"SELECT symbol, status, debt_ratio, basis, reasons, rules_version, screened_at, changed_at "
+            f"FROM screening WHERE status IS NOT NULL AND symbol IN ({','.join('?' * len(symbols))})",
+            symbols,
+        ).fetchall()
+        return {
+            r[0]: {
+                "symbol": r[0], "status": r[1], "debt_ratio": r[2], "basis": r[3],
+                "reasons": json.loads(r[4] or "[]"), "rules_version": r[5],
+                "screened_at": r[6], "changed_at": r[7],
+            }
+            for r in rows
+        }
+
+    def due(self, max_age: float = WATCH_MAX_AGE, limit: int = WATCH_BATCH) -> List[str]:
+        """Symbolen die opnieuw moeten: nooit (met succes) gescreend, te oud of een andere regelset.
+
+        Is de laatste poging mislukt, dan pas na WATCH_RETRY opnieuw (niet elke ronde).
+        Volgorde: oudste (of ontbrekend) oordeel eerst, bij gelijke stand het vaakst gevolgde symbool.
+        """
+        now = time.time()
+        rows = self._conn().execute(
+            "SELECT w.symbol FROM watchlist w LEFT JOIN screening s ON s.symbol = w.symbol "
+            "LEFT JOIN attempts a ON a.symbol = w.symbol "
+            "WHERE (s.status IS NULL OR s.screened_at < ? OR s.rules_version IS NOT ?) "
+            "AND (a.attempted_at IS NULL OR a.attempted_at < ?) "
+            "GROUP BY w.symbol "
+            "ORDER BY COALESCE(MAX(s.screened_at), 0), COUNT(*) DESC LIMIT ?",
+            (now - max_age, rules.RULES_VERSION, now - min(max_age, WATCH_RETRY), limit),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def record(self, symbol: str, status: str, ratio: Optional[float], basis: str, reasons: List[str]) -> Optional[dict]:
+        """Nieuw oordeel opslaan; geeft de melding terug als de status veranderd is."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            prev = conn.execute("SELECT status, debt_ratio, changed_at FROM screening WHERE symbol = ?", (symbol,)).fetchone()
+            # status NULL = rij zonder echt oordeel (oudere databases); het eerste echte oordeel is geen wijziging
+            changed = prev is not None and prev[0] is not None and prev[0] != status
+            conn.execute(
+                "INSERT INTO screening (symbol, status, debt_ratio, basis, reasons, rules_version, screened_at, changed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (symbol) DO UPDATE SET status = excluded.status, debt_ratio = excluded.debt_ratio, "
+                "basis = excluded.basis, reasons = excluded.reasons, rules_version = excluded.rules_version, "
+                "screened_at = excluded.screened_at, changed_at = excluded.changed_at",
+                (symbol, status, ratio, basis, json.dumps(reasons), rules.RULES_VERSION, now,
+                 now if changed else (prev[2] if prev else None)),
+            )
+            alert = None
+            if changed:
+                alert = {"symbol": symbol, "old_status": prev[0], "new_status": status,
+                         "old_ratio": prev[1], "new_ratio": ratio, "at": now}
+                conn.execute(
+                    "INSERT INTO alerts (symbol, old_status, new_status, old_ratio, new_ratio, at) VALUES (?, ?, ?, ?, ?, ?)",
+                    tuple(alert.values()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return alert
+
+    def touch(self, symbol: str) -> None:
+        """Geprobeerd maar niets gevonden: alleen de poging vastleggen (voor due()).
+
+        Het vorige oordeel en zijn screened_at blijven staan: de app toont die als 'gescreend'.
+        """
+        self._conn().execute(
+            "INSERT INTO attempts (symbol, attempted_at) VALUES (?, ?) "
+            "ON CONFLICT (symbol) DO UPDATE SET attempted_at = excluded.attempted_at",
+            (symbol, time.time()),
+        )
+
+    def alerts(self, symbols: Iterable[str], since: Optional[float] = None) -> List[dict]:
+        """Statuswijzigingen voor deze symbolen, nieuwste eerst."""
+        symbols = list(symbols)
+        if not symbols:
+            return []
+        since = time.time() - ALERT_MAX_AGE if since is None else since
+        rows = self._conn().execute(
+            f"SELECT symbol, old_status, new_status, old_ratio, new_ratio, at FROM alerts "
+            f"WHERE at >= ? AND symbol IN ({','.join('?' * len(symbols))}) ORDER BY at DESC",
+            [since, *symbols],
+        ).fetchall()
+        keys = ("symbol", "old_status", "new_status", "old_ratio", "new_ratio", "at")
+        return [dict(zip(keys, r)) for r in rows]
+
+
+# ---------- Her-screening ----------
+def screen_live(symbol: str) -> Optional[dict]:
+    """Verse metadata (langs de caches heen; het resultaat vult ze wel) → oordeel met basis als sleutel."""
+    meta = yahoo.fetch_symbol_metadata_live(symbol)
+    if not meta or not meta.get("is_valid"):
+        return None
+    default_store().put("meta", symbol, meta)
+    status, reasons = rules.classify_equity(meta, _BASIS_KEYS)
+    ratio, basis = rules.compute_debt_ratio(meta, _BASIS_KEYS)
+    return {"status": status, "debt_ratio": ratio, "basis": basis, "reasons": reasons}
+
+
+class Rescreener:
+    """Achtergrondthread: elke ronde de verouderde watchlist-symbolen op een eigen pool opnieuw screenen.
+
+    Eén per proces (zie scheduler()); meerdere processen op dezelfde database doen hooguit dubbel
+    werk, de uitkomst blijft gelijk. Metrics: qist_watch_screened_total{outcome} en
+    qist_watch_alerts_total.
+    """
+
+    def __init__(self, store: WatchStore, interval: float = WATCH_INTERVAL, workers: int = WATCH_WORKERS):
+        self.store = store
+        self.interval = interval
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qist-watch")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="qist-watch-scheduler", daemon=True)
+
+    def start(self) -> "Rescreener":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def poke(self) -> None:
+        """Niet op de volgende ronde wachten (bv. net een symbool toegevoegd)."""
+        self._wake.set()
+
+    def rescreen(self, symbols: Iterable[str]) -> None:
+        """Deze symbolen direct opnieuw screenen, ongeacht hun leeftijd (op de achtergrond)."""
+        for s in dict.fromkeys(symbols):
+            self._pool.submit(self._screen, s)
+
+    def run_once(self) -> int:
+        symbols = self.store.due()
+        wait([self._pool.submit(self._screen, s) for s in symbols])
+        return len(symbols)
+
+    def _screen(self, symbol: str) -> None:
+        with metrics.span("watch.screen"):
+            try:
+                result = screen_live(symbol)
+            except Exception:
+                result = None
+        metrics.REGISTRY.inc(
+            "qist_watch_screened_total", help="Her-screenings van watchlist-symbolen.",
+            outcome="failed" if result is None else "ok",
+        )
+        if result is None:
+            # mislukte fetch is geen statuswijziging; alleen de poging noteren, anders staat het symbool elke ronde vooraan
+            self.store.touch(symbol)
+            return
+        alert = self.store.record(symbol, result["status"], result["debt_ratio"], result["basis"], result["reasons"])
+        if alert:
+            metrics.REGISTRY.inc("qist_watch_alerts_total", help="Statuswijzigingen bij her-screening.")
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+_store: Optional[WatchStore] = None
+_scheduler: Optional[Rescreener] = None
+_lock = threading.Lock()
+
+
+def default_watchstore() -> WatchStore:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = WatchStore(os.environ.get("QIST_CACHE_DB", DEFAULT_DB_PATH))
+        return _store
+
+
+def scheduler() -> Rescreener:
+    """Proces-brede scheduler (start bij de eerste aanroep)."""
+    global _scheduler
+    store = default_watchstore()
+    with _lock:
+        if _scheduler is None:
+            _scheduler = Rescreener(store).start()
+        return _scheduler
@@ -0,0 +1,637 @@
+# qist/yahoo.py — Yahoo Finance / yfinance data-laag (zonder Streamlit, veilig vanuit worker-threads)
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from qist import metrics
+from qist.cache import MISSING, LRUCache, record_type
+from qist.metastore import default_store
+from qist.net import default_client
+from qist.singleflight import SingleFlight
+
+# ---------- Yahoo search helpers ----------
+YAHOO_SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json, text/plain, */*",
+    "Referer": "https://finance.yahoo.com/",
+}
+
+# Endpoints in voorkeursvolgorde; een endpoint met veel recente fouten zakt naar achteren.
+SEARCH_ENDPOINTS = [
+    ("query2", YAHOO_SEARCH_URL),
+    ("query1", "https://query1.finance.yahoo.com/v1/finance/search"),
+    ("autoc", "https://autoc.finance.yahoo.com/autoc"),
+]
+SEARCH_TIMEOUT = 10.0         # per request én voor de hele zoekactie
+HEDGE_PERCENTILE = 0.9        # na p90-latency van het lopende endpoint het volgende erbij starten
+HEDGE_MIN, HEDGE_MAX, HEDGE_DEFAULT = 0.25, 3.0, 1.0
+DEMOTE_SECONDS = 60.0         # daarna mag een gedegradeerd endpoint weer als eerste proberen
+SEARCH_TYPES = ("EQUITY",)    # quoteTypes die een zoekactie standaard teruggeeft (de ETF-tab vraagt "ETF")
+
+_search_pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="qist-search")
+
+
+class EndpointHealth:
+    """Recente latencies en een foutpercentage (EWMA) per endpoint."""
+
+    def __init__(self, window: int = 50):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.last_failure = 0.0
+        self.lost = 0
+        self._lock = threading.Lock()
+
+    def record(self, ok: Optional[bool], latency: float) -> None:
+        """ok=None: alleen de latency bijhouden (antwoord kwam pas na een verloren race)."""
+        with self._lock:
+            if ok is not False:
+                self.latencies.append(latency)
+            if ok is not None:
+                self.error_rate = 0.8 * self.error_rate + 0.2 * (0.0 if ok else 1.0)
+            if ok is False:
+                self.last_failure = time.monotonic()
+
+    def record_loss(self) -> None:
+        """Nog bezig toen een ander endpoint won: geen fout (de latency volgt via record(None))."""
+        with self._lock:
+            self.lost += 1
+
+    @property
+    def healthy(self) -> bool:
+        return self.error_rate < 0.5 or time.monotonic() - self.last_failure > DEMOTE_SECONDS
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            lat = sorted(self.latencies)
+        if len(lat) < 5:
+            return HEDGE_DEFAULT
+        p = lat[min(len(lat) - 1, int(HEDGE_PERCENTILE * len(lat)))]
+        return min(HEDGE_MAX, max(HEDGE_MIN, p))
+
+
+_health: Dict[str, EndpointHealth] = {name: EndpointHealth() for name, _ in SEARCH_ENDPOINTS}
+_search_flight = SingleFlight("search")
+
+# ---------- In-memory caches (begrensd; gedeeld door alle sessies, geen pickle per hit) ----------
+Listing = record_type("Listing", ("symbol", "shortname", "exchange", "score"))
+QuoteRecord = record_type("QuoteRecord", ("name", "exchange", "currency", "marketCap", "country", "sector", "industry"))
+MetaRecord = record_type("MetaRecord", (
+    "symbol", "name", "exchange", "currency", "country", "sector", "industry",
+    "marketCap", "totalDebt", "totalAssets", "bsPeriod", "bsFetchedAt", "is_valid",
+))
+ProfileRecord = record_type("ProfileRecord", ("symbol", "name", "exchange", "currency", "marketCap", "is_valid"))
+_search_cache = LRUCache("mem_search", max_entries=2000, max_bytes=4 << 20, ttl=1800)
+_quote_cache = LRUCache("mem_quote", max_entries=5000, max_bytes=8 << 20, ttl=300)
+_meta_cache = LRUCache("mem_meta", max_entries=5000, max_bytes=16 << 20, ttl=600)
+_profile_cache = LRUCache("mem_profile", max_entries=5000, max_bytes=4 << 20, ttl=300)
+
+
+def search_health() -> Dict[str, dict]:
+    return {
+        name: {"healthy": h.healthy, "error_rate": round(h.error_rate, 3), "lost": h.lost, "hedge_delay": h.hedge_delay()}
+        for name, h in _health.items()
+    }
+
+
+def _uniq(items: List[dict]) -> List[dict]:
+    seen, uniq = set(), []
+    for item in items:
+        if item["symbol"] not in seen:
+            uniq.append(item); seen.add(item["symbol"])
+    return uniq
+
+
+def _parse_search(data: dict, types: Tuple[str, ...] = SEARCH_TYPES) -> List[dict]:
+    keep_types = set(types)
+    out = []
+    for q in (data.get("quotes", []) or []):
+        if q.get("quoteType") in keep_types and q.get("symbol"):
+            out.append({
+                "symbol": q.get("symbol"),
+                "shortname": q.get("shortname") or q.get("longname") or q.get("name"),
+                "exchange": q.get("exchange") or q.get("exchDisp"),
+                "score": q.get("score", 0.0),
+            })
+    return _uniq(sorted(out, key=lambda x: x["score"], reverse=True))
+
+
+def _parse_autoc(js: dict, types: Tuple[str, ...] = SEARCH_TYPES) -> List[dict]:
+    keep_types = {t.lower() for t in types}
+    out = []
+    for it in (js.get("ResultSet", {}).get("Result", []) or []):
+        typ = (it.get("typeDisp") or "").lower()
+        if typ in keep_types and it.get("symbol"):
+            out.append({
+                "symbol": it.get("symbol"),
+                "shortname": it.get("name") or it.get("symbol"),
+                "exchange": it.get("exchDisp") or it.get("exch") or "",
+                "score": 0,
+            })
+    return _uniq(out)
+
+
+def _search_endpoint(name: str, url: str, query: str, quotes_count: int, types: Tuple[str, ...],
+                     lost: threading.Event) -> Tuple[List[dict], bool]:
+    """Eén endpoint bevragen → (noteringen, volledig); elke fout (HTTP, timeout, JSON) wordt een exception
+    en telt als ongezond. Volledig = Yahoo gaf minder dan quotes_count quotes, vóór het filter op
+    quoteType; autoc kent geen quotesCount en telt dus nooit als volledig."""
+    t0 = time.monotonic()
+    if name == "autoc":
+        params = {"query": query, "region": 1, "lang": "en"}
+    else:
+        params = {"q": query, "quotesCount": quotes_count, "newsCount": 0, "lang": "en-US", "region": "US"}
+    try:
+        with metrics.span(f"search.{name}"):
+            r = default_client().get(url, params=params, headers=HEADERS, timeout=SEARCH_TIMEOUT)
+            r.raise_for_status()
+            data = r.json() or {}
+            out = _parse_autoc(data, types) if name == "autoc" else _parse_search(data, types)
+            complete = name != "autoc" and len(data.get("quotes") or []) < quotes_count
+    except Exception:
+        _health[name].record(False, time.monotonic() - t0)
+        raise
+    _health[name].record(None if lost.is_set() else True, time.monotonic() - t0)
+    return out, complete
+
+
+def yahoo_search(query: str, quotes_count: int = 15, types: Tuple[str, ...] = SEARCH_TYPES):
+    """Zoek wereldwijd naar noteringen; met headers en fallbacks om 403/429 te voorkomen.
+
+    Hedged: blijft het eerste endpoint langer stil dan zijn p90-latency, of faalt het (ook bij
+    een timeout), dan start het volgende; het eerste geldige antwoord wint.
+    """
+    if not query or len(query.strip()) < 2:
+        return []
+    query = query.strip()
+    key = (query.lower(), quotes_count, types)
+
+    def load() -> Tuple[tuple, bool]:
+        with metrics.span("search"):
+            # dezelfde zoekopdracht uit meerdere sessies tegelijk → één hedged race
+            results, complete = _search_flight.do(key, _hedged_search, query, quotes_count, types)
+        return tuple(Listing.from_mapping(r) for r in results), complete
+
+    # lege uitkomst (niets gevonden of alle endpoints faalden) niet bewaren
+    return list(_search_cache.get_or_load(key, load, keep=lambda entry: bool(entry[0]))[0])
+
+def search_cached(query: str, quotes_count: int = 15) -> Optional[Tuple[List[dict], bool]]:
+    """Alleen uit de in-memory cache: (noteringen, volledig), of None als niet gecachet; voor typeahead
+    zonder netwerk. Volledig = Yahoo had niet meer dan dit (zie _search_endpoint)."""
+    entry = _search_cache.get((query.strip().lower(), quotes_count, SEARCH_TYPES))
+    return None if entry is MISSING else (list(entry[0]), entry[1])
+
+def _hedged_search(query: str, quotes_count: int, types: Tuple[str, ...] = SEARCH_TYPES) -> Tuple[List[dict], bool]:
+    order = sorted(SEARCH_ENDPOINTS, key=lambda ep: not _health[ep[0]].healthy)
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    pending: Dict = {}
+    launched = 0
+    lost = threading.Event()
+
+    def launch() -> None:
+        nonlocal launched
+        name, url = order[launched]
+        launched += 1
+        pending[_search_pool.submit(_search_endpoint, name, url, query, quotes_count, types, lost)] = name
+
+    launch()
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        timeout = remaining
+        if launched < len(order):
+            timeout = min(remaining, _health[order[launched - 1][0]].hedge_delay())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            if launched < len(order):
+                launch()  # hedge: trage primary, start het volgende endpoint erbij
+            continue
+        for fut in done:
+            pending.pop(fut)
+            try:
+                result = fut.result()
+            except Exception:
+                continue
+            # wie nog loopt heeft de race verloren: apart tellen, niet als fout; komt het antwoord
+            # alsnog, dan telt alleen de latency mee (en schuift de hedge-drempel op)
+            lost.set()
+            for name in pending.values():
+                _health[name].record_loss()
+                metrics.REGISTRY.inc("qist_search_lost_total", help="Verloren hedge-races per endpoint.", endpoint=name)
+            return result
+        # alles wat klaar was faalde → direct het volgende endpoint
+        if launched < len(order):
+            launch()
+    lost.set()
+    for name in pending.values():
+        _health[name].record(False, SEARCH_TIMEOUT)
+    return [], False
+
+# ---------- Persistente metadata-cache ----------
+# Versheid per veld (seconden): koers/market cap verouderen snel, profiel nauwelijks.
+# Balansposten lopen niet op de klok: die worden alleen opnieuw gehaald als er een nieuwere
+# rapportageperiode kan zijn (zie _balance_due), met BS_MAX_AGE als vangnet.
+META_DEFAULT_TTL = 6 * 3600
+META_FIELD_TTL = {
+    "marketCap": 3600,
+    "totalDebt": 30 * 86400,
+    "totalAssets": 30 * 86400,
+    "bsPeriod": 30 * 86400,
+    "bsFetchedAt": 30 * 86400,
+}
+BS_MAX_AGE = 120 * 86400      # daarna de balans hoe dan ook opnieuw ophalen
+BS_PERIOD_DAYS = 365          # tk.balance_sheet is jaarlijks: eerder kan er geen nieuwe periode zijn
+BS_RETRY = 86400              # nieuwe periode verwacht maar nog niet in de balans → hooguit dagelijks opnieuw
+QUOTE_FIELD_TTL = {"marketCap": 1800}
+
+# Extra fallback: quote endpoint (betrouwbaarder voor basisprofiel)
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_BATCH_WINDOW = 0.025    # zo lang wachten op meer symbolen voor dezelfde request
+QUOTE_BATCH_MAX = 50          # symbolen per request
+QUOTE_TIMEOUT = 10.0
+
+
+def _normalize_quote(q: dict) -> dict:
+    return {
+        "name": q.get("longName") or q.get("shortName"),
+        "exchange": q.get("fullExchangeName") or q.get("exchange"),
+        "currency": q.get("currency"),
+        "marketCap": q.get("marketCap"),
+        # niet altijd aanwezig, maar soms wel:
+        "country": q.get("country"),
+        "sector": q.get("sector"),
+        "industry": q.get("industry"),
+    }
+
+
+def yahoo_quotes_live(symbols: List[str]) -> Dict[str, dict]:
+    """Eén request voor meerdere symbolen (`symbols` is komma-gescheiden); ontbrekende → niet in de dict."""
+    try:
+        with metrics.span("quote.batch"):
+            r = default_client().get(
+                QUOTE_URL,
+                params={"symbols": ",".join(symbols)},
+                headers=HEADERS,
+                timeout=QUOTE_TIMEOUT,
+            )
+            r.raise_for_status()
+            data = r.json() or {}
+            res = (data.get("quoteResponse", {}).get("result") or [])
+    except Exception:
+        return {}
+    wanted = {s.upper(): s for s in symbols}
+    out = {}
+    for q in res:
+        sym = wanted.get(str(q.get("symbol") or "").upper())
+        if sym:
+            out[sym] = _normalize_quote(q)
+    return out
+
+
+class QuoteBatcher:
+    """Verzamelt losse quote-aanvragen gedurende een kort venster en haalt ze in één request op.
+
+    Gelijktijdige aanvragen voor hetzelfde symbool delen één plek in de batch.
+    """
+
+    def __init__(self, window: float = QUOTE_BATCH_WINDOW, max_batch: int = QUOTE_BATCH_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.symbols = 0
+        self._pending: Dict[str, List[Future]] = {}
+        self._opened = 0.0
+        self._cond = threading.Condition()
+        self._workers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="qist-quote")
+        self._thread = threading.Thread(target=self._run, name="qist-quote-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, symbol: str) -> Future:
+        fut: Future = Future()
+        with self._cond:
+            if not self._pending:
+                self._opened = time.monotonic()
+            self._pending.setdefault(symbol, []).append(fut)
+            self._cond.notify()
+        return fut
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                while len(self._pending) < self.max_batch:
+                    remaining = self._opened + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = dict(list(self._pending.items())[:self.max_batch])
+                for sym in batch:
+                    del self._pending[sym]
+                self._opened = time.monotonic()
+            self.batches += 1
+            self.symbols += len(batch)
+            self._workers.submit(self._deliver, batch)
+
+    @staticmethod
+    def _deliver(batch: Dict[str, List[Future]]) -> None:
+        try:
+            results = yahoo_quotes_live(list(batch))
+        except Exception:
+            results = {}
+        for sym, futs in batch.items():
+            for fut in futs:
+                fut.set_result(results.get(sym, {}))
+
+
+_quote_batcher = QuoteBatcher()
+# De batcher ontdubbelt binnen één venster; single-flight ook over vensters heen (request nog onderweg).
+_quote_flight = SingleFlight("quote")
+
+
+def yahoo_quote(symbol: str) -> dict:
+    """Quote-profiel; geheugen → persistente cache (stale-while-revalidate) → live."""
+    def load():
+        q = default_store().get_or_fetch("quote", symbol, _quote_flight.wrap(yahoo_quote_live), QUOTE_FIELD_TTL, META_DEFAULT_TTL)
+        return QuoteRecord.from_mapping(q) if q else {}
+
+    return _quote_cache.get_or_load(symbol, load)
+
+
+def yahoo_quote_live(symbol: str) -> dict:
+    """Eén symbool, maar via de batcher: gelijktijdige aanvragen delen één upstream-request."""
+    try:
+        return _quote_batcher.submit(symbol).result(timeout=QUOTE_TIMEOUT)
+    except Exception:
+        return {}
+
+
+def prefetch_quotes(symbols: List[str]) -> None:
+    """Cache alvast vullen (bv. voor zoekresultaten) zonder te wachten; kost één gebatchte request."""
+    store = default_store()
+
+    def _store(sym: str, fut: Future) -> None:
+        try:
+            q = fut.result()
+        except Exception:
+            return
+        if q:
+            store.put("quote", sym, q)
+
+    for sym in dict.fromkeys(symbols):
+        if store.get("quote", sym, QUOTE_FIELD_TTL, META_DEFAULT_TTL) is None:
+            _quote_batcher.submit(sym).add_done_callback(lambda fut, sym=sym: _store(sym, fut))
+
+
+# ---------- Metadata (yfinance) ----------
+# Twee lagen: het profiel (quote-endpoint + zo nodig fast_info) is goedkoop en direct te tonen;
+# de fundamentals (get_info + balans) zijn duur en worden pas gehaald als de ratio/het oordeel
+# ze nodig heeft, of vooraf op de achtergrond (fetch_symbol_metadata_async).
+# Deel-requests van één lookup lopen parallel op een begrensde, gedeelde pool;
+# de hele lookup heeft één deadline (wat dan nog loopt telt als ontbrekend).
+METADATA_WORKERS = int(os.environ.get("QIST_METADATA_WORKERS", "16"))  # hoger zetten voor batch-jobs
+METADATA_DEADLINE = 12.0
+# Fundamentals-fetches van alle sessies samen; elk kan tot METADATA_DEADLINE duren, dus niet krapper dan de metadata-pool
+FUNDAMENTALS_WORKERS = int(os.environ.get("QIST_FUNDAMENTALS_WORKERS", str(METADATA_WORKERS)))
+PROBE_PERIOD = "1y"           # één history-request dekt wat vroeger 1mo/3mo/6mo/1y na elkaar probeerde
+
+# Veel sessies tegelijk op hetzelfde (populaire) symbool → één yfinance-fetch, de rest wacht mee.
+_meta_flight = SingleFlight("meta")
+_profile_flight = SingleFlight("profile")
+_pool = ThreadPoolExecutor(max_workers=METADATA_WORKERS, thread_name_prefix="qist-meta")
+# eigen pool: een fundamentals-fetch zet zelf deel-requests op _pool en mag daar niet op wachten
+_lazy_pool = ThreadPoolExecutor(max_workers=FUNDAMENTALS_WORKERS, thread_name_prefix="qist-fundamentals")
+
+def fetch_symbol_profile(symbol: str) -> dict:
+    """Eerste laag: naam, beurs, valuta, market cap en geldigheid; geen get_info of balans."""
+    def load():
+        prof = default_store().get_or_fetch("profile", symbol, _profile_flight.wrap(fetch_symbol_profile_live), QUOTE_FIELD_TTL, META_DEFAULT_TTL)
+        return ProfileRecord.from_mapping(prof) if prof else prof
+
+    return _profile_cache.get_or_load(symbol, load)
+
+def fetch_symbol_profile_live(symbol: str) -> dict:
+    with metrics.span("profile"):
+        q = yahoo_quote(symbol)
+        name, exchange, currency, marketCap = q.get("name"), q.get("exchange"), q.get("currency"), q.get("marketCap")
+        tk = None
+        if not (exchange and currency):
+            tk = yf.Ticker(symbol)
+            fast = metrics.timed("profile.fast_info", _get_fast_info)(tk)
+            exchange = exchange or fast.get("exchange")
+            currency = currency or fast.get("currency")
+        is_valid = bool(name or exchange or currency or marketCap)
+        if not is_valid:
+            is_valid = metrics.timed("profile.probe", _probe_valid)(tk or yf.Ticker(symbol))
+        return {
+            "symbol": symbol,
+            "name": name,
+            "exchange": exchange,
+            "currency": currency,
+            "marketCap": marketCap,
+            "is_valid": is_valid,
+        }
+
+def fetch_symbol_metadata_async(symbol: str) -> Future:
+    """Fundamentals alvast op de achtergrond; .result() geeft hetzelfde als fetch_symbol_metadata."""
+    rec = _meta_cache.get(symbol)
+    if rec is not MISSING:
+        fut: Future = Future()
+        fut.set_result(rec)
+        return fut
+    return _lazy_pool.submit(fetch_symbol_metadata, symbol)
+
+def fetch_symbol_metadata(symbol: str) -> dict:
+    """Metadata uit geheugen of de persistente cache; verouderde velden worden op de achtergrond ververst."""
+    def load():
+        meta = default_store().get_or_fetch("meta", symbol, _meta_flight.wrap(fetch_symbol_metadata_live), META_FIELD_TTL, META_DEFAULT_TTL)
+        return MetaRecord.from_mapping(meta) if meta else meta
+
+    return _meta_cache.get_or_load(symbol, load)
+
+def _get_info(tk) -> dict:
+    # probeer get_info eerst
+    try:
+        return tk.get_info() or {}
+    except Exception:
+        try:
+            return tk.info or {}
+        except Exception:
+            return {}
+
+def _get_fast_info(tk) -> dict:
+    # voorzichtig: fast_info kan zelf een request doen of ontbreken
+    out = {}
+    try:
+        fi = getattr(tk, "fast_info", None)
+    except Exception:
+        return out
+    if fi is None:
+        return out
+    for key in ("exchange", "currency"):
+        try:
+            out[key] = fi.get(key, None)
+        except Exception:
+            out[key] = None
+    return out
+
+def _probe_valid(tk) -> bool:
+    # alleen nodig als quote/info niets opleveren: bestaat er überhaupt koershistorie?
+    metrics.REGISTRY.inc("qist_history_attempts_total", help="tk.history-pogingen per periode.", period=PROBE_PERIOD)
+    try:
+        hist = tk.history(period=PROBE_PERIOD, interval="1mo")
+        return isinstance(hist, pd.DataFrame) and len(hist) > 0
+    except Exception:
+        return False
+
+def _get_balance(tk) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """(schuld, activa, periode-einddatum) uit de meest recente kolom met een waarde."""
+    total_debt = total_assets = period = None
+    try:
+        bs = tk.balance_sheet
+        if isinstance(bs, pd.DataFrame) and not bs.empty:
+            debt_row = None
+            if "Total Debt" in bs.index:
+                debt_row = bs.loc["Total Debt"].dropna()
+            elif "Total Liabilities" in bs.index:
+                debt_row = bs.loc["Total Liabilities"].dropna()
+            if debt_row is not None and len(debt_row):
+                total_debt = pd.to_numeric(debt_row.iloc[0], errors="coerce")
+                period = debt_row.index[0]
+            if "Total Assets" in bs.index:
+                assets_row = bs.loc["Total Assets"].dropna()
+                if len(assets_row):
+                    total_assets = pd.to_numeric(assets_row.iloc[0], errors="coerce")
+                    period = period if period is not None else assets_row.index[0]
+    except Exception:
+        pass
+    if period is not None:
+        try:
+            period = pd.Timestamp(period).date().isoformat()
+        except Exception:
+            period = None
+    return total_debt, total_assets, period
+
+def _balance_due(prev: Optional[dict], info_future: Future, timeout: float) -> bool:
+    """Moet de balans opnieuw? Alleen als er een nieuwere jaarperiode kan zijn (of het vangnet verloopt)."""
+    if not prev or not prev.get("bsPeriod") or (prev.get("totalDebt") is None and prev.get("totalAssets") is None):
+        return True
+    if time.time() - (prev.get("bsFetchedAt") or 0) > BS_MAX_AGE:
+        return True
+    period_end = pd.Timestamp(prev["bsPeriod"])
+    if pd.Timestamp.now() < period_end + pd.Timedelta(days=BS_PERIOD_DAYS):
+        return False
+    # Nieuw boekjaar mogelijk: get_info (draait toch al) vertelt of Yahoo het al kent.
+    try:
+        last_fy = (info_future.result(timeout=timeout) or {}).get("lastFiscalYearEnd")
+    except Exception:
+        last_fy = None
+    if last_fy:
+        try:
+            if pd.Timestamp(int(last_fy), unit="s") <= period_end:
+                return False
+        except Exception:
+            pass
+    # info kan het nieuwe boekjaar al melden voordat tk.balance_sheet de kolom heeft; zolang de
+    # vorige poging dezelfde periode opleverde (bsFetchedAt is dan gewoon bijgewerkt) niet elk uur
+    return time.time() - (prev.get("bsFetchedAt") or 0) > BS_RETRY
+
+def _get_balance_if_due(tk, prev: Optional[dict], info_future: Future, timeout: float):
+    if not _balance_due(prev, info_future, timeout):
+        return None  # niets nieuws: vorige waarden hergebruiken
+    # span pas hier: het wachten op get_info in _balance_due hoort bij meta.info, niet bij de balans
+    return metrics.timed("meta.balance_sheet", _get_balance)(tk)
+
+def fetch_symbol_metadata_live(symbol: str, deadline: float = METADATA_DEADLINE) -> dict:
+    """Kerninfo + balansitems via yfinance, met robuuste validatie en quote-fallback."""
+    with metrics.span("meta"):
+        return _fetch_symbol_metadata_live(symbol, deadline)
+
+def _fetch_symbol_metadata_live(symbol: str, deadline: float) -> dict:
+    # elke deel-request in een eigen span (meta.info, meta.balance_sheet, ...) om de p99-veroorzaker te vinden
+    t0 = time.monotonic()
+    tk = yf.Ticker(symbol)
+    hit = default_store().get("meta", symbol, META_FIELD_TTL, META_DEFAULT_TTL)
+    prev = hit[0] if hit else None
+
+    # Alle deel-requests tegelijk; de quote gaat speculatief mee zodat de fallback geen extra wachttijd kost.
+    futures = {"info": _pool.submit(metrics.timed("meta.info", _get_info), tk)}
+    futures.update({
+        "fast": _pool.submit(metrics.timed("meta.fast_info", _get_fast_info), tk),
+        "bs": _pool.submit(_get_balance_if_due, tk, prev, futures["info"], deadline),
+        "quote": _pool.submit(metrics.timed("meta.quote", yahoo_quote), symbol),
+    })
+    done, _ = wait(futures.values(), timeout=deadline)
+
+    def result(key: str, default):
+        fut = futures[key]
+        if fut not in done:
+            fut.cancel()
+            return default
+        try:
+            return fut.result()
+        except Exception:
+            return default
+
+    info = result("info", {})
+    fast = result("fast", {})
+    balance = result("bs", (None, None, None))
+    if balance is None:
+        total_debt, total_assets, bs_period = prev.get("totalDebt"), prev.get("totalAssets"), prev.get("bsPeriod")
+        bs_fetched_at = prev.get("bsFetchedAt")
+    else:
+        total_debt, total_assets, bs_period = balance
+        bs_fetched_at = time.time() if bs_period else None
+
+    # Samenvoegen in dezelfde volgorde als voorheen: info → fast_info → quote
+    name = info.get("longName") or info.get("shortName")
+    exchange = info.get("exchange") or fast.get("exchange")
+    currency = info.get("currency") or fast.get("currency")
+    country = info.get("country")
+    sector = info.get("sector")
+    industry = info.get("industry")
+    marketCap = info.get("marketCap")
+
+    # Vul ontbrekende basis met quote-fallback
+    if not (name and exchange and currency and marketCap):
+        q = result("quote", {})
+        name = name or q.get("name")
+        exchange = exchange or q.get("exchange")
+        currency = currency or q.get("currency")
+        marketCap = marketCap or q.get("marketCap")
+        country = country or q.get("country")
+        sector = sector or q.get("sector")
+        industry = industry or q.get("industry")
+
+    # Validatie: alleen als er verder niets bekend is nog één history-probe (binnen de deadline)
+    is_valid = bool(name or exchange or currency or marketCap)
+    if not is_valid:
+        probe = _pool.submit(metrics.timed("meta.probe", _probe_valid), tk)
+        try:
+            is_valid = probe.result(timeout=max(0.0, deadline - (time.monotonic() - t0)))
+        except Exception:
+            probe.cancel()
+
+    return {
+        "symbol": symbol,
+        "name": name,
+        "exchange": exchange,
+        "currency": currency,
+        "country": country,
+        "sector": sector,
+        "industry": industry,
+        "marketCap": marketCap,
+        "totalDebt": None if pd.isna(total_debt) else total_debt,
+        "totalAssets": None if pd.isna(total_assets) else total_assets,
+        "bsPeriod": bs_period,
+        "bsFetchedAt": bs_fetched_at,
+        "is_valid": is_valid,
+    }
@@ -0,0 +1,141 @@
+import threading
+import time
+import types
+
+import pytest
+
+from qist import analytics
+from qist.analytics import GA_MAX_EVENTS, GASender, SheetWriter
+
+
+def _wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+class FakeWorksheet:
+    def __init__(self, fail=False, gate=None):
+        self.appends = []
+        self.fail = fail
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def append_rows(self, rows, value_input_option=None):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("sheets down")
+        self.appends.append(list(rows))
+
+
+@pytest.fixture
+def writer():
+    made = []
+
+    def make(ws, **kwargs):
+        w = SheetWriter("sheet", {}, **kwargs)
+        w._ws = ws   # geen gspread/credentials: de eerste flush gebeurt pas na batch_size of flush_interval
+        made.append(w)
+        return w
+
+    yield make
+    for w in made:
+        w.close()
+
+
+def test_full_batch_is_one_append(writer):
+    ws = FakeWorksheet()
+    w = writer(ws, batch_size=3, flush_interval=60)
+    for i in range(3):
+        assert w.log([i])
+    assert _wait_for(lambda: w.written == 3)
+    assert ws.appends == [[[0], [1], [2]]]
+
+
+def test_flush_after_interval(writer):
+    ws = FakeWorksheet()
+    w = writer(ws, batch_size=100, flush_interval=0.1)
+    w.log(["a"])
+    assert _wait_for(lambda: ws.appends == [[["a"]]])
+
+
+def test_close_writes_what_is_left(writer):
+    ws = FakeWorksheet()
+    w = writer(ws, batch_size=100, flush_interval=60)
+    w.log(["a"])
+    w.log(["b"])
+    w.close()
+    assert ws.appends == [[["a"], ["b"]]]
+    assert w.stats()["written"] == 2
+
+
+def test_full_queue_drops_instead_of_blocking(writer):
+    gate = threading.Event()
+    ws = FakeWorksheet(gate=gate)
+    w = writer(ws, max_queue=2, batch_size=1, flush_interval=60)
+    w.log([0])
+    assert ws.entered.wait(2)   # thread hangt in append_rows
+    t0 = time.monotonic()
+    assert [w.log([i]) for i in range(1, 5)] == [True, True, False, False]
+    assert time.monotonic() - t0 < 0.5
+    assert w.stats()["dropped"] == 2
+    gate.set()
+    assert _wait_for(lambda: w.written == 3)
+
+
+def test_failed_append_is_counted(writer):
+    w = writer(FakeWorksheet(fail=True), batch_size=2, flush_interval=60)
+    w.log([1])
+    w.log([2])
+    assert _wait_for(lambda: w.failed == 2)
+    assert w.written == 0 and w._ws is None
+
+
+class FakeCollect:
+    def __init__(self, fail=False):
+        self.posts = []
+        self.fail = fail
+
+    def post(self, url, params=None, json=None, timeout=None):
+        if self.fail:
+            raise ConnectionError("ga down")
+        self.posts.append(json)
+        return types.SimpleNamespace(raise_for_status=lambda: None)
+
+
+@pytest.fixture
+def collect(monkeypatch):
+    fake = FakeCollect()
+    monkeypatch.setattr(analytics, "default_client", lambda: fake)
+    return fake
+
+
+def test_ga_events_batched_per_client(collect):
+    s = GASender("G-TEST", "secret", flush_interval=60)
+    for i in range(3):
+        s.send("a", "search", {"i": i})
+    s.send("b", "search", {"i": 9})
+    s.close()
+    assert sorted((p["client_id"], len(p["events"])) for p in collect.posts) == [("a", 3), ("b", 1)]
+    assert s.stats()["sent_requests"] == 2 and s.stats()["sent_events"] == 4
+
+
+def test_ga_full_payload_goes_out_immediately(collect):
+    s = GASender("G-TEST", "secret", flush_interval=60)
+    for i in range(GA_MAX_EVENTS + 5):
+        s.send("a", "search", {"i": i})
+    assert _wait_for(lambda: len(collect.posts) == 1)
+    assert len(collect.posts[0]["events"]) == GA_MAX_EVENTS
+    s.close()
+    assert [len(p["events"]) for p in collect.posts] == [GA_MAX_EVENTS, 5]
+
+
+def test_ga_failed_post_is_counted(monkeypatch):
+    monkeypatch.setattr(analytics, "default_client", lambda: FakeCollect(fail=True))
+    s = GASender("G-TEST", "secret", flush_interval=60)
+    s.send("a", "search", {})
+    s.close()
+    assert s.stats()["failed"] == 1 and s.stats()["sent_events"] == 0
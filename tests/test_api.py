@@ -0,0 +1,54 @@
+import json
+from unittest import mock
+
+from tornado.testing import AsyncHTTPTestCase
+
+from qist import api, search_index, yahoo
+from qist.cache import LRUCache
+from qist.search_index import SearchIndex
+
+
+class SearchApiTest(AsyncHTTPTestCase):
+    def get_app(self):
+        return api.make_app()
+
+    def setUp(self):
+        super().setUp()
+        self.counts = []
+
+        def yahoo_search(query, quotes_count=15):
+            self.counts.append(quotes_count)
+            return [{"symbol": f"X{i}", "shortname": f"Listing {i}", "exchange": "NMS"} for i in range(quotes_count)]
+
+        patches = [
+            mock.patch.object(search_index, "_default", SearchIndex()),
+            mock.patch.object(search_index, "_isin_hits", LRUCache("test_isin", max_entries=10, max_bytes=1 << 20, ttl=60)),
+            mock.patch.object(yahoo, "yahoo_search", yahoo_search),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def search(self, query):
+        r = self.fetch("/v1/search?" + query)
+        return r.code, json.loads(r.body)
+
+    def test_limit_must_be_an_integer(self):
+        code, body = self.search("q=asml&limit=tien")
+        self.assertEqual(code, 400)
+        self.assertEqual(body, {"error": "limit must be an integer"})
+
+    def test_limit_must_be_positive(self):
+        self.assertEqual(self.search("q=asml&limit=0")[0], 400)
+
+    def test_limit_applies_to_the_network_fallback(self):
+        code, body = self.search("q=listing&limit=3")
+        self.assertEqual(code, 200)
+        self.assertEqual(len(body["results"]), 3)
+        self.assertEqual(self.counts, [15])   # zelfde cache-sleutel als de app
+
+    def test_large_limit_asks_yahoo_for_more(self):
+        code, body = self.search("q=other&limit=40")
+        self.assertEqual(len(body["results"]), 40)
+        self.assertEqual(self.counts, [40])
+        self.assertEqual(len(self.search("q=other&limit=500")[1]["results"]), 50)
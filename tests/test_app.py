@@ -0,0 +1,63 @@
+import ast
+import pathlib
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from qist import analytics, bench, metastore, search_index, yahoo
+
+APP = pathlib.Path(__file__).resolve().parent.parent / "app.py"
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv("QIST_CACHE_DB", str(tmp_path / "meta.sqlite3"))
+    monkeypatch.setenv("QIST_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(metastore, "_default", None)
+    stub = bench.StubYahoo(latency=0.0).start()
+    # install_stub overschrijft deze attributen; monkeypatch zet ze na de test terug
+    for attr in ("SEARCH_ENDPOINTS", "QUOTE_URL", "yf"):
+        monkeypatch.setattr(yahoo, attr, getattr(yahoo, attr))
+    bench.install_stub(stub)
+    events, searches = [], []
+    monkeypatch.setattr(analytics.GASender, "send", lambda self, cid, name, params: events.append(name) or True)
+    search = search_index.search
+    monkeypatch.setattr(search_index, "search", lambda query, **kw: searches.append(query) or search(query, **kw))
+    at = AppTest.from_file(str(APP), default_timeout=60)
+    at.secrets["ga"] = {"measurement_id": "G-TEST", "api_secret": "secret"}
+    at.events, at.searches = events, searches
+    yield at.run()
+    stub.stop()
+    for cache in (yahoo._search_cache, yahoo._quote_cache, yahoo._profile_cache, yahoo._meta_cache):
+        cache.clear()
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def test_page_view_once_per_session(app):
+    assert not app.exception
+    app.run()
+    app.run()
+    assert app.events == ["page_view"]
+
+
+def test_each_tab_checks_independently(app):
+    app.text_input[0].input(bench.FIXTURES[0]["symbol"]).run()
+    assert app.searches and app.selectbox
+    _button(app, "Check crypto").click().run()
+    _button(app, "Check aandeel").click().run()
+    assert not app.exception
+    assert len([m for m in app.markdown if m.value.startswith("### ")]) == 1   # knoppen zijn events: alleen de laatste check staat er
+    assert app.events == ["page_view", "check_crypto", "check_equity"]
+
+
+def test_tabs_are_fragments():
+    # AppTest draait bij elke interactie het hele script (geen fragment-reruns); daarom hier op de bron
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    fragments = {
+        node.name for node in tree.body if isinstance(node, ast.FunctionDef)
+        and any(ast.unparse(d) == "st.fragment" for d in node.decorator_list)
+    }
+    assert {"equity_tab", "equity_fundamentals", "bulk_section", "watchlist_section", "etf_tab", "crypto_tab"} <= fragments
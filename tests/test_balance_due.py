@@ -0,0 +1,65 @@
+import threading
+import time
+import types
+from concurrent.futures import Future
+
+import pandas as pd
+
+from qist import metrics
+from qist.yahoo import BS_MAX_AGE, BS_RETRY, _balance_due, _get_balance_if_due
+
+
+def _info(**info) -> Future:
+    fut: Future = Future()
+    fut.set_result(info)
+    return fut
+
+
+def _prev(period: str, fetched_ago: float) -> dict:
+    return {"totalDebt": 1.0, "totalAssets": 2.0, "bsPeriod": period, "bsFetchedAt": time.time() - fetched_ago}
+
+
+def _epoch(day: str) -> int:
+    return int(pd.Timestamp(day).timestamp())
+
+
+def test_no_previous_balance_is_due():
+    assert _balance_due(None, _info(), 1.0)
+    assert _balance_due({"bsPeriod": None}, _info(), 1.0)
+
+
+def test_recent_period_is_not_due():
+    recent = (pd.Timestamp.now() - pd.Timedelta(days=100)).date().isoformat()
+    assert not _balance_due(_prev(recent, 3600), _info(), 1.0)
+
+
+def test_safety_net_after_max_age():
+    recent = (pd.Timestamp.now() - pd.Timedelta(days=100)).date().isoformat()
+    assert _balance_due(_prev(recent, BS_MAX_AGE + 1), _info(), 1.0)
+
+
+def test_known_fiscal_year_is_not_due():
+    old = (pd.Timestamp.now() - pd.Timedelta(days=400)).date().isoformat()
+    assert not _balance_due(_prev(old, 2 * BS_RETRY), _info(lastFiscalYearEnd=_epoch(old)), 1.0)
+
+
+def test_new_fiscal_year_rate_limited_until_filing_appears():
+    old = (pd.Timestamp.now() - pd.Timedelta(days=400)).date().isoformat()
+    newer = _info(lastFiscalYearEnd=_epoch(old) + 86400 * 365)
+    # net opnieuw opgehaald en nog dezelfde periode: niet elk uur opnieuw
+    assert not _balance_due(_prev(old, 3600), newer, 1.0)
+    assert _balance_due(_prev(old, BS_RETRY + 1), newer, 1.0)
+    assert not _balance_due(_prev(old, 3600), _info(), 1.0)
+
+
+def test_balance_sheet_span_starts_after_info(monkeypatch):
+    spans = {}
+    monkeypatch.setattr(metrics.REGISTRY, "observe", lambda name, value, help="", **labels: spans.setdefault(labels["stage"], value))
+    old = (pd.Timestamp.now() - pd.Timedelta(days=400)).date().isoformat()
+    info: Future = Future()
+    threading.Timer(0.3, info.set_result, [{"lastFiscalYearEnd": _epoch(old) + 86400 * 365}]).start()
+    tk = types.SimpleNamespace(balance_sheet=pd.DataFrame())
+    t0 = time.monotonic()
+    assert _get_balance_if_due(tk, _prev(old, BS_RETRY + 1), info, 5.0) == (None, None, None)
+    assert time.monotonic() - t0 >= 0.3   # heeft wel op get_info gewacht ...
+    assert spans["meta.balance_sheet"] < 0.1   # ... maar dat telt niet als balans-tijd
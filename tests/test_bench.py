@@ -0,0 +1,68 @@
+import pytest
+import requests
+
+from qist import bench, metastore, yahoo
+
+
+def test_fixture_is_stable_for_synthetic_symbols():
+    assert bench.fixture("aapl")["longName"] == "Apple Inc."
+    a, b = bench.fixture("BENCH0007"), bench.fixture("bench0007")
+    assert a == b and a["symbol"] == "BENCH0007" and a["longName"].endswith("BENCH0007")
+    assert bench.bench_symbols(2, offset=10) == ["BENCH0010", "BENCH0011"]
+
+
+def test_stub_serves_yahoo_routes_and_counts_requests():
+    with bench.StubYahoo(latency=0.0) as stub:
+        search = requests.get(stub.url + "/v1/finance/search", params={"q": "asml"}, timeout=5).json()
+        assert [q["symbol"] for q in search["quotes"]] == ["ASML.AS"]
+        quotes = requests.get(stub.url + "/v7/finance/quote", params={"symbols": "AAPL,JPM"}, timeout=5).json()
+        assert [q["symbol"] for q in quotes["quoteResponse"]["result"]] == ["AAPL", "JPM"]
+        bench.StubTicker.base_url = stub.url
+        bs = bench.StubTicker("AAPL").balance_sheet
+        assert bs.loc["Total Debt"].iloc[0] == bench.fixture("AAPL")["totalDebt"]
+        assert requests.get(stub.url + "/nope", timeout=5).status_code == 404
+        assert stub.requests == {"/v1/finance/search": 1, "/v7/finance/quote": 1, "fundamentals": 1, "/nope": 1}
+
+
+def test_stub_injects_errors():
+    with bench.StubYahoo(latency=0.0, error_rate=1.0) as stub:
+        assert requests.get(stub.url + "/autoc", params={"query": "aapl"}, timeout=5).status_code == 503
+        assert requests.post(stub.url + "/mp/collect", json={}, timeout=5).status_code == 503
+
+
+def test_summarize():
+    s = bench.summarize([0.001 * i for i in range(1, 101)], wall=2.0)
+    assert s["n"] == 100 and s["throughput"] == 50.0
+    assert s["p50_ms"] == pytest.approx(50.5) and s["p99_ms"] == pytest.approx(99.01)
+
+
+def _phase(p95):
+    return {"p50_ms": p95 / 2, "p95_ms": p95, "p99_ms": p95, "mean_ms": p95 / 2, "throughput": 1.0, "n": 1}
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"a": {"cold": _phase(10.0), "warm": _phase(0.1)}, "b": {"cold": _phase(1.0)}, "_config": {"n": 1}}
+    current = {"a": {"cold": _phase(13.0), "warm": _phase(0.3)}, "_config": {"n": 2}}
+    assert bench.compare(current, baseline) == ["a/cold: p95 13.00 ms vs baseline 10.00 ms"]
+    assert bench.compare(current, baseline, tolerance=0.5) == []
+
+
+def test_format_table_skips_private_keys():
+    table = bench.format_table({"yahoo_quote": {"cold": _phase(2.0)}, "_stub_requests": {"/x": 1}})
+    assert len(table.splitlines()) == 2 and "yahoo_quote" in table and "_stub" not in table
+
+
+def test_run_suite_against_the_stub(monkeypatch, tmp_path):
+    # run_suite zet de stub en een verse cache-db proceswijd; na de test alles terug
+    monkeypatch.setenv("QIST_CACHE_DB", str(tmp_path / "meta.sqlite3"))
+    monkeypatch.setattr(metastore, "_default", None)
+    for attr in ("SEARCH_ENDPOINTS", "QUOTE_URL", "yf"):
+        monkeypatch.setattr(yahoo, attr, getattr(yahoo, attr))
+    monkeypatch.setattr(bench.tempfile, "mkdtemp", lambda prefix="": str(tmp_path))
+    results = bench.run_suite(n=8, concurrency=2, latency=0.0)
+    for cache in (yahoo._search_cache, yahoo._quote_cache, yahoo._profile_cache, yahoo._meta_cache):
+        cache.clear()
+    assert {"yahoo_search", "yahoo_quote", "fetch_symbol_metadata", "classify_equity"} <= set(results)
+    assert results["yahoo_quote"]["cold"]["n"] == 8
+    assert results["_config"]["n"] == 8 and results["_stub_requests"]
+    assert bench.compare(results, results) == []
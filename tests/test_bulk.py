@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+from qist import bulk, search_index, snapshot, yahoo
+
+
+def test_parse_symbols_splits_and_dedupes():
+    assert bulk.parse_symbols(" aapl, MSFT;msft\nUS0378331005  nan ;;") == ["AAPL", "MSFT", "US0378331005"]
+    assert bulk.parse_symbols("") == []
+
+
+def test_parse_csv_prefers_symbol_column():
+    csv = io.StringIO("Name,Ticker,Weight\nApple,aapl,0.5\nMicrosoft,MSFT,0.3\nEmpty,,0.2\nApple again,AAPL,0.1\n")
+    assert bulk.parse_csv(csv) == ["AAPL", "MSFT"]
+
+
+def test_parse_csv_falls_back_to_first_column():
+    assert bulk.parse_csv(io.StringIO("code,weight\nasml.as,1\nUS0378331005,2\n")) == ["ASML.AS", "US0378331005"]
+
+
+def test_resolve_symbol(monkeypatch):
+    monkeypatch.setattr(search_index, "search", lambda q: [{"symbol": "AAPL"}] if q == "US0378331005" else [])
+    assert bulk.resolve_symbol("MSFT") == "MSFT"
+    assert bulk.resolve_symbol("US0378331005") == "AAPL"
+    assert bulk.resolve_symbol("US0000000000") is None
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    prefetched, fetched = [], []
+    monkeypatch.setattr(yahoo, "prefetch_quotes", lambda symbols: prefetched.extend(symbols))
+    monkeypatch.setattr(search_index, "search", lambda q: [{"symbol": "AAPL"}] if q == "US0378331005" else [])
+    monkeypatch.setattr(snapshot, "lookup_meta", lambda s: {"symbol": s, "source": "snapshot"} if s == "MSFT" else None)
+
+    def fetch(symbol):
+        fetched.append(symbol)
+        if symbol == "BOOM":
+            raise RuntimeError("yahoo down")
+        return {"symbol": symbol, "source": "live"}
+
+    monkeypatch.setattr(yahoo, "fetch_symbol_metadata", fetch)
+    return prefetched, fetched
+
+
+def test_screen_many(offline):
+    prefetched, fetched = offline
+    out = dict(bulk.screen_many(["MSFT", "US0378331005", "US0000000000", "BOOM"]))
+    assert prefetched == ["MSFT", "BOOM"]   # ISIN's niet: die lopen via de zoekindex
+    assert out == {
+        "MSFT": {"symbol": "MSFT", "source": "snapshot"},
+        "US0378331005": {"symbol": "AAPL", "source": "live"},
+        "US0000000000": None,
+        "BOOM": None,
+    }
+    assert sorted(fetched) == ["AAPL", "BOOM"]
+
+
+def test_screen_many_caps_the_list(offline, monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_MAX_SYMBOLS", 3)
+    assert len(list(bulk.screen_many([f"T{i}" for i in range(10)]))) == 3
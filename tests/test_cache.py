@@ -0,0 +1,79 @@
+import pickle
+import types
+
+import pytest
+
+from qist import cache
+from qist.cache import MISSING, LRUCache, record_type
+
+Quote = record_type("Quote", ["symbol", "name", "marketCap"])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_evicts_least_recently_used():
+    c = LRUCache("test", max_entries=2, max_bytes=10**6, ttl=60)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1       # a is nu het recentst gebruikt
+    c.put("c", 3)
+    assert c.get("b") is MISSING
+    assert (c.get("a"), c.get("c")) == (1, 3)
+    assert c.stats()["evictions"] == 1
+
+
+def test_byte_limit():
+    c = LRUCache("test", max_entries=100, max_bytes=100, ttl=60, sizeof=len)
+    c.put("a", "x" * 60)
+    c.put("b", "y" * 60)
+    assert c.get("a") is MISSING and c.bytes == 60
+    c.put("big", "z" * 101)      # groter dan de hele cache: niet bewaren, niets wegduwen
+    assert c.get("big") is MISSING and c.get("b") == "y" * 60
+
+
+def test_ttl(clock):
+    c = LRUCache("test", max_entries=10, max_bytes=10**6, ttl=30)
+    c.put("a", 1)
+    clock[0] += 29
+    assert c.get("a") == 1
+    clock[0] += 2
+    assert c.get("a") is MISSING
+    assert len(c) == 0 and c.bytes == 0
+    assert c.stats()["expirations"] == 1
+
+
+def test_get_or_load_keeps_only_non_empty():
+    c = LRUCache("test", max_entries=10, max_bytes=10**6, ttl=60)
+    loads = []
+    assert c.get_or_load("a", lambda: loads.append(1) or {}) == {}
+    assert c.get_or_load("a", lambda: loads.append(1) or (1,)) == (1,)
+    assert c.get_or_load("a", lambda: loads.append(1) or (2,)) == (1,)
+    assert len(loads) == 2
+    s = c.stats()
+    assert (s["hits"], s["misses"]) == (1, 2)
+
+
+def test_record_reads_like_a_dict():
+    q = Quote.from_mapping({"symbol": "AAPL", "name": "Apple", "extra": "weg"})
+    assert dict(q) == {"symbol": "AAPL", "name": "Apple", "marketCap": None}
+    assert q["symbol"] == "AAPL" and q.get("extra") is None and q.get("marketCap", 0) is None
+    with pytest.raises(KeyError):
+        q["extra"]
+    with pytest.raises(AttributeError):
+        q.name = "Pear"
+    assert not hasattr(q, "__dict__")
+
+
+def test_record_pickles():
+    q = Quote(symbol="ASML.AS", name="ASML", marketCap=1.0)
+    assert dict(pickle.loads(pickle.dumps(q))) == dict(q)
+
+
+def test_record_is_smaller_than_dict():
+    d = {"symbol": "AAPL", "name": "Apple", "marketCap": 1.0}
+    assert cache.sizeof(Quote.from_mapping(d)) < cache.sizeof(d)
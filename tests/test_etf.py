@@ -0,0 +1,74 @@
+import types
+
+import pytest
+
+from qist import etf, yahoo
+
+VERDICTS = {"AAA": "halal", "BBB": "not_halal", "CCC": "doubt", "DDD": "unclassified"}
+
+
+class FakeSearch:
+    """Zoek-endpoint zoals Yahoo: aandelen en ETF's door elkaar, het aandeel met de hoogste score."""
+
+    def __init__(self):
+        self.queries = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        query = (params or {}).get("q") or (params or {}).get("query")
+        self.queries.append(query)
+        quotes = []
+        if "islamic" in query.lower() or query == "IE00B27YCN58":
+            quotes = [
+                {"symbol": "BLK", "shortname": "BlackRock, Inc.", "exchange": "NYQ", "quoteType": "EQUITY", "score": 900},
+                {"symbol": "ISDW.L", "shortname": "iShares MSCI World Islamic", "exchange": "LSE", "quoteType": "ETF", "score": 500},
+            ]
+        return types.SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"quotes": quotes})
+
+
+@pytest.fixture
+def search(monkeypatch):
+    fake = FakeSearch()
+    monkeypatch.setattr(yahoo, "default_client", lambda: fake)
+    yahoo._search_cache.clear()
+    yield fake
+    yahoo._search_cache.clear()
+
+
+def test_resolve_etf_by_name_skips_equities(search):
+    assert etf.resolve_etf(" iShares MSCI World Islamic ") == "ISDW.L"
+    assert search.queries[0] == "iShares MSCI World Islamic"
+
+
+def test_resolve_etf_by_isin(search):
+    assert etf.resolve_etf("IE00B27YCN58") == "ISDW.L"
+
+
+def test_resolve_etf_ticker_needs_no_search(search):
+    assert etf.resolve_etf("ISDW.L") == "ISDW.L"
+    assert etf.resolve_etf("isdw.l") == "ISDW.L"
+    assert etf.resolve_etf("SPUS") == "SPUS"
+    assert search.queries == []
+
+
+def test_resolve_etf_unknown(search):
+    assert etf.resolve_etf("geen etf") is None
+
+
+def test_equity_search_still_skips_etfs(search):
+    assert [r["symbol"] for r in yahoo.yahoo_search("islamic world")] == ["BLK"]
+
+
+def test_look_through_weights(monkeypatch):
+    monkeypatch.setattr(yahoo, "prefetch_quotes", lambda symbols: None)
+    monkeypatch.setattr(etf, "_safe_verdict", lambda s: {"status": VERDICTS[s], "reason": "-", "name": None})
+    holdings = [
+        {"symbol": "AAA", "weight": 0.4},
+        {"symbol": "BBB", "weight": 0.1},
+        {"symbol": "CCC", "weight": 0.3},
+        {"symbol": "DDD", "weight": 0.2},
+    ]
+    lt = etf.look_through("ETF", holdings)
+    assert lt["halal_pct"] == 50           # 0.4 / 0.8 gescreend
+    assert lt["purification_pct"] == 12    # gewicht niet-halal, afgerond
+    assert round(lt["coverage_pct"]) == 100
+    assert round(lt["screened_pct"]) == 80
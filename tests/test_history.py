@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from qist import history
+
+
+def _sheet(periods, debt, assets, shares):
+    return pd.DataFrame(
+        [debt, assets, shares],
+        index=["Total Debt", "Total Assets", "Ordinary Shares Number"],
+        columns=pd.to_datetime(periods),
+    )
+
+
+def test_periods_picks_rows_and_fallbacks():
+    bs = pd.DataFrame([[50.0], [200.0]], index=["Total Liabilities", "Total Assets"], columns=pd.to_datetime(["2023-12-31"]))
+    df = history._periods(bs, "A")
+    assert list(df.columns) == ["totalDebt", "totalAssets", "shares", "freq"]
+    assert df.loc["2023-12-31", "totalDebt"] == 50.0 and np.isnan(df.loc["2023-12-31", "shares"])
+    assert history._periods(None, "Q").empty
+
+
+def test_market_cap_uses_last_price_on_or_before_period():
+    annual = history._periods(_sheet(["2022-12-31", "2023-12-31"], [10.0, 40.0], [100.0, 100.0], [10.0, 10.0]), "A")
+    prices = pd.Series([5.0, 10.0], index=pd.to_datetime(["2022-12-26", "2023-12-25"]))
+    out = history.compute_history(annual, pd.DataFrame(), prices)
+    assert list(out["period"]) == ["2022-12-31", "2023-12-31"]
+    assert list(out["debt_ratio"]) == [0.2, 0.4]          # 10 / (10 × 5), 40 / (10 × 10)
+    assert list(out["basis"]) == ["mc", "mc"]
+    assert list(out["status"]) == ["halal", "not_halal"]
+
+
+def test_duplicate_price_dates_do_not_raise():
+    annual = history._periods(_sheet(["2023-12-31"], [10.0], [100.0], [10.0]), "A")
+    prices = pd.Series([9.0, 10.0, 5.0], index=pd.to_datetime(["2023-12-25", "2023-12-25", "2023-12-18"]))
+    out = history.compute_history(annual, pd.DataFrame(), prices)
+    assert list(out["debt_ratio"]) == [0.1]               # laatste koers van de dubbele datum
+
+
+def test_quarter_wins_over_same_annual_period_and_no_prices_falls_back_to_assets():
+    annual = history._periods(_sheet(["2023-12-31"], [99.0], [100.0], [1.0]), "A")
+    quarterly = history._periods(_sheet(["2023-09-30", "2023-12-31"], [20.0, 25.0], [100.0, 100.0], [1.0, 1.0]), "Q")
+    out = history.compute_history(annual, quarterly, pd.Series(dtype=float))
+    assert list(out["freq"]) == ["Q", "Q"]
+    assert list(out["debt_ratio"]) == [0.2, 0.25]
+    assert list(out["basis"]) == ["assets", "assets"]
+
+
+def test_activity_from_profile_excludes_every_period():
+    annual = history._periods(_sheet(["2022-12-31", "2023-12-31"], [0.0, 0.0], [100.0, 100.0], [1.0, 1.0]), "A")
+    out = history.compute_history(annual, pd.DataFrame(), pd.Series(dtype=float), {"sector": "Gambling", "name": "Casino"})
+    assert list(out["status"]) == ["not_halal", "not_halal"]
+
+
+def test_compliant_since():
+    h = pd.DataFrame({
+        "period": pd.to_datetime(["2021-12-31", "2022-12-31", "2023-12-31", "2024-12-31"]),
+        "status": ["halal", "not_halal", "halal", "halal_full"],
+    })
+    assert history.compliant_since(h) == pd.Timestamp("2023-12-31")
+    assert history.compliant_since(h.iloc[:2]) is None
+    assert history.compliant_since(h.iloc[:0]) is None
@@ -0,0 +1,29 @@
+import threading
+
+from qist import yahoo
+
+
+def test_cached_fundamentals_come_back_resolved(monkeypatch):
+    rec = yahoo.MetaRecord(symbol="LAZY1", name="Lazy", is_valid=True)
+    yahoo._meta_cache.put("LAZY1", rec)
+    monkeypatch.setattr(yahoo, "fetch_symbol_metadata", lambda s: (_ for _ in ()).throw(AssertionError("fetch")))
+    fut = yahoo.fetch_symbol_metadata_async("LAZY1")
+    assert fut.done() and fut.result() is rec
+
+
+def test_many_sessions_fetch_fundamentals_side_by_side(monkeypatch):
+    # elke fetch wacht tot ze allemaal lopen: met een te kleine pool breekt de barrier
+    n = min(yahoo.FUNDAMENTALS_WORKERS, 12)
+    barrier = threading.Barrier(n, timeout=5)
+
+    def slow_fetch(symbol):
+        barrier.wait()
+        return {"symbol": symbol}
+
+    monkeypatch.setattr(yahoo, "fetch_symbol_metadata", slow_fetch)
+    futures = [yahoo.fetch_symbol_metadata_async(f"LAZYSESSION{i}") for i in range(n)]
+    assert [f.result(timeout=10)["symbol"] for f in futures] == [f"LAZYSESSION{i}" for i in range(n)]
+
+
+def test_fundamentals_pool_is_not_smaller_than_the_metadata_pool():
+    assert yahoo._lazy_pool._max_workers >= yahoo.METADATA_WORKERS
@@ -0,0 +1,70 @@
+import random
+
+import streamlit as st
+
+from qist import analytics, bench, loadtest, metastore, yahoo
+
+
+def _phase(p95, **extra):
+    return {"n": 2, "p50_ms": p95 / 2, "p95_ms": p95, "p99_ms": p95, "mean_ms": p95 / 2, "throughput": 4.0, **extra}
+
+
+def test_format_table_reports_incomplete_sessions():
+    table = loadtest.format_table({
+        "c2": {"load": _phase(100.0), "rerun": _phase(200.0, sessions_per_s=1.5, incomplete=1)},
+        "_stub_requests": {"/v7/finance/quote": 3, "/autoc": 1},
+        "_config": {"levels": [2]},
+    }).splitlines()
+    assert len(table) == 5
+    assert table[2].split()[:3] == ["c2", "rerun", "2"] and table[2].endswith("1.50")
+    assert "1 sessie(s) niet volledig" in table[3]
+    assert table[4] == "stub-requests: /autoc 1, /v7/finance/quote 3"
+
+
+def test_run_level_aggregates_steps(monkeypatch):
+    seen = []
+
+    def fake_session(query, pick=0):
+        seen.append(query)
+        full = {"load": 0.01, "search": 0.02, "select": 0.03, "check": 0.04}
+        return full if query.startswith("BENCH") else {"load": 0.01}
+
+    monkeypatch.setattr(loadtest, "run_session", fake_session)
+    out = loadtest.run_level(2, 6, hot=0.5, rng=random.Random(3), offset=0)
+    hot = sum(not q.startswith("BENCH") for q in seen)
+    assert len(seen) == 6 and 0 < hot < 6
+    assert out["load"]["n"] == 6 and out["check"]["n"] == 6 - hot
+    assert out["rerun"]["incomplete"] == hot
+    assert out["rerun"]["n"] == 6 + 3 * (6 - hot)
+
+
+def test_sessions_run_side_by_side_against_the_stubs(monkeypatch, tmp_path):
+    monkeypatch.setenv("QIST_CACHE_DB", str(tmp_path / "meta.sqlite3"))
+    monkeypatch.setenv("QIST_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(metastore, "_default", None)
+    # install_stub / install_analytics_stub zetten proceswijde attributen; monkeypatch zet ze terug
+    for attr in ("SEARCH_ENDPOINTS", "QUOTE_URL", "yf"):
+        monkeypatch.setattr(yahoo, attr, getattr(yahoo, attr))
+    monkeypatch.setattr(analytics, "GA_COLLECT_URL", analytics.GA_COLLECT_URL)
+    monkeypatch.setattr(analytics.SheetWriter, "_worksheet", analytics.SheetWriter._worksheet)
+    # de app houdt GA-/Sheets-writers in cache_resource: verse exemplaren die nog tegen de stub leegschrijven
+    writers = []
+    for cls in (analytics.GASender, analytics.SheetWriter):
+        init = cls.__init__
+        monkeypatch.setattr(cls, "__init__", lambda self, *a, _init=init, **kw: writers.append(self) or _init(self, *a, **kw))
+    st.cache_resource.clear()
+    try:
+        with bench.StubYahoo(latency=0.0) as stub:
+            bench.install_stub(stub)
+            with loadtest.shared_runtime(loadtest.install_analytics_stub(stub)):
+                out = loadtest.run_level(2, 2, hot=1.0, rng=random.Random(1), offset=0)
+            for writer in writers:
+                writer.close()
+            assert len(writers) == 2
+            assert stub.requests["/mp/collect"] >= 1 and stub.requests["/sheets/append"] >= 1
+    finally:
+        st.cache_resource.clear()
+        for cache in (yahoo._search_cache, yahoo._quote_cache, yahoo._profile_cache, yahoo._meta_cache):
+            cache.clear()
+    assert out["rerun"]["incomplete"] == 0
+    assert all(out[step]["n"] == 2 for step in loadtest.STEPS)
@@ -0,0 +1,100 @@
+import threading
+import time
+import types
+
+import pandas as pd
+import pytest
+
+from qist import yahoo
+from qist.metastore import MetaStore
+
+BALANCE = pd.DataFrame(
+    {pd.Timestamp("2025-12-31"): [100.0, 400.0]}, index=["Total Debt", "Total Assets"],
+)
+
+
+class FakeTicker:
+    """yfinance.Ticker met per deel-request een eigen (eventueel blokkerend) antwoord."""
+
+    def __init__(self, info=None, fast=None, balance=BALANCE, history=None, gate=None):
+        self._info = info if info is not None else {}
+        self._fast = fast if fast is not None else {}
+        self._balance = balance
+        self._history = history if history is not None else pd.DataFrame()
+        self.gate = gate or (lambda part: None)
+
+    def get_info(self):
+        self.gate("info")
+        return self._info
+
+    @property
+    def fast_info(self):
+        self.gate("fast")
+        return self._fast
+
+    @property
+    def balance_sheet(self):
+        self.gate("bs")
+        return self._balance
+
+    def history(self, period=None, interval=None):
+        self.gate("history")
+        return self._history
+
+
+@pytest.fixture
+def live(monkeypatch, tmp_path):
+    store = MetaStore(str(tmp_path / "meta.sqlite3"))
+    monkeypatch.setattr(yahoo, "default_store", lambda: store)
+    quote = {}
+
+    def fake_quote(symbol):
+        quote["gate"]("quote")
+        return quote["value"]
+
+    monkeypatch.setattr(yahoo, "yahoo_quote", fake_quote)
+
+    def install(ticker, quote_value=None, quote_gate=None):
+        monkeypatch.setattr(yahoo, "yf", types.SimpleNamespace(Ticker=lambda symbol: ticker))
+        quote.update(value=quote_value or {}, gate=quote_gate or (lambda part: None))
+
+    yield install
+    store._pool.shutdown(wait=True)
+
+
+def test_sub_requests_run_side_by_side(live):
+    # elk deel wacht tot alle vier lopen: sequentieel zou de barrier breken en alles ontbreken
+    barrier = threading.Barrier(4, timeout=5)
+    info = {"longName": "Apple Inc.", "exchange": "NMS", "currency": "USD", "marketCap": 1000.0, "sector": "Technology"}
+    live(FakeTicker(info=info, gate=lambda part: barrier.wait()), quote_gate=lambda part: barrier.wait())
+    meta = yahoo.fetch_symbol_metadata_live("AAPL", deadline=5)
+    assert meta["name"] == "Apple Inc." and meta["sector"] == "Technology"
+    assert (meta["totalDebt"], meta["totalAssets"], meta["bsPeriod"]) == (100.0, 400.0, "2025-12-31")
+    assert meta["is_valid"]
+
+
+def test_info_wins_and_quote_fills_the_gaps(live):
+    info = {"shortName": "Apple", "exchange": "NMS"}
+    quote = {"name": "Apple (quote)", "exchange": "NYQ", "currency": "USD", "marketCap": 2000.0, "industry": "Consumer Electronics"}
+    live(FakeTicker(info=info, fast={"currency": "EUR"}), quote_value=quote)
+    meta = yahoo.fetch_symbol_metadata_live("AAPL", deadline=5)
+    assert (meta["name"], meta["exchange"], meta["currency"]) == ("Apple", "NMS", "EUR")
+    assert meta["marketCap"] == 2000.0 and meta["industry"] == "Consumer Electronics"
+
+
+def test_slow_part_counts_as_missing_at_the_deadline(live):
+    release = threading.Event()
+    quote = {"name": "Apple", "exchange": "NMS", "currency": "USD", "marketCap": 2000.0}
+    live(FakeTicker(gate=lambda part: part == "info" and release.wait(5)), quote_value=quote)
+    t0 = time.monotonic()
+    meta = yahoo.fetch_symbol_metadata_live("AAPL", deadline=0.3)
+    release.set()
+    assert time.monotonic() - t0 < 2
+    assert meta["name"] == "Apple" and meta["totalDebt"] == 100.0 and meta["sector"] is None
+
+
+def test_unknown_symbol_falls_back_to_history_probe(live):
+    live(FakeTicker(balance=pd.DataFrame()))
+    assert not yahoo.fetch_symbol_metadata_live("NOPE", deadline=5)["is_valid"]
+    live(FakeTicker(balance=pd.DataFrame(), history=pd.DataFrame({"Close": [1.0]})))
+    assert yahoo.fetch_symbol_metadata_live("NOPE", deadline=5)["is_valid"]
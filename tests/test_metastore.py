@@ -0,0 +1,96 @@
+import types
+
+import pytest
+
+from qist import metastore
+from qist.metastore import MetaStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(metastore, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = MetaStore(str(tmp_path / "meta.sqlite3"), max_age=100, refresh_workers=1)
+    yield s
+    s._pool.shutdown(wait=True)
+
+
+def test_put_none_keeps_value(store, clock):
+    store.put("meta", "AAPL", {"sector": "Tech", "name": "Apple"})
+    store.put("meta", "AAPL", {"sector": None, "name": "Apple Inc."})
+    record, stale = store.get("meta", "AAPL", {}, 10)
+    assert record == {"sector": "Tech", "name": "Apple Inc."}
+    assert not stale
+
+
+def test_vanished_value_ages_out(store, clock):
+    # Yahoo levert een veld niet meer: de oude waarde blijft tot max_age, daarna None
+    store.put("meta", "AAPL", {"sector": "Tech", "name": "Apple"})
+    clock[0] += 50
+    store.put("meta", "AAPL", {"sector": None, "name": "Apple"})
+    assert store.get("meta", "AAPL", {}, 1000)[0]["sector"] == "Tech"
+    clock[0] += 60   # sector 110 s oud: voorbij max_age; name pas 60 s
+    assert store.get("meta", "AAPL", {}, 1000) == ({"sector": None, "name": "Apple"}, False)
+
+
+def test_flaky_field_does_not_defeat_cache(store, clock):
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        return {"sector": "Tech" if len(calls) == 1 else None, "name": "Apple"}
+
+    store.get_or_fetch("meta", "AAPL", fetch, {}, 1000)
+    clock[0] += 60
+    store.put("meta", "AAPL", fetch("AAPL"))   # verversing zonder sector
+    clock[0] += 30   # sector 90 s oud, laatste fetch 30 s
+    calls.clear()
+    for _ in range(3):
+        assert store.get_or_fetch("meta", "AAPL", fetch, {}, 1000)["sector"] == "Tech"
+    clock[0] += 30   # sector verouderd, de rest vers: geen miss en geen refetch
+    for _ in range(3):
+        assert store.get_or_fetch("meta", "AAPL", fetch, {}, 1000) == {"sector": None, "name": "Apple"}
+    assert calls == []
+
+
+def test_stale_field_triggers_background_refresh(store, clock):
+    store.put("meta", "AAPL", {"name": "Apple", "marketCap": 1})
+    clock[0] += 20
+    fetched = []
+    record = store.get_or_fetch("meta", "AAPL", lambda k: fetched.append(k) or {"marketCap": 2}, {"marketCap": 10}, 1000)
+    assert record["marketCap"] == 1
+    store._pool.shutdown(wait=True)
+    assert fetched == ["AAPL"]
+    assert store.get("meta", "AAPL", {}, 1000)[0]["marketCap"] == 2
+
+
+def test_miss_after_max_age(store, clock):
+    store.put("meta", "AAPL", {"name": "Apple"})
+    clock[0] += 101
+    assert store.get("meta", "AAPL", {}, 1000) is None
+
+
+def test_prune_removes_rows_older_than_max_age(store, clock):
+    store.put("meta", "AAPL", {"name": "Apple", "sector": "Tech"})
+    clock[0] += 50
+    store.put("meta", "MSFT", {"name": "Microsoft"})
+    store.put("meta", "AAPL", {"name": "Apple", "sector": None})
+    clock[0] += 60
+    assert store.prune() == 1   # alleen AAPL/sector (110 s); de rest is 60 s oud
+    rows = store._conn().execute("SELECT key, field FROM fields ORDER BY key, field").fetchall()
+    assert rows == [("AAPL", "name"), ("MSFT", "name")]
+
+
+def test_put_prunes_at_most_once_per_interval(store, clock):
+    store.put("meta", "AAPL", {"name": "Apple"})
+    clock[0] += 101
+    store.put("meta", "MSFT", {"name": "Microsoft"})   # binnen PRUNE_INTERVAL na de eerste opruimronde
+    assert store._conn().execute("SELECT COUNT(*) FROM fields").fetchone()[0] == 2
+    clock[0] += metastore.PRUNE_INTERVAL
+    store.put("meta", "MSFT", {"name": "Microsoft"})
+    assert store._conn().execute("SELECT key FROM fields").fetchall() == [("MSFT",)]
@@ -0,0 +1,123 @@
+import types
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from qist import bench, metrics, net
+from qist.net import CircuitOpenError, HttpClient, RetryBudget
+
+URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+
+class FakeSession:
+    """Geeft per aanroep de volgende uitkomst: een statuscode of een exception."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else 200
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return types.SimpleNamespace(status_code=outcome, headers={})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    sleeps = []
+    monkeypatch.setattr(net, "time", types.SimpleNamespace(monotonic=lambda: now[0], sleep=sleeps.append))
+    return now, sleeps
+
+
+def _client(*outcomes, retries=0):
+    client = HttpClient(max_retries=retries)
+    client.session = FakeSession(*outcomes)
+    return client
+
+
+def _trip(client):
+    for _ in range(net.BREAKER_THRESHOLD):
+        with pytest.raises(requests.ConnectionError):
+            client.get(URL)
+
+
+def test_breaker_opens_after_threshold(clock):
+    client = _client(*[requests.ConnectionError("down")] * net.BREAKER_THRESHOLD)
+    _trip(client)
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    assert client.session.calls == net.BREAKER_THRESHOLD
+    assert client.stats()["hosts"]["query1.finance.yahoo.com"]["circuit"] == "open"
+
+
+def test_half_open_lets_one_trial_through_and_closes_on_success(clock):
+    now, _ = clock
+    client = _client(*[requests.ConnectionError("down")] * net.BREAKER_THRESHOLD)
+    _trip(client)
+    now[0] += net.BREAKER_COOLDOWN + 1
+    assert client.get(URL).status_code == 200
+    assert client.get(URL).status_code == 200
+    assert client.stats()["hosts"]["query1.finance.yahoo.com"]["circuit"] == "closed"
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.ChunkedEncodingError("cut"), ValueError("bad argument")])
+def test_failed_trial_never_blocks_the_host_for_good(clock, error):
+    now, _ = clock
+    client = _client(*[requests.ConnectionError("down")] * net.BREAKER_THRESHOLD, error)
+    _trip(client)
+    now[0] += net.BREAKER_COOLDOWN + 1
+    with pytest.raises(type(error)):
+        client.get(URL)
+    now[0] += net.BREAKER_COOLDOWN + 1
+    assert client.get(URL).status_code == 200
+
+
+def test_retries_within_budget(clock):
+    _, sleeps = clock
+    client = _client(503, requests.ConnectionError("reset"), 200, retries=2)
+    assert client.get(URL).status_code == 200
+    assert client.session.calls == 3 and len(sleeps) == 2
+    assert client.counters["retries"] == 2
+
+
+def test_no_retry_when_budget_is_empty(clock):
+    client = _client(503, 200, retries=2)
+    client.budget.tokens = 0.0
+    assert client.get(URL).status_code == 503
+    assert client.session.calls == 1
+    assert client.counters["budget_exhausted"] == 1
+
+
+def test_read_timeouts_and_bad_requests_are_not_retried(clock):
+    client = _client(requests.ReadTimeout("slow"), requests.exceptions.InvalidURL("nope"), retries=2)
+    with pytest.raises(requests.ReadTimeout):
+        client.get(URL)
+    with pytest.raises(requests.exceptions.InvalidURL):
+        client.get(URL)
+    assert client.session.calls == 2
+
+
+def test_retry_budget_refills_slowly_and_is_capped():
+    budget = RetryBudget(ratio=0.5, cap=2.0)
+    assert budget.withdraw() and budget.withdraw() and not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2.0
+
+
+def test_connection_reuse_is_visible():
+    with bench.StubYahoo(latency=0.0) as stub:
+        client = HttpClient()
+        for _ in range(3):
+            client.get(stub.url + "/v7/finance/quote", params={"symbols": "AAPL"}, timeout=5).raise_for_status()
+        host = urlsplit(stub.url).hostname
+        assert client.stats()["hosts"][host]["reused"] == 2
+    assert f'qist_http_connections_reused{{host="{host}"}} 2' in metrics.render()
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from qist import yahoo
+from qist.yahoo import QuoteBatcher
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    batches = []
+
+    def quotes_live(symbols):
+        batches.append(list(symbols))
+        return {s: {"symbol": s, "name": s.lower()} for s in symbols if s != "NOPE"}
+
+    monkeypatch.setattr(yahoo, "yahoo_quotes_live", quotes_live)
+    return batches
+
+
+def test_requests_in_one_window_share_a_batch(upstream):
+    batcher = QuoteBatcher(window=0.1, max_batch=50)
+    start = threading.Barrier(6)
+    out = {}
+
+    def one(sym, i):
+        start.wait()
+        out[i] = batcher.submit(sym).result(timeout=5)
+
+    threads = [threading.Thread(target=one, args=(sym, i)) for i, sym in enumerate(["AAPL", "MSFT", "AAPL", "ASML", "MSFT", "AAPL"])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(upstream) == 1
+    assert sorted(upstream[0]) == ["AAPL", "ASML", "MSFT"]   # hetzelfde symbool één plek in de batch
+    assert out[0] == out[2] == out[5] == {"symbol": "AAPL", "name": "aapl"}
+    assert batcher.batches == 1 and batcher.symbols == 3
+
+
+def test_full_batch_goes_without_waiting_for_the_window(upstream):
+    batcher = QuoteBatcher(window=10.0, max_batch=3)
+    futures = [batcher.submit(s) for s in ["A", "B", "C", "D", "E", "F", "G"]]
+    for f in futures[:6]:
+        assert f.result(timeout=2)["symbol"]
+    assert [len(b) for b in upstream[:2]] == [3, 3]
+
+
+def test_unknown_symbol_and_failures_give_empty_quotes(upstream, monkeypatch):
+    batcher = QuoteBatcher(window=0.01)
+    assert batcher.submit("NOPE").result(timeout=5) == {}
+
+    def boom(symbols):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(yahoo, "yahoo_quotes_live", boom)
+    assert batcher.submit("AAPL").result(timeout=5) == {}
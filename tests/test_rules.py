@@ -0,0 +1,106 @@
+import itertools
+import random
+import re
+
+import numpy as np
+import pandas as pd
+
+from qist import rules
+
+NAMES = [None, "", "Apple Inc.", "Islamic Bank of Britain", "Brewdog", "Blending Co", "Cigna Corp", "ING Groep",
+         "Acme Consumer", "Acme Capital", "Lending Tree", "Al Rajhi Banking", "Royal Caribbean"]
+SECTORS = [None, "", "Technology", "Financial Services", "Consumer Defensive", "Alcohol", "Insurance", "Healthcare"]
+INDUSTRIES = [None, "", "Consumer Electronics", "Banks—Regional", "Finance Credit Services", "Markets Data",
+              "Insurance—Life", "Beverages—Brewers", "Specialty Chemicals", "REIT—Retail"]
+# randgevallen van de schuldratio: 0, precies op de grenzen, geen basis, NaN en 0 als 'geen waarde'
+DEBTS = [None, np.nan, 0.0, 30.0, 33.0, 31.5, 50.0]
+BASES = [None, np.nan, 0.0, 100.0]
+
+
+def _frame(rows):
+    df = pd.DataFrame(rows, columns=["name", "sector", "industry", "totalDebt", "marketCap", "totalAssets"])
+    for col in ("totalDebt", "marketCap", "totalAssets"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def _assert_rows_equal(df, labels=rules.BASIS_LABELS):
+    out = rules.classify_equity_frame(df, labels)
+    for i, row in enumerate(df.to_dict("records")):
+        status, reasons = rules.classify_equity(row, labels)
+        ratio, basis = rules.compute_debt_ratio(row, labels)
+        got = out.iloc[i]
+        assert (got["status"], got["reason"]) == (status, reasons[0]), row
+        assert got["basis"] == basis, row
+        assert (ratio is None and np.isnan(got["debt_ratio"])) or got["debt_ratio"] == ratio, row
+
+
+def test_frame_matches_scalar_on_text_combinations():
+    rows = [(n, s, i, 10.0, 100.0, None) for n, s, i in itertools.product(NAMES, SECTORS, INDUSTRIES)]
+    _assert_rows_equal(_frame(rows))
+
+
+def test_frame_matches_scalar_on_debt_edges():
+    rows = [("Apple Inc.", "Technology", "Consumer Electronics", d, mc, a)
+            for d, mc, a in itertools.product(DEBTS, BASES, BASES)]
+    _assert_rows_equal(_frame(rows))
+
+
+def test_frame_matches_scalar_random_sample():
+    rng = random.Random(7)
+    rows = [(rng.choice(NAMES), rng.choice(SECTORS), rng.choice(INDUSTRIES), rng.choice(DEBTS),
+             rng.choice(BASES), rng.choice(BASES)) for _ in range(2000)]
+    _assert_rows_equal(_frame(rows), {"mc": "t.o.v. market cap", "assets": "t.o.v. activa", "unknown": "onbekend"})
+
+
+def test_frame_missing_columns_count_as_empty():
+    df = pd.DataFrame({"name": ["Casino Royale", "Apple Inc."]})
+    out = rules.classify_equity_frame(df)
+    assert list(out["status"]) == ["not_halal", "unclassified"]
+    assert out.index.equals(df.index)
+
+
+# ---------- _keyword_hit t.o.v. de oorspronkelijke regel (één regex over de samengevoegde tekst) ----------
+_OLD_PAT = re.compile(
+    r"(alcohol|brew|beer|wine|casino|gambl|pork|adult|porn|weapon|tobacco|cig|cannabis|marijuana|"
+    r"\bbank(s|ing)?\b|\binsur(ance|er|ers)?\b|\breinsurance\b|\bmortgage\b|\bcredit\b|\blending\b|\bloans?\b|\breit\b|\bcapital markets\b|\bconsumer finance\b)",
+    re.IGNORECASE
+)
+
+
+def _old_is_haram_activity(name, sector, industry):
+    if sector in rules.HARAM_SECTORS:
+        return f"Excluded sector: {sector}"
+    text = " ".join([str(name or ""), str(sector or ""), str(industry or "")]).lower()
+    if "islamic" in text and ("bank" in text or "insur" in text):
+        return None
+    m = _OLD_PAT.search(text)
+    if m:
+        return f"Conventional finance/haram activity detected ({m.group(0)})"
+    return None
+
+
+WORDS = ["Acme", "Consumer", "Finance", "Capital", "Markets", "Islamic", "Bank", "Banks", "Banking", "Bankrate",
+         "Insur", "Insurers", "Reinsurance", "Credit", "Lending", "Blending", "Loan", "Loans", "REIT", "Winery",
+         "Cigarette", "Porky", "Brewers", "Data", "Holdings", "Services", "—", "Mortgage", "Adultery"]
+
+
+def _phrase(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 3)))
+
+
+def test_keyword_hit_matches_old_regex_across_field_boundaries():
+    cases = [
+        ("Acme Consumer", "Finance", ""), ("Acme Capital", "Markets Data", ""), ("Acme", "Capital", "Markets"),
+        ("Islamic Fund", "", "Insurance—Life"), ("Acme Islamic", "Banks", ""), ("Acme Consumer", "", "Finance"),
+        ("Bankrate", "", ""), ("Blending Co", "", ""), ("", "", ""), (None, None, None),
+    ]
+    for case in cases:
+        assert rules.is_haram_activity(*case) == _old_is_haram_activity(*case), case
+
+
+def test_keyword_hit_matches_old_regex_random():
+    rng = random.Random(16)
+    for _ in range(5000):
+        case = (_phrase(rng), _phrase(rng), _phrase(rng))
+        assert rules.is_haram_activity(*case) == _old_is_haram_activity(*case), case
@@ -0,0 +1,102 @@
+import threading
+import time
+import types
+
+import pytest
+
+from qist import yahoo
+
+
+def _quote(symbol):
+    return {"symbol": symbol, "shortname": symbol, "exchange": "NMS", "quoteType": "EQUITY", "score": 1}
+
+
+class FakeEndpoints:
+    """Per endpoint een gedrag: "ok", "fail" of "slow" (wacht tot release, dan ok)."""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self.release = threading.Event()
+        self._names = {url: name for name, url in yahoo.SEARCH_ENDPOINTS}
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        name = self._names[url]
+        self.calls.append(name)
+        mode = self.behaviour.get(name, "ok")
+        if mode == "fail":
+            raise ConnectionError(name)
+        if mode == "slow":
+            self.release.wait(5)
+        if name == "autoc":
+            data = {"ResultSet": {"Result": [{"symbol": "AUTO", "name": "Auto", "typeDisp": "Equity"}]}}
+        else:
+            data = {"quotes": [_quote(name.upper())]}
+        return types.SimpleNamespace(raise_for_status=lambda: None, json=lambda: data)
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    monkeypatch.setattr(yahoo, "_health", {name: yahoo.EndpointHealth() for name, _ in yahoo.SEARCH_ENDPOINTS})
+    monkeypatch.setattr(yahoo, "HEDGE_DEFAULT", 0.05)
+    monkeypatch.setattr(yahoo, "HEDGE_MIN", 0.05)
+
+    def install(**behaviour):
+        fake = FakeEndpoints(**behaviour)
+        monkeypatch.setattr(yahoo, "default_client", lambda: fake)
+        return fake
+
+    yield install
+
+
+def _wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_slow_primary_is_hedged_and_loses_without_error(endpoints):
+    fake = endpoints(query2="slow")
+    results, complete = yahoo._hedged_search("apple", 15)
+    assert [r["symbol"] for r in results] == ["QUERY1"] and complete
+    assert fake.calls == ["query2", "query1"]
+    health = yahoo._health["query2"]
+    assert health.lost == 1 and health.error_rate == 0.0
+    # het verloren antwoord komt alsnog: alleen de latency telt mee
+    fake.release.set()
+    assert _wait_for(lambda: len(health.latencies) == 1)
+    assert health.error_rate == 0.0 and health.healthy
+    assert yahoo.search_health()["query2"]["lost"] == 1
+
+
+def test_failure_starts_next_endpoint_without_waiting(endpoints, monkeypatch):
+    monkeypatch.setattr(yahoo, "HEDGE_DEFAULT", 5.0)
+    fake = endpoints(query2="fail")
+    t0 = time.monotonic()
+    results, _ = yahoo._hedged_search("apple", 15)
+    assert time.monotonic() - t0 < 1.0
+    assert [r["symbol"] for r in results] == ["QUERY1"]
+    assert fake.calls == ["query2", "query1"]
+    assert yahoo._health["query2"].error_rate > 0 and yahoo._health["query2"].lost == 0
+
+
+def test_fallback_order_ends_at_autoc(endpoints):
+    fake = endpoints(query2="fail", query1="fail")
+    results, complete = yahoo._hedged_search("apple", 15)
+    assert [r["symbol"] for r in results] == ["AUTO"] and not complete
+    assert fake.calls == ["query2", "query1", "autoc"]
+
+
+def test_unhealthy_endpoint_moves_to_the_back(endpoints):
+    for _ in range(4):
+        yahoo._health["query2"].record(False, 0.1)
+    assert not yahoo._health["query2"].healthy
+    fake = endpoints()
+    yahoo._hedged_search("apple", 15)
+    assert fake.calls == ["query1"]
+
+
+def test_all_endpoints_fail(endpoints):
+    endpoints(query2="fail", query1="fail", autoc="fail")
+    assert yahoo._hedged_search("apple", 15) == ([], False)
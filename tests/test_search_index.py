@@ -0,0 +1,93 @@
+import types
+
+import pytest
+
+from qist import cache, search_index
+from qist.cache import LRUCache
+from qist.search_index import SearchIndex
+
+NETWORK = {
+    "BABCOCK": [{"symbol": "BAB.L", "shortname": "Babcock International", "exchange": "LSE"}],
+    "BA": [
+        {"symbol": "BA", "shortname": "Boeing Company", "exchange": "NYQ"},
+        {"symbol": "BAB.L", "shortname": "Babcock International", "exchange": "LSE"},
+        {"symbol": "BAC", "shortname": "Bank of America", "exchange": "NYQ"},
+    ],
+    "ROYAL BANK": [{"symbol": "RY", "shortname": "Royal Bank of Canada", "exchange": "NYQ"}],
+    "ROYAL": [
+        {"symbol": "RY", "shortname": "Royal Bank of Canada", "exchange": "NYQ"},
+        {"symbol": "RCL", "shortname": "Royal Caribbean Cruises", "exchange": "NYQ"},
+    ],
+    "US0378331005": [{"symbol": "AAPL", "shortname": "Apple Inc.", "exchange": "NMS"}],
+}
+
+
+@pytest.fixture
+def network(monkeypatch):
+    calls = []
+
+    def fallback(query):
+        calls.append(query)
+        return NETWORK.get(query.strip().upper(), [])
+
+    monkeypatch.setattr(search_index, "_isin_hits", LRUCache("test_isin", max_entries=10, max_bytes=1 << 20, ttl=60))
+    return fallback, calls
+
+
+def _symbols(rows):
+    return [r["symbol"] for r in rows]
+
+
+def test_earlier_searches_do_not_hide_network_results(monkeypatch, network):
+    fallback, calls = network
+    monkeypatch.setattr(search_index, "_default", SearchIndex())
+    search_index.search("babcock", fallback)
+    assert _symbols(search_index.search("BA", fallback)) == ["BA", "BAB.L", "BAC"]
+    search_index.search("royal bank", fallback)
+    assert _symbols(search_index.search("royal", fallback)) == ["RY", "RCL"]
+    assert calls == ["babcock", "BA", "royal bank", "royal"]
+
+
+def test_repeat_search_for_a_ticker_keeps_the_full_list(monkeypatch, network):
+    fallback, calls = network
+    monkeypatch.setattr(search_index, "_default", SearchIndex())
+    first = _symbols(search_index.search("BA", fallback))
+    assert _symbols(search_index.search("BA", fallback)) == first == ["BA", "BAB.L", "BAC"]
+
+
+def test_isin_hits_expire(monkeypatch, network):
+    fallback, calls = network
+    now = [1000.0]
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(search_index, "_default", SearchIndex())
+    search_index.search("US0378331005", fallback)
+    now[0] += 61
+    assert _symbols(search_index.search("US0378331005", fallback)) == ["AAPL"]
+    assert calls == ["US0378331005", "US0378331005"]
+
+
+def test_exact_isin_hit_is_served_locally(monkeypatch, network):
+    fallback, calls = network
+    monkeypatch.setattr(search_index, "_default", SearchIndex())
+    assert _symbols(search_index.search("US0378331005", fallback)) == ["AAPL"]
+    assert _symbols(search_index.search("US0378331005", fallback)) == ["AAPL"]
+    assert calls == ["US0378331005"]
+
+
+def test_snapshot_is_authoritative(tmp_path, monkeypatch, network):
+    fallback, calls = network
+    path = tmp_path / "listings.csv"
+    path.write_text("symbol,name,exchange,isin\nASML.AS,ASML Holding N.V.,AMS,NL0010273215\n", encoding="utf-8")
+    index = SearchIndex.load(str(path))
+    assert index.authoritative
+    monkeypatch.setattr(search_index, "_default", index)
+    assert _symbols(search_index.search("asml", fallback)) == ["ASML.AS"]
+    assert _symbols(search_index.search("NL0010273215", fallback)) == ["ASML.AS"]
+    assert calls == []
+    # netwerkresultaten komen niet in de snapshot-index
+    search_index.search("royal", fallback)
+    assert index.search("royal") == []
+
+
+def test_missing_snapshot_is_not_authoritative(tmp_path):
+    assert not SearchIndex.load(str(tmp_path / "none.csv")).authoritative
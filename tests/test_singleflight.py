@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from qist.singleflight import SingleFlight
+
+
+def _concurrently(n, fn):
+    start = threading.Barrier(n)
+    out, errors = [None] * n, [None] * n
+
+    def one(i):
+        start.wait()
+        try:
+            out[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out, errors
+
+
+def test_concurrent_callers_share_one_fetch():
+    flight = SingleFlight("test")
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return {"symbol": key}
+
+    out, errors = _concurrently(8, lambda: flight.do("AAPL", fetch, "AAPL"))
+    assert calls == ["AAPL"]
+    assert errors == [None] * 8
+    assert all(r is out[0] for r in out)   # hetzelfde object, geen kopie
+    assert flight.stats() == {"inflight": 0, "leaders": 1, "waiters": 7}
+
+
+def test_waiters_get_the_same_error():
+    flight = SingleFlight("test")
+
+    def fetch():
+        time.sleep(0.2)
+        raise TimeoutError("yahoo")
+
+    _, errors = _concurrently(4, lambda: flight.do("k", fetch))
+    assert all(isinstance(e, TimeoutError) for e in errors)
+    assert flight.stats()["inflight"] == 0
+
+
+def test_nothing_is_kept_afterwards():
+    flight = SingleFlight("test")
+    calls = []
+    fetch = flight.wrap(lambda key: calls.append(key) or len(calls))
+    assert fetch("AAPL") == 1
+    assert fetch("AAPL") == 2   # geen cache: een volgende aanroep haalt opnieuw
+    assert calls == ["AAPL", "AAPL"]
+
+
+def test_different_keys_do_not_wait_on_each_other():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    slow = threading.Thread(target=lambda: flight.do("slow", release.wait, 5))
+    slow.start()
+    try:
+        assert flight.do("fast", lambda: "ok") == "ok"
+    finally:
+        release.set()
+        slow.join()
+    with pytest.raises(ValueError):
+        flight.do("fast", int, "x")
@@ -0,0 +1,96 @@
+import importlib
+import os
+import types
+
+import pytest
+
+from qist import rules, snapshot
+
+META = {
+    "AAPL": {"name": "Apple Inc.", "sector": "Technology", "industry": "Consumer Electronics",
+             "marketCap": 3.0e12, "totalDebt": 1.0e11, "totalAssets": 3.5e11, "is_valid": True},
+    "JPM": {"name": "JPMorgan Chase & Co.", "sector": "Financial Services", "industry": "Banks - Diversified",
+            "marketCap": 5.0e11, "totalDebt": 4.0e11, "totalAssets": 4.0e12, "is_valid": True},
+    "NOPE": {},
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"time": 1_700_000_000.0, "mono": 5.0}
+    monkeypatch.setattr(snapshot, "time", types.SimpleNamespace(time=lambda: now["time"], monotonic=lambda: now["mono"]))
+    return now
+
+
+@pytest.fixture
+def universe(monkeypatch, clock):
+    monkeypatch.setattr(snapshot, "_fetch_live", lambda sym: META[sym])
+    return snapshot.screen_universe(["AAPL", " JPM", "NOPE", "AAPL", ""], workers=2)
+
+
+@pytest.fixture
+def fresh(monkeypatch, tmp_path):
+    monkeypatch.setenv("QIST_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshot, "_current", None)
+    monkeypatch.setattr(snapshot, "_current_name", "")
+    monkeypatch.setattr(snapshot, "_checked", float("-inf"))
+    return tmp_path
+
+
+def test_screen_universe_one_row_per_symbol(universe):
+    assert sorted(universe["symbol"]) == ["AAPL", "JPM", "NOPE"]
+    status = dict(zip(universe["symbol"], universe["status"]))
+    assert status["JPM"] == "not_halal"
+    assert status["NOPE"] == "unclassified"
+
+
+def test_write_and_lookup(universe, tmp_path, clock):
+    snap = snapshot.VerdictSnapshot(snapshot.write_snapshot(universe, str(tmp_path)))
+    assert len(snap) == 3
+    assert snap.rules_version == rules.RULES_VERSION
+    row = snap.lookup("AAPL")
+    status, _ = rules.classify_equity(META["AAPL"])
+    assert row["status"] == status and row["name"] == "Apple Inc."
+    assert snap.lookup("MSFT") is None
+    assert snap.lookup_meta("NOPE") is None
+    assert snap.lookup_meta("JPM") == {**{c: None for c in snapshot.META_COLUMNS}, **META["JPM"], "symbol": "JPM"}
+    with open(tmp_path / "LATEST", encoding="utf-8") as f:
+        assert f.read().strip() == os.path.basename(snap.path)
+
+
+def test_old_rows_go_live(universe, tmp_path, clock):
+    snap = snapshot.VerdictSnapshot(snapshot.write_snapshot(universe, str(tmp_path)))
+    clock["time"] += snapshot.SNAPSHOT_MAX_AGE + 1
+    assert snap.lookup("AAPL") is None
+
+
+def test_other_rules_version_recomputes_verdict(universe, tmp_path, monkeypatch, clock):
+    universe.loc[universe["symbol"] == "JPM", "status"] = "halal"
+    snap = snapshot.VerdictSnapshot(snapshot.write_snapshot(universe, str(tmp_path)))
+    assert snap.lookup("JPM")["status"] == "halal"
+    monkeypatch.setattr(rules, "RULES_VERSION", "other")
+    assert snap.lookup("JPM")["status"] == "not_halal"
+
+
+def test_current_snapshot_loads_right_after_boot(universe, fresh, monkeypatch, clock):
+    # monotonic() telt vanaf de boot: 5 s na een (container)start moet de eerste aanroep al laden
+    importlib.reload(snapshot)
+    monkeypatch.setattr(snapshot, "time", types.SimpleNamespace(time=lambda: clock["time"], monotonic=lambda: clock["mono"]))
+    snapshot.write_snapshot(universe, str(fresh))
+    snap = snapshot.current_snapshot()
+    assert snap is not None and snap.lookup("AAPL") is not None
+
+
+def test_current_snapshot_picks_up_new_version(universe, fresh, tmp_path_factory, clock):
+    first = snapshot.write_snapshot(universe, str(fresh))
+    assert snapshot.current_snapshot().path == first
+    other = snapshot.write_snapshot(universe[universe["symbol"] != "AAPL"], str(tmp_path_factory.mktemp("next")))
+    os.replace(other, fresh / "universe-next.arrow")
+    (fresh / "LATEST").write_text("universe-next.arrow\n", encoding="utf-8")
+    assert snapshot.current_snapshot().path == first   # nog binnen RELOAD_CHECK
+    clock["mono"] += snapshot.RELOAD_CHECK
+    assert len(snapshot.current_snapshot()) == 2
+
+
+def test_lookup_meta_without_snapshot(fresh, clock):
+    assert snapshot.lookup_meta("AAPL") is None
@@ -0,0 +1,79 @@
+import time
+import types
+
+import pytest
+
+from qist import typeahead, yahoo
+
+
+def _stub(monkeypatch, cached=None):
+    calls = []
+
+    def upstream(query, quotes_count=15):
+        calls.append(query)
+        return [{"symbol": query.upper(), "shortname": query}]
+
+    monkeypatch.setattr(yahoo, "search_cached", lambda q, n=15: (cached or {}).get(q))
+    monkeypatch.setattr(yahoo, "yahoo_search", upstream)
+    return calls
+
+
+def test_lookup_goes_upstream_without_waiting(monkeypatch):
+    calls = _stub(monkeypatch)
+    t0 = time.perf_counter()
+    assert typeahead.lookup("asml") == [{"symbol": "ASML", "shortname": "asml"}]
+    assert time.perf_counter() - t0 < 0.1
+    assert calls == ["asml"]
+
+
+def test_lookup_narrows_complete_prefix_locally(monkeypatch):
+    short = [{"symbol": "AAPL", "shortname": "Apple Inc."}, {"symbol": "ABNB", "shortname": "Airbnb"}]
+    calls = _stub(monkeypatch, cached={"ap": (short, True)})
+    assert typeahead.lookup("app") == [short[0]]
+    assert calls == []
+
+
+def test_lookup_does_not_narrow_truncated_prefix(monkeypatch):
+    short = [{"symbol": "AAPL", "shortname": "Apple Inc."}, {"symbol": "ABNB", "shortname": "Airbnb"}]
+    calls = _stub(monkeypatch, cached={"ap": (short, False)})
+    typeahead.lookup("app")
+    assert calls == ["app"]
+
+
+def test_lookup_never_returns_none(monkeypatch):
+    _stub(monkeypatch)
+    assert typeahead.lookup("a") == []
+    assert typeahead.lookup("zzz") is not None
+
+
+# ---------- via de echte zoekcache ----------
+class FakeSearch:
+    """Yahoo geeft precies quotesCount quotes, waarvan een deel geen aandeel is."""
+
+    def __init__(self):
+        self.queries = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        query = params.get("q") or params.get("query")
+        self.queries.append(query)
+        n = params.get("quotesCount", 10)
+        quotes = [{"symbol": f"{query.upper()}{chr(65 + i)}", "shortname": f"{query} {i}",
+                   "quoteType": "EQUITY" if i % 3 else "ETF", "score": 100 - i} for i in range(n)]
+        return types.SimpleNamespace(raise_for_status=lambda: None, json=lambda: {"quotes": quotes})
+
+
+@pytest.fixture
+def search(monkeypatch):
+    fake = FakeSearch()
+    monkeypatch.setattr(yahoo, "default_client", lambda: fake)
+    yahoo._search_cache.clear()
+    yield fake
+    yahoo._search_cache.clear()
+
+
+def test_filtered_full_answer_is_not_complete(search):
+    rows = typeahead.lookup("ap")
+    assert len(rows) < 15                       # 15 quotes, na het aandelenfilter minder
+    assert yahoo.search_cached("ap") == (rows, False)
+    typeahead.lookup("apb")
+    assert search.queries == ["ap", "apb"]      # de afgekapte prefix-lijst verfijnt "apb" niet
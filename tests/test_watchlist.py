@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from qist import watchlist
+from qist.watchlist import WatchStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WatchStore(str(tmp_path / "meta.sqlite3"))
+
+
+def test_status_change_raises_alert(store):
+    assert store.record("AAPL", "halal", 0.29, "mc", []) is None
+    alert = store.record("AAPL", "doubt", 0.31, "mc", [])
+    assert alert["old_status"] == "halal" and alert["new_status"] == "doubt"
+    assert [a["new_status"] for a in store.alerts(["AAPL"])] == ["doubt"]
+
+
+def test_failed_first_screen_is_not_a_verdict(store):
+    store.add("l1", "AAPL")
+    store.touch("AAPL")
+    assert store.results(["AAPL"]) == {}
+    assert store.record("AAPL", "halal", 0.1, "mc", []) is None
+    assert store.alerts(["AAPL"]) == []
+    assert store.results(["AAPL"])["AAPL"]["status"] == "halal"
+
+
+def test_failed_rescreen_keeps_previous_verdict(store):
+    store.record("AAPL", "halal", 0.1, "mc", [])
+    store.touch("AAPL")
+    assert store.results(["AAPL"])["AAPL"]["status"] == "halal"
+    assert store.record("AAPL", "halal", 0.12, "mc", []) is None
+
+
+def test_failed_rescreen_keeps_screened_at_and_waits_for_retry(store, monkeypatch):
+    store.add("l1", "AAPL")
+    store.record("AAPL", "halal", 0.1, "mc", [])
+    screened = store.results(["AAPL"])["AAPL"]["screened_at"]
+    later = time.time() + watchlist.WATCH_MAX_AGE + 60
+    monkeypatch.setattr(watchlist.time, "time", lambda: later)
+    assert store.due() == ["AAPL"]
+    store.touch("AAPL")
+    assert store.results(["AAPL"])["AAPL"]["screened_at"] == screened
+    assert store.due() == []
+    monkeypatch.setattr(watchlist.time, "time", lambda: later + watchlist.WATCH_RETRY + 1)
+    assert store.due() == ["AAPL"]
+
+
+def test_failed_first_screen_waits_for_retry(store, monkeypatch):
+    store.add("l1", "AAPL")
+    store.touch("AAPL")
+    assert store.due() == []
+    later = time.time() + watchlist.WATCH_RETRY + 1
+    monkeypatch.setattr(watchlist.time, "time", lambda: later)
+    assert store.due() == ["AAPL"]
+
+
+def test_due_orders_by_staleness_then_popularity(store):
+    for list_id in ("a", "b", "c"):
+        store.add(list_id, "JPM")
+    store.add("a", "AAPL")
+    store.add("a", "BUD")
+    store.record("BUD", "not_halal", 0.7, "mc", [])
+    assert store.due() == ["JPM", "AAPL"]
+    assert store.due(max_age=-1) == ["JPM", "AAPL", "BUD"]